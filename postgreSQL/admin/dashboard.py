@@ -1,227 +1,99 @@
-from fastapi import APIRouter, HTTPException
-from postgreSQL.database import DatabaseInterface
+from fastapi import APIRouter, HTTPException, Query
+from postgreSQL.async_database import AsyncDatabaseInterface
+from postgreSQL.cache import cached
+from postgreSQL.metrics.timeseries import GRANULARITY_PATTERN, Series, build_timeseries_query, series_points
 import logging
-from datetime import datetime, timedelta
 from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# All dashboard counters in one round trip. Windowed and all-time counts come
+# from the daily_metrics rollups (see postgreSQL/metrics/rollups.py), so they
+# cost one row per day instead of a scan of the source tables; only the
+# current-state counts that depend on deletions are read live.
+DASHBOARD_STATS_QUERY = """
+    WITH bounds AS (
+        SELECT
+            CURRENT_DATE AS today,
+            date_trunc('week', CURRENT_DATE)::date AS week,
+            date_trunc('month', CURRENT_DATE)::date AS month,
+            date_trunc('year', CURRENT_DATE)::date AS year
+    ),
+    user_stats AS (
+        SELECT COUNT(*) AS total_users
+        FROM users
+        WHERE deleted_at IS NULL
+    ),
+    subscription_stats AS (
+        SELECT COUNT(*) AS active_subscriptions
+        FROM subscriptions
+        WHERE status = 'active' AND deleted_at IS NULL
+    ),
+    ticket_stats AS (
+        SELECT COUNT(*) AS open_tickets
+        FROM support_tickets
+        WHERE status IN ('open', 'pending')
+    ),
+    rollup_stats AS (
+        SELECT
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'subscriptions_active_new' AND m.day >= b.today), 0)::bigint AS subscriptions_today,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'subscriptions_active_new' AND m.day >= b.week), 0)::bigint AS subscriptions_week,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'subscriptions_active_new' AND m.day >= b.month), 0)::bigint AS subscriptions_month,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'subscriptions_active_new' AND m.day >= b.year), 0)::bigint AS subscriptions_year,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'affiliates_new'), 0)::bigint AS total_affiliates,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'affiliates_new' AND m.day >= b.today), 0)::bigint AS affiliates_today,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'affiliates_new' AND m.day >= b.week), 0)::bigint AS affiliates_week,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'affiliates_new' AND m.day >= b.month), 0)::bigint AS affiliates_month,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'affiliates_new' AND m.day >= b.year), 0)::bigint AS affiliates_year,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'referrals_new'), 0)::bigint AS total_referrals,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'referrals_new' AND m.day >= b.today), 0)::bigint AS referrals_today,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'referrals_new' AND m.day >= b.week), 0)::bigint AS referrals_week,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'referrals_new' AND m.day >= b.month), 0)::bigint AS referrals_month,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'referrals_new' AND m.day >= b.year), 0)::bigint AS referrals_year,
+            COALESCE(SUM(m.total) FILTER (WHERE m.metric = 'referrals_converted'), 0) AS total_commissions,
+            COALESCE(SUM(m.total) FILTER (WHERE m.metric = 'transactions_succeeded'), 0) AS total_revenue,
+            COALESCE(SUM(m.total) FILTER (WHERE m.metric = 'transactions_succeeded' AND m.day >= b.month), 0) AS monthly_revenue,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'promo_usages'), 0)::bigint AS promo_usage,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'promo_usages' AND m.day >= b.today), 0)::bigint AS promo_today,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'promo_usages' AND m.day >= b.week), 0)::bigint AS promo_week,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'promo_usages' AND m.day >= b.month), 0)::bigint AS promo_month,
+            COALESCE(SUM(m.count) FILTER (WHERE m.metric = 'promo_usages' AND m.day >= b.year), 0)::bigint AS promo_year
+        FROM daily_metrics m
+        CROSS JOIN bounds b
+        WHERE m.metric IN ('subscriptions_active_new', 'affiliates_new', 'referrals_new',
+                           'referrals_converted', 'transactions_succeeded', 'promo_usages')
+    )
+    SELECT *
+    FROM user_stats, subscription_stats, ticket_stats, rollup_stats
+"""
+
+def _breakdown(row: Dict[str, Any], prefix: str) -> Dict[str, int]:
+    return {period: row[f"{prefix}_{period}"] for period in ("today", "week", "month", "year")}
+
 @router.get("/dashboard-stats")
+@cached(ttl=30)
 async def get_dashboard_stats():
     """Get admin dashboard statistics"""
     try:
-        # Total Users (excluding soft-deleted)
-        total_users_query = """
-            SELECT COUNT(*) as count 
-            FROM users 
-            WHERE deleted_at IS NULL
-        """
-        total_users_result = DatabaseInterface.execute_query(total_users_query)
-        total_users = total_users_result[0]['count'] if total_users_result else 0
-
-        # Total Affiliates
-        total_affiliates_query = """
-            SELECT COUNT(*) as count 
-            FROM affiliates
-        """
-        total_affiliates_result = DatabaseInterface.execute_query(total_affiliates_query)
-        total_affiliates = total_affiliates_result[0]['count'] if total_affiliates_result else 0
-
-        # Active Subscriptions
-        active_subscriptions_query = """
-            SELECT COUNT(*) as count 
-            FROM subscriptions 
-            WHERE status = 'active' AND deleted_at IS NULL
-        """
-        active_subscriptions_result = DatabaseInterface.execute_query(active_subscriptions_query)
-        active_subscriptions = active_subscriptions_result[0]['count'] if active_subscriptions_result else 0
-
-        # Monthly Revenue (current month)
-        monthly_revenue_query = """
-            SELECT COALESCE(SUM(amount), 0) as revenue
-            FROM transactions 
-            WHERE status = 'succeeded' 
-            AND EXTRACT(YEAR FROM created_at) = EXTRACT(YEAR FROM CURRENT_DATE)
-            AND EXTRACT(MONTH FROM created_at) = EXTRACT(MONTH FROM CURRENT_DATE)
-        """
-        monthly_revenue_result = DatabaseInterface.execute_query(monthly_revenue_query)
-        monthly_revenue = float(monthly_revenue_result[0]['revenue']) if monthly_revenue_result else 0.0
-
-        # Commissions Paid (total)
-        commissions_paid_query = """
-            SELECT COALESCE(SUM(commission_amount), 0) as total_commissions
-            FROM referrals 
-            WHERE status = 'converted'
-        """
-        commissions_paid_result = DatabaseInterface.execute_query(commissions_paid_query)
-        commissions_paid = float(commissions_paid_result[0]['total_commissions']) if commissions_paid_result else 0.0
-
-        # Open Support Tickets
-        open_tickets_query = """
-            SELECT COUNT(*) as count 
-            FROM support_tickets 
-            WHERE status IN ('open', 'pending')
-        """
-        open_tickets_result = DatabaseInterface.execute_query(open_tickets_query)
-        open_tickets = open_tickets_result[0]['count'] if open_tickets_result else 0
-
-        # Promo Usage (current month)
-        promo_usage_query = """
-            SELECT COUNT(*) as count
-            FROM promo_usages
-            WHERE EXTRACT(YEAR FROM used_at) = EXTRACT(YEAR FROM CURRENT_DATE)
-            AND EXTRACT(MONTH FROM used_at) = EXTRACT(MONTH FROM CURRENT_DATE)
-        """
-        promo_usage_result = DatabaseInterface.execute_query(promo_usage_query)
-        promo_usage = promo_usage_result[0]['count'] if promo_usage_result else 0
-
-        # Promo Usage (all time)
-        promo_usage_total_query = """
-            SELECT COUNT(*) as count FROM promo_usages
-        """
-        promo_usage_total_result = DatabaseInterface.execute_query(promo_usage_total_query)
-        promo_usage_total = promo_usage_total_result[0]['count'] if promo_usage_total_result else 0
-
-        # Breakdown of new active subscriptions
-        breakdown_queries = {
-            "today": """
-                SELECT COUNT(*) as count FROM subscriptions
-                WHERE status = 'active' AND deleted_at IS NULL
-                AND created_at >= date_trunc('day', CURRENT_DATE)
-            """,
-            "week": """
-                SELECT COUNT(*) as count FROM subscriptions
-                WHERE status = 'active' AND deleted_at IS NULL
-                AND created_at >= date_trunc('week', CURRENT_DATE)
-            """,
-            "month": """
-                SELECT COUNT(*) as count FROM subscriptions
-                WHERE status = 'active' AND deleted_at IS NULL
-                AND created_at >= date_trunc('month', CURRENT_DATE)
-            """,
-            "year": """
-                SELECT COUNT(*) as count FROM subscriptions
-                WHERE status = 'active' AND deleted_at IS NULL
-                AND created_at >= date_trunc('year', CURRENT_DATE)
-            """
-        }
-        active_subscriptions_breakdown = {}
-        for key, query in breakdown_queries.items():
-            result = DatabaseInterface.execute_query(query)
-            active_subscriptions_breakdown[key] = result[0]['count'] if result else 0
-
-        # Breakdown of new promo usages
-        promo_breakdown_queries = {
-            "today": """
-                SELECT COUNT(*) as count FROM promo_usages
-                WHERE used_at >= date_trunc('day', CURRENT_DATE)
-            """,
-            "week": """
-                SELECT COUNT(*) as count FROM promo_usages
-                WHERE used_at >= date_trunc('week', CURRENT_DATE)
-            """,
-            "month": """
-                SELECT COUNT(*) as count FROM promo_usages
-                WHERE used_at >= date_trunc('month', CURRENT_DATE)
-            """,
-            "year": """
-                SELECT COUNT(*) as count FROM promo_usages
-                WHERE used_at >= date_trunc('year', CURRENT_DATE)
-            """
-        }
-        promo_usage_breakdown = {}
-        for key, query in promo_breakdown_queries.items():
-            result = DatabaseInterface.execute_query(query)
-            promo_usage_breakdown[key] = result[0]['count'] if result else 0
-
-        # Breakdown of new affiliates
-        affiliates_breakdown_queries = {
-            "today": """
-                SELECT COUNT(*) as count FROM affiliates
-                WHERE created_at >= date_trunc('day', CURRENT_DATE)
-            """,
-            "week": """
-                SELECT COUNT(*) as count FROM affiliates
-                WHERE created_at >= date_trunc('week', CURRENT_DATE)
-            """,
-            "month": """
-                SELECT COUNT(*) as count FROM affiliates
-                WHERE created_at >= date_trunc('month', CURRENT_DATE)
-            """,
-            "year": """
-                SELECT COUNT(*) as count FROM affiliates
-                WHERE created_at >= date_trunc('year', CURRENT_DATE)
-            """
-        }
-        affiliates_breakdown = {}
-        for key, query in affiliates_breakdown_queries.items():
-            result = DatabaseInterface.execute_query(query)
-            affiliates_breakdown[key] = result[0]['count'] if result else 0
-
-        # Total Referrals
-        total_referrals_query = """
-            SELECT COUNT(*) as count FROM referrals
-        """
-        total_referrals_result = DatabaseInterface.execute_query(total_referrals_query)
-        total_referrals = total_referrals_result[0]['count'] if total_referrals_result else 0
-
-        # Breakdown of new referrals
-        referrals_breakdown_queries = {
-            "today": """
-                SELECT COUNT(*) as count FROM referrals
-                WHERE created_at >= date_trunc('day', CURRENT_DATE)
-            """,
-            "week": """
-                SELECT COUNT(*) as count FROM referrals
-                WHERE created_at >= date_trunc('week', CURRENT_DATE)
-            """,
-            "month": """
-                SELECT COUNT(*) as count FROM referrals
-                WHERE created_at >= date_trunc('month', CURRENT_DATE)
-            """,
-            "year": """
-                SELECT COUNT(*) as count FROM referrals
-                WHERE created_at >= date_trunc('year', CURRENT_DATE)
-            """
-        }
-        referrals_breakdown = {}
-        for key, query in referrals_breakdown_queries.items():
-            result = DatabaseInterface.execute_query(query)
-            referrals_breakdown[key] = result[0]['count'] if result else 0
-
-        # Total Revenue (all time)
-        total_revenue_query = """
-            SELECT COALESCE(SUM(amount), 0) as revenue
-            FROM transactions
-            WHERE status = 'succeeded'
-        """
-        total_revenue_result = DatabaseInterface.execute_query(total_revenue_query)
-        total_revenue = float(total_revenue_result[0]['revenue']) if total_revenue_result else 0.0
-
-        # Total Commissions Paid (all time)
-        total_commissions_query = """
-            SELECT COALESCE(SUM(commission_amount), 0) as total_commissions
-            FROM referrals
-            WHERE status = 'converted'
-        """
-        total_commissions_result = DatabaseInterface.execute_query(total_commissions_query)
-        total_commissions = float(total_commissions_result[0]['total_commissions']) if total_commissions_result else 0.0
+        result = await AsyncDatabaseInterface.execute_query(DASHBOARD_STATS_QUERY)
+        row = result[0]
+        total_commissions = float(row['total_commissions'])
 
         return {
-            "total_users": total_users,
-            "total_affiliates": total_affiliates,
-            "active_subscriptions": active_subscriptions,
-            "active_subscriptions_breakdown": active_subscriptions_breakdown,
-            "monthly_revenue": monthly_revenue,
-            "commissions_paid": commissions_paid,
-            "open_tickets": open_tickets,
-            "promo_usage": promo_usage_total,
-            "promo_usage_breakdown": promo_usage_breakdown,
-            "affiliates_breakdown": affiliates_breakdown,
-            "total_referrals": total_referrals,
-            "referrals_breakdown": referrals_breakdown,
-            "total_revenue": total_revenue,
+            "total_users": row['total_users'],
+            "total_affiliates": row['total_affiliates'],
+            "active_subscriptions": row['active_subscriptions'],
+            "active_subscriptions_breakdown": _breakdown(row, "subscriptions"),
+            "monthly_revenue": float(row['monthly_revenue']),
+            "commissions_paid": total_commissions,
+            "open_tickets": row['open_tickets'],
+            "promo_usage": row['promo_usage'],
+            "promo_usage_breakdown": _breakdown(row, "promo"),
+            "affiliates_breakdown": _breakdown(row, "affiliates"),
+            "total_referrals": row['total_referrals'],
+            "referrals_breakdown": _breakdown(row, "referrals"),
+            "total_revenue": float(row['total_revenue']),
             "total_commissions": total_commissions
         }
 
@@ -230,47 +102,27 @@ async def get_dashboard_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/revenue-chart")
-async def get_revenue_chart_data():
+async def get_revenue_chart_data(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(12, ge=1, le=366)
+):
     """Get revenue data for the last 12 months"""
     try:
-        revenue_query = """
-            SELECT 
-                TO_CHAR(created_at, 'Mon YYYY') as name,
-                COALESCE(SUM(amount), 0) as revenue
-            FROM transactions 
-            WHERE status = 'succeeded' 
-            AND created_at >= CURRENT_DATE - INTERVAL '12 months'
-            GROUP BY DATE_TRUNC('month', created_at), TO_CHAR(created_at, 'Mon YYYY')
-            ORDER BY DATE_TRUNC('month', created_at)
-        """
-        
-        result = DatabaseInterface.execute_query(revenue_query)
-        # Build a dict for quick lookup
-        revenue_dict = {row['name']: float(row['revenue']) for row in result}
-
-        # Generate last 12 months labels
-        now = datetime.now()
-        months = []
-        for i in range(11, -1, -1):
-            month = (now.replace(day=1) - timedelta(days=30*i))
-            label = month.strftime('%b %Y')
-            months.append(label)
-
-        # Fill with 0 if missing
-        revenue_data = []
-        for label in months:
-            revenue_data.append({
-                "name": label,
-                "revenue": revenue_dict.get(label, 0.0)
-            })
-
-        return revenue_data
+        query, params = build_timeseries_query(
+            "transactions", "created_at",
+            [Series("revenue", "SUM(amount)")],
+            granularity=granularity, periods=periods,
+            where="status = 'succeeded'"
+        )
+        result = await AsyncDatabaseInterface.execute_query(query, params)
+        return series_points(result, "revenue", value_key="revenue")
     
     except Exception as e:
         logger.error(f"Error fetching revenue chart data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/subscription-chart")
+@cached(ttl=120)
 async def get_subscription_chart_data():
     """Get subscription distribution by plan"""
     try:
@@ -293,7 +145,7 @@ async def get_subscription_chart_data():
             ORDER BY value DESC
         """
         
-        result = DatabaseInterface.execute_query(subscription_query)
+        result = await AsyncDatabaseInterface.execute_query(subscription_query)
         
         subscription_data = []
         for row in result:
@@ -336,7 +188,7 @@ async def get_admin_activity():
             LIMIT 20
         """
         
-        result = DatabaseInterface.execute_query(activity_query)
+        result = await AsyncDatabaseInterface.execute_query(activity_query)
         
         activity_data = []
         for row in result:
@@ -357,6 +209,7 @@ async def get_admin_activity():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/revenue-by-plan")
+@cached(ttl=300)
 async def get_revenue_by_plan():
     """Get total revenue grouped by plan name"""
     try:
@@ -369,7 +222,7 @@ async def get_revenue_by_plan():
             GROUP BY p.name
             ORDER BY revenue DESC
         """
-        result = DatabaseInterface.execute_query(query)
+        result = await AsyncDatabaseInterface.execute_query(query)
         return [{"plan": row["plan"], "revenue": float(row["revenue"])} for row in result]
     except Exception as e:
         logger.error(f"Error fetching revenue by plan: {e}")
@@ -379,27 +232,18 @@ async def get_revenue_by_plan():
 async def get_finance_stats():
     """Get monthly revenue and percentage change from last month for finance dashboard"""
     try:
-        # This month
-        this_month_query = """
-            SELECT COALESCE(SUM(amount), 0) as revenue
-            FROM transactions
-            WHERE status = 'succeeded'
-            AND EXTRACT(YEAR FROM created_at) = EXTRACT(YEAR FROM CURRENT_DATE)
-            AND EXTRACT(MONTH FROM created_at) = EXTRACT(MONTH FROM CURRENT_DATE)
-        """
-        this_month_result = DatabaseInterface.execute_query(this_month_query)
-        this_month_revenue = float(this_month_result[0]['revenue']) if this_month_result else 0.0
-
-        # Last month
-        last_month_query = """
-            SELECT COALESCE(SUM(amount), 0) as revenue
-            FROM transactions
-            WHERE status = 'succeeded'
-            AND created_at >= date_trunc('month', CURRENT_DATE - INTERVAL '1 month')
-            AND created_at < date_trunc('month', CURRENT_DATE)
+        # This month and last month from the daily_metrics rollups
+        query = """
+            SELECT
+                COALESCE(SUM(total) FILTER (WHERE day >= date_trunc('month', CURRENT_DATE)), 0) AS this_month,
+                COALESCE(SUM(total) FILTER (WHERE day < date_trunc('month', CURRENT_DATE)), 0) AS last_month
+            FROM daily_metrics
+            WHERE metric = 'transactions_succeeded'
+            AND day >= date_trunc('month', CURRENT_DATE - INTERVAL '1 month')
         """
-        last_month_result = DatabaseInterface.execute_query(last_month_query)
-        last_month_revenue = float(last_month_result[0]['revenue']) if last_month_result else 0.0
+        result = await AsyncDatabaseInterface.execute_query(query)
+        this_month_revenue = float(result[0]['this_month']) if result else 0.0
+        last_month_revenue = float(result[0]['last_month']) if result else 0.0
 
         # Calculate percentage change
         if last_month_revenue == 0:
@@ -415,37 +259,49 @@ async def get_finance_stats():
         logger.error(f"Error fetching finance stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+REFERRAL_SERIES = [
+    Series("referrals", "COUNT(*)"),
+    Series("commissions", "SUM(commission_amount)", "status = 'converted'")
+]
+
+async def _referral_series(granularity: str, periods: int) -> List[Dict[str, Any]]:
+    query, params = build_timeseries_query(
+        "referrals", "created_at", REFERRAL_SERIES,
+        granularity=granularity, periods=periods
+    )
+    return await AsyncDatabaseInterface.execute_query(query, params)
+
 @router.get("/referrals-over-time")
-async def get_referrals_over_time():
+async def get_referrals_over_time(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(12, ge=1, le=366)
+):
     """Get number of referrals per month for the last 12 months"""
     try:
-        query = """
-            SELECT TO_CHAR(created_at, 'Mon YYYY') as name, COUNT(*) as value
-            FROM referrals
-            WHERE created_at >= CURRENT_DATE - INTERVAL '12 months'
-            GROUP BY DATE_TRUNC('month', created_at), TO_CHAR(created_at, 'Mon YYYY')
-            ORDER BY DATE_TRUNC('month', created_at)
-        """
-        result = DatabaseInterface.execute_query(query)
-        # Build a dict for quick lookup
-        referrals_dict = {row['name']: row['value'] for row in result}
-        # Generate last 12 months labels
-        now = datetime.now()
-        months = []
-        for i in range(11, -1, -1):
-            month = (now.replace(day=1) - timedelta(days=30*i))
-            label = month.strftime('%b %Y')
-            months.append(label)
-        # Fill with 0 if missing
-        data = []
-        for label in months:
-            data.append({"name": label, "value": referrals_dict.get(label, 0)})
-        return data
+        result = await _referral_series(granularity, periods)
+        return series_points(result, "referrals", cast=int)
     except Exception as e:
         logger.error(f"Error fetching referrals over time: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/referral-charts")
+async def get_referral_charts(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(12, ge=1, le=366)
+):
+    """Get referrals and commissions over time from a single scan of referrals"""
+    try:
+        result = await _referral_series(granularity, periods)
+        return {
+            "referrals": series_points(result, "referrals", cast=int),
+            "commissions": series_points(result, "commissions")
+        }
+    except Exception as e:
+        logger.error(f"Error fetching referral charts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/top-affiliates")
+@cached(ttl=300)
 async def get_top_affiliates():
     """Get top affiliates by number of successful referrals"""
     try:
@@ -459,7 +315,7 @@ async def get_top_affiliates():
             ORDER BY referrals DESC, name ASC
             LIMIT 10
         """
-        result = DatabaseInterface.execute_query(query)
+        result = await AsyncDatabaseInterface.execute_query(query)
         logger.info(f"Top affiliates API result: {result}")
         return [{
             "id": row["id"],
@@ -477,8 +333,8 @@ async def get_referral_conversion_rate():
     try:
         total_query = "SELECT COUNT(*) as count FROM referrals"
         converted_query = "SELECT COUNT(*) as count FROM referrals WHERE status = 'converted'"
-        total_result = DatabaseInterface.execute_query(total_query)
-        converted_result = DatabaseInterface.execute_query(converted_query)
+        total_result = await AsyncDatabaseInterface.execute_query(total_query)
+        converted_result = await AsyncDatabaseInterface.execute_query(converted_query)
         total = total_result[0]['count'] if total_result else 0
         converted = converted_result[0]['count'] if converted_result else 0
         rate = (converted / total * 100) if total > 0 else 0.0
@@ -488,28 +344,14 @@ async def get_referral_conversion_rate():
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/commissions-over-time")
-async def get_commissions_over_time():
+async def get_commissions_over_time(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(12, ge=1, le=366)
+):
     """Get commissions paid per month for the last 12 months"""
     try:
-        query = """
-            SELECT TO_CHAR(created_at, 'Mon YYYY') as name, COALESCE(SUM(commission_amount), 0) as value
-            FROM referrals
-            WHERE status = 'converted' AND created_at >= CURRENT_DATE - INTERVAL '12 months'
-            GROUP BY DATE_TRUNC('month', created_at), TO_CHAR(created_at, 'Mon YYYY')
-            ORDER BY DATE_TRUNC('month', created_at)
-        """
-        result = DatabaseInterface.execute_query(query)
-        commissions_dict = {row['name']: float(row['value']) for row in result}
-        now = datetime.now()
-        months = []
-        for i in range(11, -1, -1):
-            month = (now.replace(day=1) - timedelta(days=30*i))
-            label = month.strftime('%b %Y')
-            months.append(label)
-        data = []
-        for label in months:
-            data.append({"name": label, "value": commissions_dict.get(label, 0.0)})
-        return data
+        result = await _referral_series(granularity, periods)
+        return series_points(result, "commissions")
     except Exception as e:
         logger.error(f"Error fetching commissions over time: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -524,7 +366,7 @@ async def get_affiliate_details(affiliate_id: str):
             LEFT JOIN users u ON a.user_id = u.id
             WHERE a.id = %s
         """
-        result = DatabaseInterface.execute_query(query, (affiliate_id,))
+        result = await AsyncDatabaseInterface.execute_query(query, (affiliate_id,))
         if not result:
             raise HTTPException(status_code=404, detail="Affiliate not found")
         row = result[0]
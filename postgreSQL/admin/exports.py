@@ -0,0 +1,128 @@
+from typing import Any, Dict, Iterator, List
+from datetime import date, datetime
+from decimal import Decimal
+from postgreSQL.database import DatabaseInterface
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+import csv
+import io
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+# Rows per server-side cursor fetch, and rows per chunk written to the client
+EXPORT_BATCH_SIZE = 2000
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_QUERIES = {
+    "transactions": """
+        SELECT
+            t.id,
+            t.user_id,
+            u.email,
+            t.amount,
+            t.type,
+            t.status,
+            t.gateway,
+            t.created_at
+        FROM transactions t
+        LEFT JOIN users u ON t.user_id = u.id
+        ORDER BY t.created_at DESC, t.id DESC
+    """,
+    "subscriptions": """
+        SELECT
+            s.id,
+            s.user_id,
+            pl.name AS plan_name,
+            s.status,
+            s.current_period_start,
+            s.current_period_end,
+            s.cancel_at_period_end,
+            s.created_at,
+            s.deleted_at
+        FROM subscriptions s
+        LEFT JOIN plans pl ON s.plan_id = pl.id
+        ORDER BY s.created_at DESC
+    """,
+    "users": """
+        SELECT
+            u.id,
+            u.email,
+            COALESCE(ur.role::text, 'user') AS role,
+            CASE WHEN u.deleted_at IS NOT NULL THEN 'suspended' ELSE 'active' END AS status,
+            u.created_at
+        FROM users u
+        LEFT JOIN user_roles ur ON u.id = ur.user_id
+        ORDER BY u.created_at DESC
+    """,
+    "admin-activity": """
+        SELECT
+            a.id,
+            a.event_type,
+            COALESCE(u.email, 'System') AS performed_by_email,
+            a.details,
+            a.created_at,
+            a.ip_address,
+            a.user_agent
+        FROM admin_activity_log a
+        LEFT JOIN users u ON a.performed_by = u.id
+        ORDER BY a.created_at DESC
+    """,
+}
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+def _ndjson_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    chunk: List[str] = []
+    for row in rows:
+        chunk.append(json.dumps(row, default=_json_default))
+        if len(chunk) >= EXPORT_CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+def _csv_chunks(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = None
+    pending = 0
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+        pending += 1
+        if pending >= EXPORT_CHUNK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@router.get("/export/{dataset}")
+def api_export_dataset(dataset: str, format: str = Query("csv", regex="^(csv|ndjson)$")):
+    """Stream a full dataset as CSV or NDJSON without materialising it in memory"""
+    logger.info(f"API endpoint GET /admin/export/{dataset} called (format={format})")
+    query = EXPORT_QUERIES.get(dataset)
+    if query is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export dataset: {dataset}")
+
+    rows = DatabaseInterface.stream_query(query, batch_size=EXPORT_BATCH_SIZE)
+    if format == "ndjson":
+        body, media_type = _ndjson_chunks(rows), "application/x-ndjson"
+    else:
+        body, media_type = _csv_chunks(rows), "text/csv"
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d%H%M%S}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -1,10 +1,11 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
-from postgreSQL.database import DatabaseInterface
-from fastapi import APIRouter, HTTPException, Query, Body, Request
+from postgreSQL.async_database import AsyncDatabaseInterface
+from postgreSQL.helpers import encode_cursor, decode_cursor, like_pattern
+from fastapi import APIRouter, HTTPException, Query, Body, Request, Response
 from pydantic import BaseModel
 import logging
-from postgreSQL.admin.activity_log import log_admin_activity
+from postgreSQL.admin.activity_log import log_admin_activity_async
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -34,12 +35,48 @@ class PlanCreate(BaseModel):
     description: Optional[str] = ""
     status: str
 
-def get_transactions(search: str = None, type_filter: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
-    """Get all transactions from the database with optional filters"""
+TRANSACTIONS_PAGE_SIZE = 50
+TRANSACTIONS_MAX_PAGE_SIZE = 500
+
+async def get_transactions(search: str = None, type_filter: str = None, status_filter: str = None,
+                           cursor: str = None, limit: int = TRANSACTIONS_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Get one page of transactions, newest first, with optional filters.
+
+    Filters and search run in SQL; pages are keyset-paginated on
+    (created_at, id). Returns the rows and the cursor for the next page, or
+    None on the last page.
+    """
     try:
         logger.debug("Fetching transactions from PostgreSQL")
-        
-        query = """
+        limit = max(1, min(limit, TRANSACTIONS_MAX_PAGE_SIZE))
+
+        conditions = []
+        params: List[Any] = []
+        if type_filter and type_filter != 'all-types':
+            conditions.append("t.type = %s")
+            params.append(type_filter)
+        if status_filter and status_filter != 'all-status':
+            conditions.append("t.status = %s")
+            params.append(status_filter)
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            conditions.append("(t.created_at, t.id) < (%s, %s)")
+            params.extend([cursor_created_at, cursor_id])
+
+        search_conditions = []
+        search_params: List[Any] = []
+        if search:
+            pattern = like_pattern(search)
+            search_conditions.append("""(
+                COALESCE(up.first_name || ' ' || up.last_name, 'Unknown User') ILIKE %s
+                OR COALESCE(up.email, 'No email') ILIKE %s
+                OR t.id::text ILIKE %s
+            )""")
+            search_params.extend([pattern, pattern, pattern])
+
+        # Fetch one extra row to know whether another page exists
+        where_clause = " AND ".join(conditions + search_conditions) or "TRUE"
+        query = f"""
         SELECT 
             t.id,
             t.user_id,
@@ -52,15 +89,22 @@ def get_transactions(search: str = None, type_filter: str = None, status_filter:
             t.created_at
         FROM transactions t
         LEFT JOIN user_profiles up ON t.user_id = up.user_id
-        ORDER BY t.created_at DESC
+        WHERE {where_clause}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT %s
         """
         
         try:
-            result = DatabaseInterface.execute_query(query)
+            result = await AsyncDatabaseInterface.execute_query(query, tuple(params + search_params + [limit + 1]))
         except Exception as db_error:
             logger.warning(f"Database query failed, trying simplified query: {db_error}")
-            # Fallback to simpler query if joins fail
-            simple_query = """
+            # Fallback to simpler query if joins fail; search can only match ids
+            simple_conditions = [c.replace("t.", "") for c in conditions]
+            simple_params = list(params)
+            if search:
+                simple_conditions.append("id::text ILIKE %s")
+                simple_params.append(like_pattern(search))
+            simple_query = f"""
             SELECT 
                 id,
                 user_id,
@@ -70,39 +114,33 @@ def get_transactions(search: str = None, type_filter: str = None, status_filter:
                 gateway,
                 created_at
             FROM transactions
-            ORDER BY created_at DESC
+            WHERE {" AND ".join(simple_conditions) or "TRUE"}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
             """
-            result = DatabaseInterface.execute_query(simple_query)
+            result = await AsyncDatabaseInterface.execute_query(simple_query, tuple(simple_params + [limit + 1]))
             
             # Add default values for missing fields
             for row in result:
                 row['user_name'] = f"User {row['user_id'][:8]}"
                 row['email'] = 'email@example.com'
-        
-        # Apply filters
-        if type_filter and type_filter != 'all-types' and result:
-            result = [t for t in result if t["type"] == type_filter]
-        
-        if status_filter and status_filter != 'all-status' and result:
-            result = [t for t in result if t["status"] == status_filter]
-        
-        if search and result:
-            search_lower = search.lower()
-            result = [
-                t for t in result
-                if search_lower in str(t.get("user_name", "")).lower() or 
-                   search_lower in str(t.get("email", "")).lower() or
-                   search_lower in str(t.get("id", "")).lower()
-            ]
+
+        next_cursor = None
+        if len(result) > limit:
+            result = result[:limit]
+            last = result[-1]
+            next_cursor = encode_cursor(last['created_at'], last['id'])
         
         logger.debug(f"Transactions result: {len(result)} transactions found")
-        return result
+        return result, next_cursor
         
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching transactions: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_plans(search: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
+async def get_plans(search: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
     """Get all plans from the database with optional filters"""
     try:
         logger.debug("Fetching plans from PostgreSQL")
@@ -123,7 +161,7 @@ def get_plans(search: str = None, status_filter: str = None) -> List[Dict[str, A
         ORDER BY p.created_at DESC
         """
         
-        result = DatabaseInterface.execute_query(query)
+        result = await AsyncDatabaseInterface.execute_query(query)
         
         # Apply filters
         if status_filter and status_filter != 'all-status' and result:
@@ -144,7 +182,7 @@ def get_plans(search: str = None, status_filter: str = None) -> List[Dict[str, A
         logger.error(f"Error fetching plans: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_subscriptions(search: str = None, plan_filter: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
+async def get_subscriptions(search: str = None, plan_filter: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
     """Get all subscriptions from the database with optional filters"""
     try:
         logger.debug("Fetching subscriptions from PostgreSQL")
@@ -169,7 +207,7 @@ def get_subscriptions(search: str = None, plan_filter: str = None, status_filter
         """
         
         try:
-            result = DatabaseInterface.execute_query(query)
+            result = await AsyncDatabaseInterface.execute_query(query)
         except Exception as db_error:
             logger.warning(f"Database query failed, trying simplified query: {db_error}")
             # Fallback to simpler query if joins fail
@@ -187,7 +225,7 @@ def get_subscriptions(search: str = None, plan_filter: str = None, status_filter
             WHERE deleted_at IS NULL
             ORDER BY created_at DESC
             """
-            result = DatabaseInterface.execute_query(simple_query)
+            result = await AsyncDatabaseInterface.execute_query(simple_query)
             
             # Add default values for missing fields
             for row in result:
@@ -229,7 +267,7 @@ def parse_expiration_date(exp):
             return None
     return None
 
-def get_promo_codes(search: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
+async def get_promo_codes(search: str = None, status_filter: str = None) -> List[Dict[str, Any]]:
     """Get all promo codes from the database with optional filters"""
     try:
         logger.debug("Fetching promo codes from PostgreSQL")
@@ -249,7 +287,7 @@ def get_promo_codes(search: str = None, status_filter: str = None) -> List[Dict[
         ORDER BY pc.created_at DESC
         """
         
-        result = DatabaseInterface.execute_query(query)
+        result = await AsyncDatabaseInterface.execute_query(query)
 
         # Check expiration and update status if needed
         from datetime import timezone
@@ -265,7 +303,7 @@ def get_promo_codes(search: str = None, status_filter: str = None) -> List[Dict[
                         from datetime import timezone
                         exp_dt = exp_dt.replace(tzinfo=timezone.utc)
                     if exp_dt < now:
-                        DatabaseInterface.update("promo_codes", {"status": "inactive", "deleted_at": now}, {"id": promo["id"]})
+                        await AsyncDatabaseInterface.update("promo_codes", {"status": "inactive", "deleted_at": now}, {"id": promo["id"]})
                         promo["status"] = "inactive"
                         promo["deleted_at"] = now.isoformat()
                 except Exception as e:
@@ -289,7 +327,7 @@ def get_promo_codes(search: str = None, status_filter: str = None) -> List[Dict[
         logger.error(f"Error fetching promo codes: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def create_promo_code(promo_data: PromoCodeCreate) -> Dict[str, Any]:
+async def create_promo_code(promo_data: PromoCodeCreate) -> Dict[str, Any]:
     """Create a new promo code in the database"""
     try:
         logger.debug(f"Creating promo code: {promo_data.code}")
@@ -308,7 +346,7 @@ def create_promo_code(promo_data: PromoCodeCreate) -> Dict[str, Any]:
             insert_data['max_uses'] = promo_data.max_uses
         
         # Insert into database
-        promo_id = DatabaseInterface.insert('promo_codes', insert_data)
+        promo_id = await AsyncDatabaseInterface.insert('promo_codes', insert_data)
         
         logger.debug(f"Promo code created with ID: {promo_id}")
         return {"id": promo_id, "message": "Promo code created successfully"}
@@ -320,16 +358,26 @@ def create_promo_code(promo_data: PromoCodeCreate) -> Dict[str, Any]:
 # API ENDPOINTS
 @router.get("/transactions")
 async def api_get_transactions(
+    response: Response,
     search: Optional[str] = Query(None),
     type: Optional[str] = Query(None),
-    status: Optional[str] = Query(None)
+    status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE)
 ):
-    """API endpoint to get all transactions with optional filters"""
+    """API endpoint to get a page of transactions with optional filters.
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    """
     logger.info("=== API endpoint GET /admin/transactions called ===")
     try:
-        result = get_transactions(search, type, status)
+        result, next_cursor = await get_transactions(search, type, status, cursor, limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         logger.info(f"Successfully returning {len(result)} transactions")
         return result
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in api_get_transactions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -342,7 +390,7 @@ async def api_get_plans(
     """API endpoint to get all plans with optional filters"""
     logger.info("=== API endpoint GET /admin/plans called ===")
     try:
-        result = get_plans(search, status)
+        result = await get_plans(search, status)
         logger.info(f"Successfully returning {len(result)} plans")
         return result
     except Exception as e:
@@ -358,7 +406,7 @@ async def api_get_subscriptions(
     """API endpoint to get all subscriptions with optional filters"""
     logger.info("=== API endpoint GET /admin/subscriptions called ===")
     try:
-        result = get_subscriptions(search, plan, status)
+        result = await get_subscriptions(search, plan, status)
         logger.info(f"Successfully returning {len(result)} subscriptions")
         return result
     except Exception as e:
@@ -373,7 +421,7 @@ async def api_get_promo_codes(
     """API endpoint to get all promo codes with optional filters"""
     logger.info("=== API endpoint GET /admin/promo-codes called ===")
     try:
-        result = get_promo_codes(search, status)
+        result = await get_promo_codes(search, status)
         logger.info(f"Successfully returning {len(result)} promo codes")
         return result
     except Exception as e:
@@ -385,14 +433,14 @@ async def create_plan(request: Request, plan: PlanCreate):
     try:
         logger.info(f"Creating plan: {plan.name}")
         insert_data = plan.dict()
-        plan_id = DatabaseInterface.insert("plans", insert_data)
+        plan_id = await AsyncDatabaseInterface.insert("plans", insert_data)
         if not plan_id:
             raise HTTPException(status_code=500, detail="Failed to create plan")
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='create_plan',
             performed_by=admin_id,
             details=f"Created plan: {plan.name}",
@@ -409,12 +457,12 @@ async def api_create_promo_code(request: Request, promo_data: PromoCodeCreate):
     """API endpoint to create a new promo code"""
     logger.info(f"=== API endpoint POST /admin/promo-codes called ===")
     try:
-        result = create_promo_code(promo_data)
+        result = await create_promo_code(promo_data)
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='create_promo_code',
             performed_by=admin_id,
             details=f"Created promo code: {promo_data.code}",
@@ -434,14 +482,14 @@ async def update_plan(plan_id: str, request: Request, plan: PlanUpdate = Body(..
         update_data = {k: v for k, v in plan.dict().items() if v is not None}
         if not update_data:
             raise HTTPException(status_code=400, detail="No fields to update")
-        updated = DatabaseInterface.update("plans", update_data, {"id": plan_id})
+        updated = await AsyncDatabaseInterface.update("plans", update_data, {"id": plan_id})
         if not updated:
             raise HTTPException(status_code=404, detail="Plan not found")
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='update_plan',
             performed_by=admin_id,
             details=f"Updated plan: {plan_id}",
@@ -459,14 +507,14 @@ async def soft_delete_plan(plan_id: str, request: Request):
         from datetime import datetime, timezone
         now = datetime.now(timezone.utc)
         update_data = {"status": "inactive", "deleted_at": now}
-        updated = DatabaseInterface.update("plans", update_data, {"id": plan_id})
+        updated = await AsyncDatabaseInterface.update("plans", update_data, {"id": plan_id})
         if not updated:
             raise HTTPException(status_code=404, detail="Plan not found")
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='soft_delete_plan',
             performed_by=admin_id,
             details=f"Soft-deleted plan: {plan_id}",
@@ -484,14 +532,14 @@ async def soft_delete_promo_code(promo_id: str, request: Request):
         from datetime import datetime, timezone
         now = datetime.now(timezone.utc)
         update_data = {"status": "inactive", "deleted_at": now}
-        updated = DatabaseInterface.update("promo_codes", update_data, {"id": promo_id})
+        updated = await AsyncDatabaseInterface.update("promo_codes", update_data, {"id": promo_id})
         if not updated:
             raise HTTPException(status_code=404, detail="Promo code not found")
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='soft_delete_promo_code',
             performed_by=admin_id,
             details=f"Soft-deleted promo code: {promo_id}",
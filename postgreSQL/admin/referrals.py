@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from postgreSQL.database import DatabaseInterface
+from postgreSQL.async_database import AsyncDatabaseInterface
+from postgreSQL.cache import cached
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 import logging
@@ -37,7 +38,7 @@ class ReferralPayoutUpdate(BaseModel):
     payment_method: Optional[str] = None
     notes: Optional[str] = None
 
-def get_all_affiliates(search: str = None) -> List[Dict[str, Any]]:
+async def get_all_affiliates(search: str = None) -> List[Dict[str, Any]]:
     """Get all affiliates from the database with optional search"""
     try:
         logger.debug("Fetching all affiliates from PostgreSQL")
@@ -61,7 +62,7 @@ def get_all_affiliates(search: str = None) -> List[Dict[str, Any]]:
         ORDER BY a.created_at DESC
         """
         try:
-            result = DatabaseInterface.execute_query(query)
+            result = await AsyncDatabaseInterface.execute_query(query)
         except Exception as db_error:
             logger.warning(f"Database query failed, trying simplified query: {db_error}")
             # Fallback to simpler query if joins fail
@@ -76,7 +77,7 @@ def get_all_affiliates(search: str = None) -> List[Dict[str, Any]]:
             FROM affiliates
             ORDER BY created_at DESC
             """
-            result = DatabaseInterface.execute_query(simple_query)
+            result = await AsyncDatabaseInterface.execute_query(simple_query)
             # Add default values for missing fields
             for row in result:
                 row['name'] = f"User {row['user_id'][:8]}"
@@ -98,7 +99,7 @@ def get_all_affiliates(search: str = None) -> List[Dict[str, Any]]:
         logger.error(f"Error fetching affiliates: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_all_referral_payouts(status_filter: str = None, search: str = None) -> List[Dict[str, Any]]:
+async def get_all_referral_payouts(status_filter: str = None, search: str = None) -> List[Dict[str, Any]]:
     """Get all referral payouts from the database with optional filters"""
     try:
         logger.debug("Fetching all referral payouts from PostgreSQL")
@@ -125,7 +126,7 @@ def get_all_referral_payouts(status_filter: str = None, search: str = None) -> L
         """
         
         try:
-            result = DatabaseInterface.execute_query(query)
+            result = await AsyncDatabaseInterface.execute_query(query)
         except Exception as db_error:
             logger.warning(f"Database query failed, trying simplified query: {db_error}")
             # Fallback to simpler query if joins fail
@@ -143,7 +144,7 @@ def get_all_referral_payouts(status_filter: str = None, search: str = None) -> L
             FROM referral_payouts
             ORDER BY created_at DESC
             """
-            result = DatabaseInterface.execute_query(simple_query)
+            result = await AsyncDatabaseInterface.execute_query(simple_query)
             
             # Add default values for missing fields
             for row in result:
@@ -170,29 +171,29 @@ def get_all_referral_payouts(status_filter: str = None, search: str = None) -> L
         logger.error(f"Error fetching referral payouts: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_referral_stats() -> Dict[str, Any]:
+async def get_referral_stats() -> Dict[str, Any]:
     """Get referral program statistics from the database"""
     try:
         logger.debug("Fetching referral statistics from PostgreSQL")
         
         # Get total affiliates
         affiliates_query = "SELECT COUNT(*) as count FROM affiliates"
-        affiliates_result = DatabaseInterface.execute_query(affiliates_query)
+        affiliates_result = await AsyncDatabaseInterface.execute_query(affiliates_query)
         total_affiliates = affiliates_result[0]['count'] if affiliates_result else 0
         
         # Get total referrals
         referrals_query = "SELECT COUNT(*) as count FROM referrals"
-        referrals_result = DatabaseInterface.execute_query(referrals_query)
+        referrals_result = await AsyncDatabaseInterface.execute_query(referrals_query)
         total_referrals = referrals_result[0]['count'] if referrals_result else 0
         
         # Get total revenue (sum of all payouts)
         revenue_query = "SELECT COALESCE(SUM(amount), 0) as total FROM payouts"
-        revenue_result = DatabaseInterface.execute_query(revenue_query)
+        revenue_result = await AsyncDatabaseInterface.execute_query(revenue_query)
         total_revenue = float(revenue_result[0]['total']) if revenue_result else 0
         
         # Get total commissions (sum of all referral payouts)
         commissions_query = "SELECT COALESCE(SUM(amount), 0) as total FROM referral_payouts"
-        commissions_result = DatabaseInterface.execute_query(commissions_query)
+        commissions_result = await AsyncDatabaseInterface.execute_query(commissions_query)
         total_commissions = float(commissions_result[0]['total']) if commissions_result else 0
         
         stats = {
@@ -215,7 +216,7 @@ async def api_get_affiliates(search: Optional[str] = Query(None)):
     """API endpoint to get all affiliates with optional search"""
     logger.info("=== API endpoint GET /admin/affiliates called ===")
     try:
-        result = get_all_affiliates(search)
+        result = await get_all_affiliates(search)
         logger.info(f"Successfully returning {len(result)} affiliates")
         return result
     except Exception as e:
@@ -230,7 +231,7 @@ async def api_get_referral_payouts(
     """API endpoint to get all referral payouts with optional filters"""
     logger.info("=== API endpoint GET /admin/referral-payouts called ===")
     try:
-        result = get_all_referral_payouts(status, search)
+        result = await get_all_referral_payouts(status, search)
         logger.info(f"Successfully returning {len(result)} referral payouts")
         return result
     except Exception as e:
@@ -238,11 +239,12 @@ async def api_get_referral_payouts(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/referral-stats")
+@cached(ttl=60)
 async def api_get_referral_stats():
     """API endpoint to get referral program statistics"""
     logger.info("=== API endpoint GET /admin/referral-stats called ===")
     try:
-        result = get_referral_stats()
+        result = await get_referral_stats()
         logger.info("Successfully returning referral stats")
         return result
     except Exception as e:
@@ -267,7 +269,7 @@ async def api_update_referral_payout(payout_id: str, updates: ReferralPayoutUpda
         
         if update_data:
             update_data['updated_at'] = datetime.now()
-            DatabaseInterface.update('referral_payouts', update_data, {'id': payout_id})
+            await AsyncDatabaseInterface.update('referral_payouts', update_data, {'id': payout_id})
         
         return {"message": "Referral payout updated successfully", "payout_id": payout_id}
     except Exception as e:
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, HTTPException, Body, Request
+from psycopg2.extras import Json
 from postgreSQL.database import DatabaseInterface
+from postgreSQL.timeouts import statement_timeouts, validate_timeouts
 from typing import Dict, Any
 from postgreSQL.admin.activity_log import log_admin_activity
 
@@ -7,7 +9,7 @@ router = APIRouter()
 
 @router.get("/admin/system-settings")
 def get_system_settings():
-    query = "SELECT * FROM system_settings LIMIT 1"
+    query = "SELECT * FROM system_settings ORDER BY updated_at DESC NULLS LAST LIMIT 1"
     result = DatabaseInterface.execute_query(query)
     if result:
         return result[0]
@@ -17,16 +19,29 @@ def get_system_settings():
         "enable_logging": True,
         "api_rate_limit": 60,
         "allowed_ips": "",
-        "custom_code": ""
+        "custom_code": "",
+        "statement_timeout_ms": None,
+        "route_statement_timeouts": {}
     }
 
 @router.post("/admin/system-settings")
 def save_system_settings(request: Request, data: Dict[str, Any] = Body(...)):
+    # Timeouts left out of the payload keep their current values
+    current = get_system_settings()
+    try:
+        timeouts = validate_timeouts(
+            data.get("statement_timeout_ms", current.get("statement_timeout_ms")),
+            data.get("route_statement_timeouts", current.get("route_statement_timeouts"))
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     query = """
         INSERT INTO system_settings (
-            app_version, enable_logging, api_rate_limit, allowed_ips, custom_code, updated_at
+            app_version, enable_logging, api_rate_limit, allowed_ips, custom_code,
+            statement_timeout_ms, route_statement_timeouts, updated_at
         ) VALUES (
-            %(app_version)s, %(enable_logging)s, %(api_rate_limit)s, %(allowed_ips)s, %(custom_code)s, NOW()
+            %(app_version)s, %(enable_logging)s, %(api_rate_limit)s, %(allowed_ips)s, %(custom_code)s,
+            %(statement_timeout_ms)s, %(route_statement_timeouts)s, NOW()
         )
         ON CONFLICT (id) DO UPDATE SET
             app_version = EXCLUDED.app_version,
@@ -34,9 +49,16 @@ def save_system_settings(request: Request, data: Dict[str, Any] = Body(...)):
             api_rate_limit = EXCLUDED.api_rate_limit,
             allowed_ips = EXCLUDED.allowed_ips,
             custom_code = EXCLUDED.custom_code,
+            statement_timeout_ms = EXCLUDED.statement_timeout_ms,
+            route_statement_timeouts = EXCLUDED.route_statement_timeouts,
             updated_at = NOW();
     """
-    DatabaseInterface.execute_query(query, data)
+    DatabaseInterface.execute_query(query, {
+        **data,
+        "statement_timeout_ms": timeouts["statement_timeout_ms"],
+        "route_statement_timeouts": Json(timeouts["route_statement_timeouts"])
+    })
+    statement_timeouts.invalidate()
     # Log admin activity
     admin_id = getattr(getattr(request.state, "user", None), "id", None)
     ip_address = request.client.host if request.client else None
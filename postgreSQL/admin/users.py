@@ -1,11 +1,11 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from postgreSQL.database import DatabaseInterface
+from postgreSQL.async_database import AsyncDatabaseInterface
 from postgreSQL.helpers import get_month_range
 from fastapi import APIRouter, HTTPException, Query, Request
 from pydantic import BaseModel
 import logging
-from postgreSQL.admin.activity_log import log_admin_activity
+from postgreSQL.admin.activity_log import log_admin_activity_async
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -21,7 +21,7 @@ class AdminUserUpdate(BaseModel):
     status: Optional[str] = None
     password: Optional[str] = None
 
-def get_all_admin_users() -> List[Dict[str, Any]]:
+async def get_all_admin_users() -> List[Dict[str, Any]]:
     """Get all users from the database with role information"""
     try:
         logger.debug("Fetching all users from PostgreSQL")
@@ -46,7 +46,7 @@ def get_all_admin_users() -> List[Dict[str, Any]]:
         ORDER BY u.created_at DESC
         """
         
-        result = DatabaseInterface.execute_query(query)
+        result = await AsyncDatabaseInterface.execute_query(query)
         
         # Convert to the expected format
         users = []
@@ -68,7 +68,7 @@ def get_all_admin_users() -> List[Dict[str, Any]]:
         logger.error(f"Error fetching users: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_user_stats() -> Dict[str, Any]:
+async def get_user_stats() -> Dict[str, Any]:
     """Get user statistics including monthly changes"""
     try:
         logger.debug("Calculating user statistics")
@@ -79,7 +79,7 @@ def get_user_stats() -> Dict[str, Any]:
         
         # Total counts
         total_users_query = "SELECT COUNT(*) as count FROM users WHERE deleted_at IS NULL"
-        total_users_result = DatabaseInterface.execute_query(total_users_query)
+        total_users_result = await AsyncDatabaseInterface.execute_query(total_users_query)
         total_users = total_users_result[0]['count'] if total_users_result else 0
         
         # Total affiliates
@@ -89,7 +89,7 @@ def get_user_stats() -> Dict[str, Any]:
         JOIN users u ON a.user_id = u.id 
         WHERE u.deleted_at IS NULL
         """
-        total_affiliates_result = DatabaseInterface.execute_query(total_affiliates_query)
+        total_affiliates_result = await AsyncDatabaseInterface.execute_query(total_affiliates_query)
         total_affiliates = total_affiliates_result[0]['count'] if total_affiliates_result else 0
         
         # Total admins (for now, we'll assume non-affiliates are admins or regular users)
@@ -101,7 +101,7 @@ def get_user_stats() -> Dict[str, Any]:
         FROM users 
         WHERE created_at >= %s AND created_at < %s AND deleted_at IS NULL
         """
-        new_users_this_month_result = DatabaseInterface.execute_query(
+        new_users_this_month_result = await AsyncDatabaseInterface.execute_query(
             new_users_this_month_query, 
             (current_start, current_end)
         )
@@ -113,7 +113,7 @@ def get_user_stats() -> Dict[str, Any]:
         FROM users 
         WHERE created_at >= %s AND created_at < %s AND deleted_at IS NULL
         """
-        new_users_last_month_result = DatabaseInterface.execute_query(
+        new_users_last_month_result = await AsyncDatabaseInterface.execute_query(
             new_users_last_month_query, 
             (last_start, last_end)
         )
@@ -126,7 +126,7 @@ def get_user_stats() -> Dict[str, Any]:
         JOIN users u ON a.user_id = u.id
         WHERE a.created_at >= %s AND a.created_at < %s AND u.deleted_at IS NULL
         """
-        new_affiliates_this_month_result = DatabaseInterface.execute_query(
+        new_affiliates_this_month_result = await AsyncDatabaseInterface.execute_query(
             new_affiliates_this_month_query, 
             (current_start, current_end)
         )
@@ -139,7 +139,7 @@ def get_user_stats() -> Dict[str, Any]:
         JOIN users u ON a.user_id = u.id
         WHERE a.created_at >= %s AND a.created_at < %s AND u.deleted_at IS NULL
         """
-        new_affiliates_last_month_result = DatabaseInterface.execute_query(
+        new_affiliates_last_month_result = await AsyncDatabaseInterface.execute_query(
             new_affiliates_last_month_query, 
             (last_start, last_end)
         )
@@ -169,7 +169,7 @@ def get_user_stats() -> Dict[str, Any]:
         logger.error(f"Error calculating user stats: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def create_admin_user(user_data: AdminUserCreate, request: Request) -> Dict[str, Any]:
+async def create_admin_user(user_data: AdminUserCreate, request: Request) -> Dict[str, Any]:
     """Create a new user"""
     try:
         logger.debug(f"Creating user: {user_data.email}")
@@ -185,45 +185,47 @@ def create_admin_user(user_data: AdminUserCreate, request: Request) -> Dict[str,
         RETURNING id, email, created_at
         """
         
-        user_result = DatabaseInterface.execute_query(
-            user_insert_query, 
-            (user_data.email, password_hash)
-        )
-        
-        if not user_result:
-            raise HTTPException(status_code=500, detail="Failed to create user")
-        
-        user = user_result[0]
-
-        # Insert user role into user_roles table
-        role_insert_query = """
-        INSERT INTO user_roles (user_id, role, created_at, updated_at)
-        VALUES (%s, %s, NOW(), NOW())
-        """
-        DatabaseInterface.execute_query(
-            role_insert_query,
-            (user['id'], user_data.role)
-        )
-        
-        # If role is affiliate, create affiliate record
-        if user_data.role == "affiliate":
-            affiliate_insert_query = """
-            INSERT INTO affiliates (user_id, referral_code, commission_rate, created_at, updated_at)
-            VALUES (%s, %s, %s, NOW(), NOW())
-            """
+        # User, role and affiliate rows are created together or not at all
+        async with AsyncDatabaseInterface.transaction() as tx:
+            user_result = await tx.execute_query(
+                user_insert_query, 
+                (user_data.email, password_hash)
+            )
             
-            # Generate a simple referral code
-            import uuid
-            ref_code = f"REF{str(uuid.uuid4())[:8].upper()}"
+            if not user_result:
+                raise HTTPException(status_code=500, detail="Failed to create user")
             
-            DatabaseInterface.execute_query(
-                affiliate_insert_query,
-                (user['id'], ref_code, 0.15)  # Default 15% commission
+            user = user_result[0]
+
+            # Insert user role into user_roles table
+            role_insert_query = """
+            INSERT INTO user_roles (user_id, role, created_at, updated_at)
+            VALUES (%s, %s, NOW(), NOW())
+            """
+            await tx.execute_query(
+                role_insert_query,
+                (user['id'], user_data.role)
             )
+            
+            # If role is affiliate, create affiliate record
+            if user_data.role == "affiliate":
+                affiliate_insert_query = """
+                INSERT INTO affiliates (user_id, referral_code, commission_rate, created_at, updated_at)
+                VALUES (%s, %s, %s, NOW(), NOW())
+                """
+                
+                # Generate a simple referral code
+                import uuid
+                ref_code = f"REF{str(uuid.uuid4())[:8].upper()}"
+                
+                await tx.execute_query(
+                    affiliate_insert_query,
+                    (user['id'], ref_code, 0.15)  # Default 15% commission
+                )
         
         # Log admin activity
         admin_id = getattr(request.state.user, "id", None) if hasattr(request.state, "user") else None
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='create_admin_user',
             performed_by=admin_id,
             details=f"Created admin user: {user_data.email}",
@@ -292,7 +294,7 @@ async def api_get_admin_users(
             base_query += " AND u.created_at <= %s "
             params.append(to)
         base_query += " ORDER BY u.created_at DESC"
-        result = DatabaseInterface.execute_query(base_query, tuple(params))
+        result = await AsyncDatabaseInterface.execute_query(base_query, tuple(params))
         users = []
         for row in result:
             users.append({
@@ -315,7 +317,7 @@ async def api_get_user_stats():
     """API endpoint to get user statistics"""
     logger.info("API endpoint GET /admin/user-stats called")
     try:
-        result = get_user_stats()
+        result = await get_user_stats()
         logger.info(f"Successfully returning user stats")
         return result
     except Exception as e:
@@ -327,7 +329,7 @@ async def api_create_admin_user(user: AdminUserCreate, request: Request):
     """API endpoint to create a new user"""
     logger.info("API endpoint POST /admin/users called")
     try:
-        result = create_admin_user(user, request)
+        result = await create_admin_user(user, request)
         logger.info(f"Successfully created user: {result['id']}")
         return result
     except Exception as e:
@@ -340,41 +342,37 @@ async def api_update_admin_user(user_id: str, updates: AdminUserUpdate, request:
     logger.info(f"API endpoint POST /admin/users/{user_id} called")
     try:
         logger.info(f"Updating user {user_id} with {updates}")
-        # Update user fields
+        # Collect the users columns into one UPDATE, run alongside the role change
+        user_sets = []
+        user_params = []
         if updates.email:
-            update_query = """
-            UPDATE users SET email = %s, updated_at = NOW() WHERE id = %s
-            """
-            DatabaseInterface.execute_query(update_query, (updates.email, user_id))
+            user_sets.append("email = %s")
+            user_params.append(updates.email)
         if updates.password:
             import hashlib
-            password_hash = hashlib.sha256(updates.password.encode()).hexdigest()
-            update_query = """
-            UPDATE users SET password_hash = %s, updated_at = NOW() WHERE id = %s
-            """
-            DatabaseInterface.execute_query(update_query, (password_hash, user_id))
-        if updates.role:
-            # Update user_roles table
-            update_role_query = """
-            UPDATE user_roles SET role = %s, updated_at = NOW() WHERE user_id = %s
-            """
-            DatabaseInterface.execute_query(update_role_query, (updates.role, user_id))
-        if updates.status:
-            if updates.status == "active":
-                # Reactivate user
-                reactivate_query = """
-                UPDATE users SET deleted_at = NULL, updated_at = NOW() WHERE id = %s
+            user_sets.append("password_hash = %s")
+            user_params.append(hashlib.sha256(updates.password.encode()).hexdigest())
+        if updates.status == "active":
+            # Reactivate user
+            user_sets.append("deleted_at = NULL")
+        elif updates.status == "inactive":
+            # Soft delete user
+            user_sets.append("deleted_at = NOW()")
+        async with AsyncDatabaseInterface.transaction() as tx:
+            if user_sets:
+                update_query = f"""
+                UPDATE users SET {', '.join(user_sets)}, updated_at = NOW() WHERE id = %s
                 """
-                DatabaseInterface.execute_query(reactivate_query, (user_id,))
-            elif updates.status == "inactive":
-                # Soft delete user
-                deactivate_query = """
-                UPDATE users SET deleted_at = NOW(), updated_at = NOW() WHERE id = %s
+                await tx.execute_query(update_query, (*user_params, user_id))
+            if updates.role:
+                # Update user_roles table
+                update_role_query = """
+                UPDATE user_roles SET role = %s, updated_at = NOW() WHERE user_id = %s
                 """
-                DatabaseInterface.execute_query(deactivate_query, (user_id,))
+                await tx.execute_query(update_role_query, (updates.role, user_id))
         # Log admin activity
         admin_id = getattr(request.state.user, "id", None) if hasattr(request.state, "user") else None
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='update_admin_user',
             performed_by=admin_id,
             details=f"Updated admin user: {user_id}",
@@ -398,11 +396,11 @@ async def api_delete_admin_user(user_id: str, request: Request):
         WHERE id = %s
         """
         
-        DatabaseInterface.execute_query(delete_query, (user_id,))
+        await AsyncDatabaseInterface.execute_query(delete_query, (user_id,))
         
         # Log admin activity
         admin_id = getattr(request.state.user, "id", None) if hasattr(request.state, "user") else None
-        log_admin_activity(
+        await log_admin_activity_async(
             event_type='delete_admin_user',
             performed_by=admin_id,
             details=f"Deleted admin user: {user_id}",
@@ -0,0 +1,275 @@
+from typing import List, Dict, Any, Optional, Tuple, Union, AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+from time import monotonic
+from psycopg import AsyncConnection, OperationalError
+from psycopg.errors import QueryCanceled
+from psycopg.rows import dict_row
+from psycopg.types.string import TextLoader
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
+from .config import DB_CONFIG, DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT, DB_PREPARE_THRESHOLD, DB_PREPARED_MAX
+from .database import insert_sql, update_sql, delete_sql
+from .instrumentation import query_stats
+from .replicas import AsyncReplicaPools, is_read_only, pin_primary, primary_config, wants_replica
+from .timeouts import cancellable, statement_timeout_sql
+
+logger = logging.getLogger(__name__)
+
+class AsyncTransaction:
+    """Async counterpart of database.Transaction, used by AsyncDatabaseInterface.transaction()."""
+
+    def __init__(self, conn: AsyncConnection):
+        self.conn = conn
+        self.statements = 0
+
+    async def execute_query(self, query: str, params: Optional[Union[Tuple, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        started = monotonic()
+        rows = None
+        try:
+            async with self.conn.cursor(row_factory=dict_row) as cur:
+                logger.debug(f"Executing async query in transaction: {query[:100]}...")
+                await cur.execute(query, params)
+                self.statements += 1
+                rows = await cur.fetchall() if cur.description else []
+                return rows
+        finally:
+            query_stats.record(query, params, monotonic() - started, len(rows or []),
+                               error=rows is None, source="async")
+
+    async def insert(self, table: str, data: Dict[str, Any]) -> Optional[str]:
+        result = await self.execute_query(*insert_sql(table, data))
+        return str(result[0].get('id')) if result else None
+
+    async def update(self, table: str, data: Dict[str, Any], conditions: Dict[str, Any],
+                     set_sql: Optional[str] = None) -> bool:
+        await self.execute_query(*update_sql(table, data, conditions, set_sql))
+        return True
+
+    async def delete(self, table: str, conditions: Dict[str, Any]) -> None:
+        await self.execute_query(*delete_sql(table, conditions))
+
+    async def execute_many(self, query: str, rows: Sequence[Union[Sequence[Any], Dict[str, Any]]],
+                           returning: bool = False) -> List[Dict[str, Any]]:
+        """Run `query` once per parameter row; psycopg pipelines the statements in one round trip.
+
+        With `returning=True` the rows each statement returned are concatenated in order.
+        """
+        if not rows:
+            return []
+        started = monotonic()
+        done = False
+        try:
+            async with self.conn.cursor(row_factory=dict_row) as cur:
+                await cur.executemany(query, rows, returning=returning)
+                self.statements += 1
+                result = []
+                while returning:
+                    result.extend(await cur.fetchall())
+                    if not cur.nextset():
+                        break
+                done = True
+                return result
+        finally:
+            query_stats.record(query, None, monotonic() - started, len(rows),
+                               error=not done, source="async")
+
+    async def insert_many(self, table: str, rows: Sequence[Dict[str, Any]],
+                          returning: Optional[str] = None, on_conflict: Optional[str] = None) -> List[Dict[str, Any]]:
+        if not rows:
+            return []
+        columns = list(rows[0].keys())
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        if on_conflict:
+            query += f" ON CONFLICT {on_conflict}"
+        if returning:
+            query += f" RETURNING {returning}"
+        return await self.execute_many(query, [tuple(row[c] for c in columns) for row in rows], bool(returning))
+
+class AsyncDatabaseInterface:
+    """asyncio counterpart of DatabaseInterface for `async def` route handlers.
+
+    Uses psycopg 3's native async driver so awaiting a query yields to the
+    event loop instead of blocking the uvicorn worker. Queries keep the same
+    %s / %(name)s placeholder style as the psycopg2-based DatabaseInterface.
+    """
+    _pool: Optional[AsyncConnectionPool] = None
+    _replicas: Optional[AsyncReplicaPools] = None
+    _pool_lock = asyncio.Lock()
+
+    @staticmethod
+    async def _configure_connection(conn: AsyncConnection) -> None:
+        # psycopg2 hands UUID columns back as str; keep that so row dicts are
+        # interchangeable with the ones DatabaseInterface returns
+        conn.adapters.register_loader("uuid", TextLoader)
+        # psycopg prepares hot statements itself; keep its limits in line with
+        # DatabaseInterface's (postgreSQL/prepared.py)
+        conn.prepare_threshold = DB_PREPARE_THRESHOLD or None
+        conn.prepared_max = DB_PREPARED_MAX
+
+    @classmethod
+    async def get_pool(cls) -> AsyncConnectionPool:
+        if cls._pool is None:
+            async with cls._pool_lock:
+                if cls._pool is None:
+                    try:
+                        pool_instance = AsyncConnectionPool(
+                            conninfo="",
+                            kwargs=primary_config(),
+                            min_size=DB_POOL_MIN,
+                            max_size=DB_POOL_MAX,
+                            timeout=DB_POOL_TIMEOUT,
+                            configure=cls._configure_connection,
+                            open=False
+                        )
+                        await pool_instance.open()
+                        cls._pool = pool_instance
+                        logger.info("Async database connection pool created successfully")
+                    except Exception as e:
+                        logger.error(f"Failed to create async database pool: {e}")
+                        raise
+        return cls._pool
+
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Any]:
+        if cls._pool is None:
+            return {}
+        return cls._pool.get_stats()
+
+    @classmethod
+    def replica_pools(cls) -> AsyncReplicaPools:
+        if cls._replicas is None:
+            cls._replicas = AsyncReplicaPools(DB_CONFIG["replicas"], cls._configure_connection)
+        return cls._replicas
+
+    @classmethod
+    def replica_stats(cls) -> Dict[str, Any]:
+        if cls._replicas is None:
+            return {}
+        return cls._replicas.stats()
+
+    @classmethod
+    async def close_pool(cls) -> None:
+        if cls._replicas is not None:
+            await cls._replicas.close()
+            cls._replicas = None
+        if cls._pool is not None:
+            await cls._pool.close()
+            cls._pool = None
+            logger.info("Async database connection pool closed")
+
+    @classmethod
+    async def execute_query(cls, query: str, params: Optional[Union[Tuple, Dict[str, Any]]] = None,
+                            target: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run one statement; read-only ones may go to a replica, as in DatabaseInterface."""
+        if wants_replica(query, target):
+            picked = await cls.replica_pools().pick()
+            if picked is not None:
+                replica, pool_instance = picked
+                try:
+                    return await cls._execute(pool_instance, query, params)
+                except PoolTimeout:
+                    # Saturated, not broken: fall back without taking the replica out
+                    replica.pool_timeouts += 1
+                except OperationalError as e:
+                    # A statement timeout or cancel is the query's fault, not the replica's
+                    if isinstance(e, QueryCanceled):
+                        raise
+                    replica.mark_down(e)
+        elif not is_read_only(query):
+            pin_primary()
+        return await cls._execute(await cls.get_pool(), query, params)
+
+    @classmethod
+    async def _execute(cls, pool_instance: AsyncConnectionPool, query: str,
+                       params: Optional[Union[Tuple, Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        started = monotonic()
+        pool_wait = 0.0
+        result_list = None
+        try:
+            # The pool context commits on success and rolls back on error
+            async with pool_instance.connection() as conn:
+                pool_wait = monotonic() - started
+                async with conn.cursor(row_factory=dict_row) as cur:
+                    logger.debug(f"Executing async query: {query[:100]}...")
+                    timeout_sql = statement_timeout_sql()
+                    if timeout_sql:
+                        await cur.execute(timeout_sql)
+                    with cancellable(conn):
+                        await cur.execute(query, params)
+
+                    # Check if query returns data
+                    if cur.description:
+                        result_list = await cur.fetchall()
+                    else:
+                        result_list = []
+
+                    logger.debug(f"Async query executed successfully, returned {len(result_list)} rows")
+                    return result_list
+
+        except Exception as e:
+            logger.error(f"Async database error: {str(e)}")
+            raise
+
+        finally:
+            query_stats.record(query, params, monotonic() - started, len(result_list or []), pool_wait,
+                               error=result_list is None, source="async")
+
+    @classmethod
+    @asynccontextmanager
+    async def transaction(cls) -> AsyncIterator[AsyncTransaction]:
+        """Run a block of statements on one connection as one transaction."""
+        pin_primary()
+        pool_instance = await cls.get_pool()
+        try:
+            # The pool context commits on success and rolls back on error
+            async with pool_instance.connection() as conn:
+                timeout_sql = statement_timeout_sql()
+                if timeout_sql:
+                    await conn.execute(timeout_sql)
+                with cancellable(conn):
+                    yield AsyncTransaction(conn)
+        except Exception as e:
+            logger.error(f"Async transaction rolled back: {str(e)}")
+            raise
+
+    @classmethod
+    async def execute_many(cls, query: str, rows: Sequence[Union[Sequence[Any], Dict[str, Any]]],
+                           returning: bool = False) -> List[Dict[str, Any]]:
+        async with cls.transaction() as tx:
+            return await tx.execute_many(query, rows, returning)
+
+    @classmethod
+    async def insert_many(cls, table: str, rows: Sequence[Dict[str, Any]], returning: Optional[str] = None,
+                          on_conflict: Optional[str] = None) -> List[Dict[str, Any]]:
+        async with cls.transaction() as tx:
+            return await tx.insert_many(table, rows, returning, on_conflict)
+
+    @classmethod
+    async def insert(cls, table: str, data: Dict[str, Any]) -> Optional[str]:
+        try:
+            result = await cls.execute_query(*insert_sql(table, data))
+            if result:
+                return str(result[0].get('id'))
+            return None
+        except Exception as e:
+            logger.error(f"Insert error: {e}")
+            raise
+
+    @classmethod
+    async def update(cls, table: str, data: Dict[str, Any], conditions: Dict[str, Any],
+                     set_sql: Optional[str] = None) -> bool:
+        try:
+            await cls.execute_query(*update_sql(table, data, conditions, set_sql))
+            return True
+        except Exception as e:
+            logger.error(f"Update error: {e}")
+            raise
+
+    @classmethod
+    async def delete(cls, table: str, conditions: Dict[str, Any]) -> None:
+        try:
+            await cls.execute_query(*delete_sql(table, conditions))
+        except Exception as e:
+            logger.error(f"Delete error: {e}")
+            raise
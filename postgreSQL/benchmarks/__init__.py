@@ -0,0 +1,18 @@
+# Benchmarks run against the database configured in postgreSQL/config.py
+import statistics
+import time
+from typing import Callable, Dict, Any
+
+def measure(fn: Callable[[], None], iterations: int) -> Dict[str, Any]:
+    fn()  # warm up the pool and the plan cache
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "mean_ms": statistics.mean(timings),
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+    }
@@ -0,0 +1,64 @@
+"""Compare row-at-a-time inserts with execute_many and insert_many.
+
+Each variant inserts --sizes rows into a scratch table shaped like
+blog_post_categories, then the table is truncated for the next run.
+
+Usage:
+    python -m postgreSQL.benchmarks.batch_insert --iterations 5 --sizes 10 100 10000
+"""
+import argparse
+import uuid
+from typing import Callable, Dict, List
+from postgreSQL.benchmarks import measure
+from postgreSQL.database import DatabaseInterface
+
+SETUP = "CREATE TABLE IF NOT EXISTS bench_batch_links (id BIGSERIAL PRIMARY KEY, post_id UUID NOT NULL, category_id UUID NOT NULL)"
+TEARDOWN = "DROP TABLE IF EXISTS bench_batch_links"
+INSERT = "INSERT INTO bench_batch_links (post_id, category_id) VALUES (%s, %s)"
+
+def variants(rows: List[Dict[str, str]]) -> Dict[str, Callable[[], None]]:
+    params = [(row["post_id"], row["category_id"]) for row in rows]
+
+    def per_row() -> None:
+        for values in params:
+            DatabaseInterface.execute_query(INSERT, values)
+
+    def execute_many() -> None:
+        DatabaseInterface.execute_many(INSERT, params)
+
+    def insert_many() -> None:
+        DatabaseInterface.insert_many("bench_batch_links", rows)
+
+    def insert_many_returning() -> None:
+        DatabaseInterface.insert_many("bench_batch_links", rows, returning="id")
+
+    return {
+        "per-row": per_row,
+        "execute_many": execute_many,
+        "insert_many": insert_many,
+        "insert_many+ret": insert_many_returning,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 10000])
+    args = parser.parse_args()
+
+    DatabaseInterface.execute_query(SETUP)
+    try:
+        print(f"{'rows':>6}  {'variant':<17}{'mean ms':>10}{'median ms':>11}{'p95 ms':>9}{'rows/s':>12}")
+        for size in args.sizes:
+            post_id = str(uuid.uuid4())
+            rows = [{"post_id": post_id, "category_id": str(uuid.uuid4())} for _ in range(size)]
+            for name, fn in variants(rows).items():
+                stats = measure(fn, args.iterations)
+                DatabaseInterface.execute_query("TRUNCATE bench_batch_links")
+                rate = size / (stats["median_ms"] / 1000) if stats["median_ms"] else 0
+                print(f"{size:>6}  {name:<17}{stats['mean_ms']:>10.2f}{stats['median_ms']:>11.2f}"
+                      f"{stats['p95_ms']:>9.2f}{rate:>12.0f}")
+    finally:
+        DatabaseInterface.execute_query(TEARDOWN)
+
+if __name__ == "__main__":
+    main()
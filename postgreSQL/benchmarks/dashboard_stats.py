@@ -0,0 +1,64 @@
+"""Compare the legacy per-counter dashboard queries with the consolidated one.
+
+Usage:
+    python -m postgreSQL.benchmarks.dashboard_stats --iterations 50
+"""
+import argparse
+from typing import List
+from postgreSQL.benchmarks import measure
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.admin.dashboard import DASHBOARD_STATS_QUERY
+
+PERIODS = ("day", "week", "month", "year")
+
+# The statements /admin/dashboard-stats issued before it was consolidated,
+# one pool checkout and commit each.
+LEGACY_QUERIES: List[str] = [
+    "SELECT COUNT(*) as count FROM users WHERE deleted_at IS NULL",
+    "SELECT COUNT(*) as count FROM affiliates",
+    "SELECT COUNT(*) as count FROM subscriptions WHERE status = 'active' AND deleted_at IS NULL",
+    """SELECT COALESCE(SUM(amount), 0) as revenue FROM transactions
+       WHERE status = 'succeeded'
+       AND EXTRACT(YEAR FROM created_at) = EXTRACT(YEAR FROM CURRENT_DATE)
+       AND EXTRACT(MONTH FROM created_at) = EXTRACT(MONTH FROM CURRENT_DATE)""",
+    "SELECT COALESCE(SUM(commission_amount), 0) as total_commissions FROM referrals WHERE status = 'converted'",
+    "SELECT COUNT(*) as count FROM support_tickets WHERE status IN ('open', 'pending')",
+    """SELECT COUNT(*) as count FROM promo_usages
+       WHERE EXTRACT(YEAR FROM used_at) = EXTRACT(YEAR FROM CURRENT_DATE)
+       AND EXTRACT(MONTH FROM used_at) = EXTRACT(MONTH FROM CURRENT_DATE)""",
+    "SELECT COUNT(*) as count FROM promo_usages",
+    *[f"""SELECT COUNT(*) as count FROM subscriptions
+          WHERE status = 'active' AND deleted_at IS NULL
+          AND created_at >= date_trunc('{p}', CURRENT_DATE)""" for p in PERIODS],
+    *[f"SELECT COUNT(*) as count FROM promo_usages WHERE used_at >= date_trunc('{p}', CURRENT_DATE)" for p in PERIODS],
+    *[f"SELECT COUNT(*) as count FROM affiliates WHERE created_at >= date_trunc('{p}', CURRENT_DATE)" for p in PERIODS],
+    "SELECT COUNT(*) as count FROM referrals",
+    *[f"SELECT COUNT(*) as count FROM referrals WHERE created_at >= date_trunc('{p}', CURRENT_DATE)" for p in PERIODS],
+    "SELECT COALESCE(SUM(amount), 0) as revenue FROM transactions WHERE status = 'succeeded'",
+    "SELECT COALESCE(SUM(commission_amount), 0) as total_commissions FROM referrals WHERE status = 'converted'",
+]
+
+def run_legacy() -> None:
+    for query in LEGACY_QUERIES:
+        DatabaseInterface.execute_query(query)
+
+def run_consolidated() -> None:
+    DatabaseInterface.execute_query(DASHBOARD_STATS_QUERY)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    results = {
+        "legacy": (len(LEGACY_QUERIES), measure(run_legacy, args.iterations)),
+        "consolidated": (1, measure(run_consolidated, args.iterations)),
+    }
+    print(f"{'variant':<14}{'round trips':>12}{'mean ms':>10}{'median ms':>11}{'p95 ms':>9}")
+    for name, (round_trips, stats) in results.items():
+        print(f"{name:<14}{round_trips:>12}{stats['mean_ms']:>10.2f}{stats['median_ms']:>11.2f}{stats['p95_ms']:>9.2f}")
+    speedup = results["legacy"][1]["median_ms"] / max(results["consolidated"][1]["median_ms"], 1e-9)
+    print(f"median speedup: {speedup:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Measure the parse/plan overhead saved by server-side prepared statements.
+
+Runs the hot lookups the way DatabaseInterface.execute_query does (one
+statement and a commit per call) on two dedicated connections: a plain
+psycopg2 connection and a PreparingConnection that prepares on first use.
+Alongside client-side latency it reports the planning time Postgres records
+for each variant (EXPLAIN (SUMMARY) of the statement vs. of its EXECUTE).
+
+Usage:
+    python -m postgreSQL.benchmarks.prepared_statements --iterations 2000
+    python -m postgreSQL.benchmarks.prepared_statements --slug my-post --email admin@example.com
+"""
+import argparse
+import re
+from typing import Any, Callable, Dict, Optional
+import psycopg2
+from postgreSQL.benchmarks import measure
+from postgreSQL.prepared import PreparingConnection, execute, to_numbered
+from postgreSQL.replicas import primary_config
+
+# Same statements as blog/posts.py, login_user/login.py and admin/system_settings.py
+POST_BY_SLUG = """
+    SELECT
+        p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published,
+        p.created_at, p.updated_at, p.published_at,
+        ARRAY_AGG(c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
+        ARRAY_AGG(c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
+        p.view_count AS views,
+        p.comment_count AS comments
+    FROM blog_posts p
+    LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+    LEFT JOIN blog_categories c ON pc.category_id = c.id
+    WHERE p.slug = %s AND p.published = TRUE
+    GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published,
+             p.created_at, p.updated_at, p.published_at, p.view_count, p.comment_count
+"""
+
+LOGIN = """
+    SELECT users.id, users.email, user_roles.role, user_profiles.first_name
+    FROM user_profiles, user_roles, users
+    WHERE user_profiles.user_id = user_roles.user_id
+    AND users.id = user_roles.user_id
+    AND users.email = %(email)s
+    AND users.password_hash = crypt(%(password)s, users.password_hash)
+    LIMIT 1
+"""
+
+SETTINGS = "SELECT * FROM system_settings ORDER BY updated_at DESC NULLS LAST LIMIT 1"
+
+PLANNING_RE = re.compile(r"Planning Time: ([\d.]+) ms")
+
+def run_once(conn, query: str, params: Any) -> Callable[[], None]:
+    def fn() -> None:
+        with conn.cursor() as cur:
+            execute(cur, query, params)
+            if cur.description:
+                cur.fetchall()
+        conn.commit()
+    return fn
+
+def planning_ms(conn, query: str, params: Any) -> Optional[float]:
+    """Planning time Postgres reports for the statement, or for its EXECUTE once prepared."""
+    with conn.cursor() as cur:
+        name = conn.prepared_name(query) if isinstance(conn, PreparingConnection) else None
+        if name:
+            _, values = to_numbered(query, params)
+            placeholders = ", ".join(["%s"] * len(values))
+            cur.execute(f"EXPLAIN (SUMMARY) EXECUTE {name}" + (f" ({placeholders})" if values else ""), values or None)
+        else:
+            cur.execute(f"EXPLAIN (SUMMARY) {query}", params)
+        plan = "\n".join(row[0] for row in cur.fetchall())
+    conn.rollback()
+    match = PLANNING_RE.search(plan)
+    return float(match.group(1)) if match else None
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--slug", default="benchmark-missing-slug")
+    parser.add_argument("--email", default="benchmark@example.com")
+    args = parser.parse_args()
+
+    statements: Dict[str, tuple] = {
+        "post by slug": (POST_BY_SLUG, (args.slug,)),
+        "login": (LOGIN, {"email": args.email, "password": "benchmark"}),
+        "settings": (SETTINGS, None),
+    }
+    plain = psycopg2.connect(**primary_config())
+    preparing = psycopg2.connect(connection_factory=PreparingConnection, **primary_config())
+    preparing.prepare_threshold = 1
+    try:
+        print(f"{'statement':<14}{'variant':<10}{'mean ms':>10}{'median ms':>11}{'p95 ms':>9}{'plan ms':>9}")
+        for label, (query, params) in statements.items():
+            for variant, conn in (("plain", plain), ("prepared", preparing)):
+                stats = measure(run_once(conn, query, params), args.iterations)
+                plan = planning_ms(conn, query, params)
+                plan_text = f"{plan:>9.3f}" if plan is not None else f"{'-':>9}"
+                print(f"{label:<14}{variant:<10}{stats['mean_ms']:>10.3f}{stats['median_ms']:>11.3f}"
+                      f"{stats['p95_ms']:>9.3f}{plan_text}")
+        print(f"\nprepared: {preparing.prepares} statements prepared, {preparing.executes} EXECUTE calls")
+    finally:
+        plain.close()
+        preparing.close()
+
+if __name__ == "__main__":
+    main()
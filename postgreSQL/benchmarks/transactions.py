@@ -0,0 +1,69 @@
+"""Compare per-statement commits with DatabaseInterface.transaction().
+
+Replays the statement pattern of update_blog_post (update the post, clear its
+category links, insert --categories new ones) against scratch tables, once
+with every statement checked out and committed on its own and once inside a
+single transaction.
+
+Usage:
+    python -m postgreSQL.benchmarks.transactions --iterations 50 --categories 3
+"""
+import argparse
+import uuid
+from typing import List, Tuple
+from postgreSQL.benchmarks import measure
+from postgreSQL.database import DatabaseInterface
+
+SETUP = """
+    CREATE TABLE IF NOT EXISTS bench_uow_posts (id UUID PRIMARY KEY, title TEXT, updated_at TIMESTAMPTZ);
+    CREATE TABLE IF NOT EXISTS bench_uow_links (post_id UUID NOT NULL, category_id UUID NOT NULL);
+"""
+TEARDOWN = "DROP TABLE IF EXISTS bench_uow_posts, bench_uow_links"
+
+def statements(post_id: str, categories: List[str]) -> List[Tuple[str, Tuple]]:
+    return [
+        ("UPDATE bench_uow_posts SET title = %s, updated_at = NOW() WHERE id = %s", ("bench", post_id)),
+        ("DELETE FROM bench_uow_links WHERE post_id = %s", (post_id,)),
+    ] + [
+        ("INSERT INTO bench_uow_links (post_id, category_id) VALUES (%s, %s)", (post_id, category_id))
+        for category_id in categories
+    ]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--categories", type=int, default=3)
+    args = parser.parse_args()
+
+    post_id = str(uuid.uuid4())
+    categories = [str(uuid.uuid4()) for _ in range(args.categories)]
+    work = statements(post_id, categories)
+
+    def per_statement() -> None:
+        for query, params in work:
+            DatabaseInterface.execute_query(query, params)
+
+    def unit_of_work() -> None:
+        with DatabaseInterface.transaction() as tx:
+            for query, params in work:
+                tx.execute_query(query, params)
+
+    DatabaseInterface.execute_query(SETUP)
+    try:
+        DatabaseInterface.execute_query("INSERT INTO bench_uow_posts (id, title) VALUES (%s, 'bench')", (post_id,))
+        results = {
+            "per-statement": (len(work), measure(per_statement, args.iterations)),
+            "transaction": (1, measure(unit_of_work, args.iterations)),
+        }
+    finally:
+        DatabaseInterface.execute_query(TEARDOWN)
+
+    print(f"{len(work)} statements per operation")
+    print(f"{'variant':<15}{'commits':>8}{'mean ms':>10}{'median ms':>11}{'p95 ms':>9}")
+    for name, (commits, stats) in results.items():
+        print(f"{name:<15}{commits:>8}{stats['mean_ms']:>10.2f}{stats['median_ms']:>11.2f}{stats['p95_ms']:>9.2f}")
+    speedup = results["per-statement"][1]["median_ms"] / max(results["transaction"][1]["median_ms"], 1e-9)
+    print(f"median speedup: {speedup:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,29 @@ from typing import List, Dict, Any
 from postgreSQL.database import DatabaseInterface
 from fastapi import APIRouter, HTTPException, Body, Request
 from postgreSQL.admin.activity_log import log_admin_activity
+from postgreSQL.blog.post_cache import post_cache
+from postgreSQL.blog.category_index import category_index
 
 router = APIRouter()
 
 def get_categories_with_post_counts() -> List[Dict[str, Any]]:
-    query = """
-        SELECT 
-            c.id, c.name, c.slug, COUNT(p.id) AS posts
-        FROM blog_categories c
-        LEFT JOIN blog_post_categories pc ON c.id = pc.category_id
-        LEFT JOIN blog_posts p ON pc.post_id = p.id AND p.published = TRUE
-        GROUP BY c.id, c.name, c.slug
-        ORDER BY c.name;
-    """
-    return DatabaseInterface.execute_query(query)
+    # Served from memory; see blog/category_index.py
+    return category_index.list()
 
 def update_category(category_id: str, name: str, slug: str) -> bool:
     query = """
         UPDATE blog_categories
         SET name = %s, slug = %s
         WHERE id = %s
+        RETURNING id, name, slug
     """
     try:
-        DatabaseInterface.execute_query(query, (name, slug, category_id))
+        result = DatabaseInterface.execute_query(query, (name, slug, category_id))
+        if not result:
+            return False
+        # Cached posts embed the category name
+        post_cache.invalidate_category(category_id)
+        category_index.category_saved(result[0])
         return True
     except Exception as e:
         print(f"Error updating category: {e}")
@@ -34,6 +34,8 @@ def delete_category(category_id: str) -> bool:
     query = "DELETE FROM blog_categories WHERE id = %s"
     try:
         DatabaseInterface.execute_query(query, (category_id,))
+        post_cache.invalidate_category(category_id)
+        category_index.category_deleted(category_id)
         return True
     except Exception as e:
         print(f"Error deleting category: {e}")
@@ -47,6 +49,8 @@ def create_category(name: str, slug: str) -> Dict[str, Any]:
     """
     try:
         result = DatabaseInterface.execute_query(query, (name, slug))
+        if result:
+            category_index.category_saved(result[0])
         return result[0] if result else None
     except Exception as e:
         print(f"Error creating category: {e}")
@@ -0,0 +1,142 @@
+"""In-memory category listing with published-post counts.
+
+/blog/categories is read far more often than posts or categories change, so
+the listing is loaded once and then kept current by applying deltas from the
+write paths: post create/update/delete in blog/posts.py and category CRUD in
+blog/categories.py. Reads are a sort over a small dict.
+
+The index also remembers each post's published flag and categories, which is
+what lets an update adjust only the counts that moved. Writes made through
+another worker process are not seen, so the index is reloaded from the
+database every CATEGORY_INDEX_TTL seconds.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.config import CATEGORY_INDEX_TTL
+from postgreSQL.replicas import PRIMARY, read_from
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES_QUERY = "SELECT id, name, slug FROM blog_categories"
+
+POSTS_QUERY = """
+    SELECT
+        p.id,
+        p.published,
+        ARRAY_AGG(pc.category_id::text) FILTER (WHERE pc.category_id IS NOT NULL) AS category_ids
+    FROM blog_posts p
+    LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+    GROUP BY p.id, p.published
+"""
+
+class CategoryIndex:
+    def __init__(self, ttl: float = CATEGORY_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._categories: Optional[Dict[str, Dict[str, Any]]] = None
+        self._posts: Dict[str, Tuple[bool, Set[str]]] = {}
+        self._loaded_at = 0.0
+        self.loads = 0
+
+    def _load(self) -> None:
+        # Later deltas are applied on top of this snapshot, so it must not lag
+        with read_from(PRIMARY):
+            category_rows = DatabaseInterface.execute_query(CATEGORIES_QUERY)
+            post_rows = DatabaseInterface.execute_query(POSTS_QUERY)
+        categories = {
+            str(row["id"]): {"id": str(row["id"]), "name": row["name"], "slug": row["slug"], "posts": 0}
+            for row in category_rows
+        }
+        posts = {}
+        for row in post_rows:
+            category_ids = set(row["category_ids"] or [])
+            posts[str(row["id"])] = (bool(row["published"]), category_ids)
+            if row["published"]:
+                for category_id in category_ids:
+                    if category_id in categories:
+                        categories[category_id]["posts"] += 1
+        self._categories, self._posts = categories, posts
+        self._loaded_at = time.monotonic()
+        self.loads += 1
+        logger.debug(f"Category index loaded: {len(categories)} categories, {len(posts)} posts")
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            if self._categories is None or time.monotonic() - self._loaded_at >= self.ttl:
+                self._load()
+            return sorted((dict(c) for c in self._categories.values()), key=lambda c: c["name"])
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._categories = None
+            self._posts = {}
+
+    def _count(self, category_ids: Iterable[str], delta: int) -> None:
+        for category_id in category_ids:
+            category = self._categories.get(category_id)
+            if category is not None:
+                category["posts"] += delta
+
+    def post_saved(self, post_id: str, published: Optional[bool] = None,
+                   category_ids: Optional[Iterable[str]] = None) -> None:
+        """Apply a create/update; None means the field was not changed."""
+        with self._lock:
+            if self._categories is None:
+                return
+            post_id = str(post_id)
+            previous = self._posts.get(post_id)
+            if previous is None and (published is None or category_ids is None):
+                # Created elsewhere and only partly described here
+                self.invalidate()
+                return
+            old_published, old_categories = previous or (False, set())
+            new_published = old_published if published is None else bool(published)
+            new_categories = old_categories if category_ids is None else {str(c) for c in category_ids}
+            if old_published:
+                self._count(old_categories, -1)
+            if new_published:
+                self._count(new_categories, +1)
+            self._posts[post_id] = (new_published, new_categories)
+
+    def post_deleted(self, post_id: str) -> None:
+        with self._lock:
+            if self._categories is None:
+                return
+            published, category_ids = self._posts.pop(str(post_id), (False, set()))
+            if published:
+                self._count(category_ids, -1)
+
+    def category_saved(self, category: Dict[str, Any]) -> None:
+        with self._lock:
+            if self._categories is None:
+                return
+            category_id = str(category["id"])
+            existing = self._categories.get(category_id)
+            posts = existing["posts"] if existing else 0
+            self._categories[category_id] = {
+                "id": category_id, "name": category["name"], "slug": category["slug"], "posts": posts
+            }
+
+    def category_deleted(self, category_id: str) -> None:
+        with self._lock:
+            if self._categories is None:
+                return
+            category_id = str(category_id)
+            self._categories.pop(category_id, None)
+            for published, category_ids in self._posts.values():
+                category_ids.discard(category_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded": self._categories is not None,
+                "categories": len(self._categories or {}),
+                "posts": len(self._posts),
+                "loads": self.loads,
+                "ttl": self.ttl,
+            }
+
+category_index = CategoryIndex()
@@ -0,0 +1,54 @@
+"""Reconcile the denormalised blog_posts.view_count / comment_count columns.
+
+The triggers in migrations/add_blog_post_counters.sql keep the counters
+current; this recomputes them from blog_views and blog_comments to repair
+drift after TRUNCATEs, manual edits or restores.
+
+Usage:
+    python -m postgreSQL.blog.counters reconcile
+    python -m postgreSQL.blog.counters reconcile --post-id <uuid>
+"""
+from typing import List, Optional
+import argparse
+import logging
+from postgreSQL.database import DatabaseInterface
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_QUERY = """
+    WITH actual AS (
+        SELECT
+            p.id,
+            (SELECT COUNT(*) FROM blog_views v WHERE v.post_id = p.id) AS views,
+            (SELECT COUNT(*) FROM blog_comments c WHERE c.post_id = p.id) AS comments
+        FROM blog_posts p
+        WHERE %(post_id)s::uuid IS NULL OR p.id = %(post_id)s::uuid
+    )
+    UPDATE blog_posts p
+    SET view_count = a.views, comment_count = a.comments
+    FROM actual a
+    WHERE p.id = a.id
+    AND (p.view_count <> a.views OR p.comment_count <> a.comments)
+    RETURNING p.id
+"""
+
+def reconcile_post_counters(post_id: Optional[str] = None) -> List[str]:
+    """Recompute counters for one post (or all); returns the ids that had drifted."""
+    result = DatabaseInterface.execute_query(RECONCILE_QUERY, {"post_id": post_id})
+    fixed = [row['id'] for row in result]
+    if fixed:
+        logger.warning(f"Reconciled blog counters for {len(fixed)} posts: {fixed[:20]}")
+    else:
+        logger.info("Blog counters are in sync")
+    return fixed
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain blog_posts view/comment counters")
+    parser.add_argument("command", choices=["reconcile"])
+    parser.add_argument("--post-id", help="only reconcile this post")
+    args = parser.parse_args()
+    reconcile_post_counters(args.post_id)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
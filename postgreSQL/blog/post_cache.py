@@ -0,0 +1,137 @@
+"""Rendered blog post cache.
+
+Single-post responses are cached as the exact JSON bytes sent to the client,
+keyed by ("slug", slug) and ("id", post_id), together with an ETag so repeat
+readers get a 304 without a body. A hot article costs no database work and no
+re-serialisation until it is edited.
+
+Invalidation is exact rather than time-based: update_blog_post,
+delete_blog_post and new comments drop every key cached for that post, and
+category renames or deletions drop every post cached under that category. The
+TTL only bounds how stale the embedded view/comment counters get. Entries and
+their indexes live in the worker process, so with several workers an edit made
+through one of them reaches the others within one TTL.
+"""
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import threading
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from postgreSQL.cache import MemoryBackend, TTLCache, register
+from postgreSQL.config import BLOG_POST_CACHE_TTL, BLOG_POST_CACHE_SIZE
+from postgreSQL.replicas import PRIMARY, read_from
+
+logger = logging.getLogger(__name__)
+
+class CachedPost(NamedTuple):
+    post_id: str
+    slug: str
+    category_ids: Tuple[str, ...]
+    body: bytes
+    etag: str
+
+class _NotFound(Exception):
+    """Raised by the loader so missing posts are never cached."""
+
+def _category_ids(value: Any) -> Tuple[str, ...]:
+    # psycopg2 returns uuid[] as its text form, e.g. "{id1,id2}"
+    if isinstance(value, str):
+        value = value.strip("{}").split(",")
+    return tuple(str(c) for c in (value or []) if c)
+
+def render_post(row: Dict[str, Any]) -> CachedPost:
+    # Same encoding FastAPI's JSONResponse would produce for the row
+    body = json.dumps(
+        jsonable_encoder(row), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+    return CachedPost(
+        post_id=str(row["id"]),
+        slug=row["slug"],
+        category_ids=_category_ids(row.get("category_ids")),
+        body=body,
+        etag=f'"{hashlib.sha1(body).hexdigest()}"',
+    )
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+
+class PostCache:
+    def __init__(self, ttl: float = BLOG_POST_CACHE_TTL, maxsize: int = BLOG_POST_CACHE_SIZE):
+        self.cache = register(TTLCache("blog.posts", ttl, maxsize, backend=MemoryBackend(maxsize)))
+        self._lock = threading.Lock()
+        self._keys_by_post: Dict[str, Set[Hashable]] = {}
+        self._posts_by_category: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation so a load that raced an edit is not kept
+        self._generation = 0
+
+    def _index(self, key: Hashable, entry: CachedPost) -> None:
+        with self._lock:
+            self._keys_by_post.setdefault(entry.post_id, set()).add(key)
+            for category_id in entry.category_ids:
+                self._posts_by_category.setdefault(category_id, set()).add(entry.post_id)
+
+    def get(self, key: Hashable, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[CachedPost]:
+        """Return the cached rendering for `key`, loading the row on a miss; None if not found."""
+        generation = self._generation
+
+        def load() -> CachedPost:
+            # A replica may not have the edit that just invalidated this key yet,
+            # and whatever is loaded here is served until the next edit
+            with read_from(PRIMARY):
+                row = loader()
+            if row is None:
+                raise _NotFound()
+            entry = render_post(row)
+            self._index(key, entry)
+            return entry
+
+        try:
+            entry = self.cache.get_or_load(key, load)
+        except _NotFound:
+            return None
+        if self._generation != generation:
+            self.cache.invalidate(key)
+        return entry
+
+    def get_by_id(self, post_id: str, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[CachedPost]:
+        return self.get(("id", post_id), loader)
+
+    def get_by_slug(self, slug: str, loader: Callable[[], Optional[Dict[str, Any]]]) -> Optional[CachedPost]:
+        return self.get(("slug", slug), loader)
+
+    def invalidate_post(self, post_id: str) -> None:
+        with self._lock:
+            self._generation += 1
+            keys = self._keys_by_post.pop(str(post_id), set())
+        keys.add(("id", str(post_id)))
+        for key in keys:
+            self.cache.invalidate(key)
+        logger.debug(f"Invalidated {len(keys)} cached entries for post {post_id}")
+
+    def invalidate_category(self, category_id: str) -> None:
+        with self._lock:
+            post_ids = self._posts_by_category.pop(str(category_id), set())
+        for post_id in post_ids:
+            self.invalidate_post(post_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._keys_by_post.clear()
+            self._posts_by_category.clear()
+        self.cache.invalidate()
+
+def cached_response(entry: CachedPost, request: Request) -> Response:
+    """Send the cached bytes, or an empty 304 when the client already has this version."""
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+post_cache = PostCache()
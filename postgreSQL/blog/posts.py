@@ -2,9 +2,15 @@ from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 from postgreSQL.database import DatabaseInterface
 from postgreSQL.admin.activity_log import log_admin_activity
-from fastapi import APIRouter, HTTPException, Body, Depends, Request
+from postgreSQL.blog.view_buffer import view_buffer
+from postgreSQL.blog.view_filter import view_filter
+from postgreSQL.blog.post_cache import post_cache, cached_response
+from postgreSQL.blog.related import refresh_related_posts
+from postgreSQL.blog.category_index import category_index
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Body, Depends, Query, Request
 from pydantic import BaseModel
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -49,23 +55,13 @@ def get_published_posts() -> List[Dict[str, Any]]:
                 p.published_at,
                 p.created_at,
                 p.updated_at,
-                COALESCE(v.view_count, 0) AS views,
-                COALESCE(cm.comment_count, 0) AS comments
+                p.view_count AS views,
+                p.comment_count AS comments
             FROM blog_posts p
             LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
             LEFT JOIN blog_categories c ON pc.category_id = c.id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as view_count 
-                FROM blog_views 
-                GROUP BY post_id
-            ) v ON p.id = v.post_id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as comment_count 
-                FROM blog_comments 
-                GROUP BY post_id
-            ) cm ON p.id = cm.post_id
             WHERE p.published = TRUE
-            GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.published_at, p.created_at, p.updated_at, v.view_count, cm.comment_count
+            GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.published_at, p.created_at, p.updated_at, p.view_count, p.comment_count
             ORDER BY p.published_at DESC NULLS LAST, p.created_at DESC;
         """
         result = DatabaseInterface.execute_query(query)
@@ -75,6 +71,76 @@ def get_published_posts() -> List[Dict[str, Any]]:
         logger.error(f"Error fetching published posts: {e}")
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+BLOG_PAGE_SIZE = 12
+BLOG_MAX_PAGE_SIZE = 100
+
+# Matches posts linked to the category with this slug
+CATEGORY_FILTER = """
+    AND EXISTS (
+        SELECT 1
+        FROM blog_post_categories pc
+        JOIN blog_categories c ON pc.category_id = c.id
+        WHERE pc.post_id = p.id AND c.slug = %(category)s
+    )
+"""
+
+def list_published_posts(page: int = 1, page_size: int = BLOG_PAGE_SIZE,
+                         category: Optional[str] = None) -> Dict[str, Any]:
+    """One page of published post summaries; bodies are only read for the excerpt fallback."""
+    try:
+        category_clause = CATEGORY_FILTER if category else ""
+        params = {
+            "category": category,
+            "limit": page_size,
+            "offset": (page - 1) * page_size,
+        }
+        query = f"""
+            SELECT
+                p.id,
+                p.title,
+                p.slug,
+                COALESCE(NULLIF(p.excerpt, ''), LEFT(regexp_replace(p.content, '<[^>]+>', '', 'g'), 150)) AS excerpt,
+                p.featured_image,
+                cats.category_ids,
+                cats.category_names,
+                p.published_at,
+                p.created_at,
+                p.updated_at,
+                p.view_count AS views,
+                p.comment_count AS comments
+            FROM blog_posts p
+            LEFT JOIN LATERAL (
+                SELECT
+                    ARRAY_AGG(c.id) AS category_ids,
+                    ARRAY_AGG(c.name) AS category_names
+                FROM blog_post_categories pc
+                JOIN blog_categories c ON pc.category_id = c.id
+                WHERE pc.post_id = p.id
+            ) cats ON TRUE
+            WHERE p.published = TRUE
+            {category_clause}
+            ORDER BY p.published_at DESC NULLS LAST, p.created_at DESC, p.id DESC
+            LIMIT %(limit)s OFFSET %(offset)s
+        """
+        count_query = f"""
+            SELECT COUNT(*) AS total
+            FROM blog_posts p
+            WHERE p.published = TRUE
+            {category_clause}
+        """
+        posts = DatabaseInterface.execute_query(query, params)
+        total = DatabaseInterface.execute_query(count_query, params)[0]['total']
+        return {
+            "posts": posts,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "has_more": page * page_size < total,
+        }
+    except Exception as e:
+        logger.error(f"Error listing published posts: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
 def get_draft_posts() -> List[Dict[str, Any]]:
     try:
         logger.debug("Fetching draft posts from PostgreSQL")
@@ -86,23 +152,13 @@ def get_draft_posts() -> List[Dict[str, Any]]:
                 ARRAY_AGG(DISTINCT c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
                 ARRAY_AGG(DISTINCT c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
                 p.created_at AS date,
-                COALESCE(v.view_count, 0) AS views,
-                COALESCE(cm.comment_count, 0) AS comments
+                p.view_count AS views,
+                p.comment_count AS comments
             FROM blog_posts p
             LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
             LEFT JOIN blog_categories c ON pc.category_id = c.id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as view_count 
-                FROM blog_views 
-                GROUP BY post_id
-            ) v ON p.id = v.post_id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as comment_count 
-                FROM blog_comments 
-                GROUP BY post_id
-            ) cm ON p.id = cm.post_id
             WHERE p.published = FALSE
-            GROUP BY p.id, p.title, p.slug, p.created_at, v.view_count, cm.comment_count
+            GROUP BY p.id, p.title, p.slug, p.created_at, p.view_count, p.comment_count
             ORDER BY p.created_at DESC;
         """
         result = DatabaseInterface.execute_query(query)
@@ -130,23 +186,13 @@ def get_post_details(post_id: str) -> Optional[Dict[str, Any]]:
                 p.published_at,
                 ARRAY_AGG(c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
                 ARRAY_AGG(c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
-                COALESCE(v.view_count, 0) AS views,
-                COALESCE(cm.comment_count, 0) AS comments
+                p.view_count AS views,
+                p.comment_count AS comments
             FROM blog_posts p
             LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
             LEFT JOIN blog_categories c ON pc.category_id = c.id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as view_count 
-                FROM blog_views 
-                GROUP BY post_id
-            ) v ON p.id = v.post_id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as comment_count 
-                FROM blog_comments 
-                GROUP BY post_id
-            ) cm ON p.id = cm.post_id
             WHERE p.id = %s
-            GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published, p.created_at, p.updated_at, p.published_at, v.view_count, cm.comment_count
+            GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published, p.created_at, p.updated_at, p.published_at, p.view_count, p.comment_count
         """
         results = DatabaseInterface.execute_query(query, (post_id,))
         return results[0] if results else None
@@ -156,12 +202,16 @@ def get_post_details(post_id: str) -> Optional[Dict[str, Any]]:
 
 def delete_blog_post(post_id: str) -> bool:
     try:
-        # First delete relationships
-        DatabaseInterface.execute_query("DELETE FROM blog_post_categories WHERE post_id = %s", (post_id,))
-        DatabaseInterface.execute_query("DELETE FROM blog_views WHERE post_id = %s", (post_id,))
-        DatabaseInterface.execute_query("DELETE FROM blog_comments WHERE post_id = %s", (post_id,))
-        # Then delete the post
-        DatabaseInterface.execute_query("DELETE FROM blog_posts WHERE id = %s", (post_id,))
+        # One transaction, so a failure leaves the post and its relationships intact
+        with DatabaseInterface.transaction() as tx:
+            # First delete relationships
+            tx.execute_query("DELETE FROM blog_post_categories WHERE post_id = %s", (post_id,))
+            tx.execute_query("DELETE FROM blog_views WHERE post_id = %s", (post_id,))
+            tx.execute_query("DELETE FROM blog_comments WHERE post_id = %s", (post_id,))
+            # Then delete the post
+            tx.execute_query("DELETE FROM blog_posts WHERE id = %s", (post_id,))
+        post_cache.invalidate_post(post_id)
+        category_index.post_deleted(post_id)
         return True
     except Exception as e:
         logger.error(f"Error deleting post: {e}")
@@ -193,22 +243,28 @@ def update_blog_post(post_id: str, post_data: Dict[str, Any], category_ids: List
         update_fields = post_data.copy()
         if not update_fields:
             raise ValueError("No fields to update")
-        DatabaseInterface.update("blog_posts", update_fields, {"id": post_id})
+        # The post and its category links change together or not at all
+        with DatabaseInterface.transaction() as tx:
+            # Database time, so incremental consumers such as blog.prerender
+            # can compare it with their own UTC timestamps
+            tx.update("blog_posts", update_fields, {"id": post_id}, set_sql="updated_at = NOW()")
 
-        # Remove existing category relationships
-        DatabaseInterface.delete("blog_post_categories", {"post_id": post_id})
+            # Remove existing category relationships
+            tx.delete("blog_post_categories", {"post_id": post_id})
 
-        # Add new category relationships (no RETURNING id)
-        for category_id in category_ids:
-            query = "INSERT INTO blog_post_categories (post_id, category_id) VALUES (%s, %s)"
-            DatabaseInterface.execute_query(query, (post_id, category_id))
+            # Add new category relationships in one multi-row INSERT
+            tx.insert_many("blog_post_categories", [
+                {"post_id": post_id, "category_id": category_id} for category_id in category_ids
+            ], on_conflict="DO NOTHING")
+        post_cache.invalidate_post(post_id)
+        category_index.post_saved(post_id, post_data.get("published"), category_ids)
         return True
     except Exception as e:
         logger.error(f"Error updating blog post: {e}")
         return False
 
 @router.post("/posts")
-def api_create_blog_post(post: BlogPostCreate, request: Request):
+def api_create_blog_post(post: BlogPostCreate, request: Request, background_tasks: BackgroundTasks):
     try:
         post_id = create_blog_post(
             post.title, post.slug, post.content, post.excerpt, post.featured_image,
@@ -218,9 +274,10 @@ def api_create_blog_post(post: BlogPostCreate, request: Request):
             raise HTTPException(status_code=400, detail="Failed to create post")
         # Save all category relationships if provided
         if post.category_ids:
-            for category_id in post.category_ids:
-                query = "INSERT INTO blog_post_categories (post_id, category_id) VALUES (%s, %s)"
-                DatabaseInterface.execute_query(query, (post_id, category_id))
+            DatabaseInterface.insert_many("blog_post_categories", [
+                {"post_id": post_id, "category_id": category_id} for category_id in post.category_ids
+            ], on_conflict="DO NOTHING")
+        category_index.post_saved(post_id, post.published, post.category_ids or [])
         # Log admin activity
         admin_id = getattr(getattr(request.state, "user", None), "id", None)
         ip_address = request.client.host if request.client else None
@@ -232,11 +289,22 @@ def api_create_blog_post(post: BlogPostCreate, request: Request):
             ip_address=ip_address,
             user_agent=user_agent
         )
+        background_tasks.add_task(refresh_related_posts, [post_id])
         return {"post_id": post_id}
     except Exception as e:
         logger.error(f"API error creating post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/posts")
+def api_list_published_posts(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(BLOG_PAGE_SIZE, ge=1, le=BLOG_MAX_PAGE_SIZE),
+    category: Optional[str] = Query(None, description="Category slug")
+):
+    """Paginated published post summaries without full content"""
+    logger.info(f"API endpoint /posts called (page={page}, page_size={page_size}, category={category})")
+    return list_published_posts(page, page_size, category)
+
 @router.get("/posts/published")
 def api_get_published_posts():
     logger.info("API endpoint /posts/published called")
@@ -248,18 +316,18 @@ def api_get_draft_posts():
     return get_draft_posts()
 
 @router.get("/posts/{post_id}")
-def api_get_post_details(post_id: str):
+def api_get_post_details(post_id: str, request: Request):
     try:
-        post = get_post_details(post_id)
-        if not post:
-            raise HTTPException(status_code=404, detail="Post not found")
-        return post
+        entry = post_cache.get_by_id(post_id, lambda: get_post_details(post_id))
     except Exception as e:
         logger.error(f"API error fetching post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return cached_response(entry, request)
 
 @router.delete("/posts/{post_id}")
-def api_delete_blog_post(post_id: str, request: Request):
+def api_delete_blog_post(post_id: str, request: Request, background_tasks: BackgroundTasks):
     try:
         success = delete_blog_post(post_id)
         if not success:
@@ -275,13 +343,15 @@ def api_delete_blog_post(post_id: str, request: Request):
             ip_address=ip_address,
             user_agent=user_agent
         )
+        background_tasks.add_task(refresh_related_posts, [post_id])
         return {"message": "Post deleted successfully"}
     except Exception as e:
         logger.error(f"API error deleting post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.put("/posts/{post_id}")
-def api_update_blog_post(post_id: str, request: Request, data: BlogPostUpdateInput = Body(...)):
+def api_update_blog_post(post_id: str, request: Request, background_tasks: BackgroundTasks,
+                         data: BlogPostUpdateInput = Body(...)):
     try:
         post_data = data.dict(exclude_unset=True)
         category_ids = post_data.pop("category_ids", [])
@@ -299,67 +369,63 @@ def api_update_blog_post(post_id: str, request: Request, data: BlogPostUpdateInp
             ip_address=ip_address,
             user_agent=user_agent
         )
+        background_tasks.add_task(refresh_related_posts, [post_id])
         return {"message": "Post updated successfully"}
     except Exception as e:
         logger.error(f"API error updating post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def get_published_post_by_slug(slug: str) -> Optional[Dict[str, Any]]:
+    query = """
+        SELECT 
+            p.id,
+            p.title,
+            p.slug,
+            p.content,
+            p.excerpt,
+            p.featured_image,
+            p.author_id,
+            p.published,
+            p.created_at,
+            p.updated_at,
+            p.published_at,
+            ARRAY_AGG(c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
+            ARRAY_AGG(c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
+            p.view_count AS views,
+            p.comment_count AS comments
+        FROM blog_posts p
+        LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+        LEFT JOIN blog_categories c ON pc.category_id = c.id
+        WHERE p.slug = %s AND p.published = TRUE
+        GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published, p.created_at, p.updated_at, p.published_at, p.view_count, p.comment_count
+    """
+    results = DatabaseInterface.execute_query(query, (slug,))
+    return results[0] if results else None
+
 @router.get("/posts/slug/{slug}")
-def api_get_post_by_slug(slug: str):
+def api_get_post_by_slug(slug: str, request: Request):
     try:
-        query = """
-            SELECT 
-                p.id,
-                p.title,
-                p.slug,
-                p.content,
-                p.excerpt,
-                p.featured_image,
-                p.author_id,
-                p.published,
-                p.created_at,
-                p.updated_at,
-                p.published_at,
-                ARRAY_AGG(c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
-                ARRAY_AGG(c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
-                COALESCE(v.view_count, 0) AS views,
-                COALESCE(cm.comment_count, 0) AS comments
-            FROM blog_posts p
-            LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
-            LEFT JOIN blog_categories c ON pc.category_id = c.id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as view_count 
-                FROM blog_views 
-                GROUP BY post_id
-            ) v ON p.id = v.post_id
-            LEFT JOIN (
-                SELECT post_id, COUNT(*) as comment_count 
-                FROM blog_comments 
-                GROUP BY post_id
-            ) cm ON p.id = cm.post_id
-            WHERE p.slug = %s AND p.published = TRUE
-            GROUP BY p.id, p.title, p.slug, p.content, p.excerpt, p.featured_image, p.author_id, p.published, p.created_at, p.updated_at, p.published_at, v.view_count, cm.comment_count
-        """
-        results = DatabaseInterface.execute_query(query, (slug,))
-        if not results:
-            raise HTTPException(status_code=404, detail="Post not found")
-        return results[0]
+        entry = post_cache.get_by_slug(slug, lambda: get_published_post_by_slug(slug))
     except Exception as e:
         logger.error(f"API error fetching post by slug: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+    return cached_response(entry, request)
 
 @router.post("/posts/{post_id}/increment-views")
-def api_increment_post_views(post_id: str):
+def api_increment_post_views(post_id: str, request: Request):
+    # Bots and repeat views are dropped by view_filter; the rest are buffered
+    # in memory and written in batches by view_buffer
     try:
-        query = """
-            INSERT INTO blog_views (post_id, viewed_at)
-            VALUES (%s, NOW())
-        """
-        DatabaseInterface.execute_query(query, (post_id,))
-        return {"success": True}
-    except Exception as e:
-        logger.error(f"API error incrementing post views: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        post_id = str(uuid.UUID(post_id))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid post id")
+    client_ip = request.client.host if request.client else None
+    if not view_filter.allow(post_id, client_ip, request.headers.get("user-agent")):
+        return {"success": True, "counted": False}
+    counted = view_buffer.record(post_id)
+    return {"success": counted, "counted": counted}
 
 class BlogCommentCreate(BaseModel):
     content: str
@@ -376,6 +442,7 @@ def api_create_comment(post_id: str, comment: BlogCommentCreate):
         result = DatabaseInterface.execute_query(query, (post_id, comment.user_id, comment.content))
         if not result:
             raise HTTPException(status_code=400, detail="Failed to add comment")
+        post_cache.invalidate_post(post_id)
         # Log admin activity
         log_admin_activity(
             event_type='create_blog_comment',
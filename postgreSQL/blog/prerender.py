@@ -0,0 +1,298 @@
+"""Pre-render published blog posts to static files.
+
+Writes one directory per SPA route so a web server can answer crawlers and
+anonymous readers without reaching FastAPI or Postgres:
+
+    <out>/index.html, index.<hash>.json                 /blog
+    <out>/<slug>/index.html, index.<hash>.json          /blog/:slug
+    <out>/category/<slug>/index.html, index.<hash>.json /blog/category/:slug
+    <out>/manifest.json
+
+HTML pages keep the route's name so the web server can map URLs onto them;
+each links its data file, which is named by the first 12 hex digits of its
+sha256 and can be served as immutable. The post JSON files hold the same bytes
+the API returns for the post. manifest.json maps every route's data to its
+current hashed file and records each file's sha256 plus the database clock
+at the start of the last run. Later runs re-render posts whose updated_at is
+past that time less UPDATE_OVERLAP: updated_at is when the writing transaction
+began, so an update that committed during the last run can carry an earlier
+stamp; re-rendering an unchanged post rewrites nothing. Later runs also remove
+posts that were deleted or unpublished and rebuild the index and category
+pages from post summaries. Pass --full after a category rename or a template
+change.
+
+Slugs become directory names, so a post or category whose slug is not
+lowercase letters, digits and dashes (or that is "category") is skipped, and
+every write or removal is checked to stay inside --out.
+
+Usage:
+    python -m postgreSQL.blog.prerender --out dist/blog
+    python -m postgreSQL.blog.prerender --out dist/blog --full
+"""
+from typing import Any, Dict, List, Optional
+import argparse
+import hashlib
+import html
+import json
+import logging
+import os
+import re
+import shutil
+from fastapi.encoders import jsonable_encoder
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.blog.post_cache import render_post as render_post_json
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+SLUG_RE = re.compile(r"^[a-z0-9-]+$")
+# Top-level directories that a post slug would collide with
+RESERVED_SLUGS = {"category"}
+HASH_LENGTH = 12
+# How far before the last run's start to look for updated posts; covers
+# transactions that were still open when it read the posts
+UPDATE_OVERLAP = "5 minutes"
+
+POSTS_QUERY = """
+    SELECT
+        p.id,
+        p.title,
+        p.slug,
+        p.content,
+        p.excerpt,
+        p.featured_image,
+        p.author_id,
+        p.published,
+        p.created_at,
+        p.updated_at,
+        p.published_at,
+        ARRAY_AGG(c.id) FILTER (WHERE c.id IS NOT NULL) AS category_ids,
+        ARRAY_AGG(c.name) FILTER (WHERE c.id IS NOT NULL) AS category_names,
+        p.view_count AS views,
+        p.comment_count AS comments
+    FROM blog_posts p
+    LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+    LEFT JOIN blog_categories c ON pc.category_id = c.id
+    WHERE p.published = TRUE
+    AND (%(since)s::timestamptz IS NULL OR p.updated_at > %(since)s::timestamptz - %(overlap)s::interval)
+    GROUP BY p.id
+"""
+
+SUMMARIES_QUERY = """
+    SELECT
+        p.id,
+        p.title,
+        p.slug,
+        p.excerpt,
+        p.featured_image,
+        p.published_at,
+        p.updated_at,
+        ARRAY_AGG(c.slug) FILTER (WHERE c.id IS NOT NULL) AS category_slugs
+    FROM blog_posts p
+    LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+    LEFT JOIN blog_categories c ON pc.category_id = c.id
+    WHERE p.published = TRUE
+    GROUP BY p.id
+    ORDER BY p.published_at DESC NULLS LAST, p.created_at DESC
+"""
+
+CATEGORIES_QUERY = "SELECT id, name, slug FROM blog_categories ORDER BY name"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} | Professional AI Assistants</title>
+    <meta name="description" content="{description}">
+    <meta property="og:title" content="{title}">
+    <meta property="og:description" content="{description}">
+    {og_image}
+    <link rel="canonical" href="{canonical}">
+    <link rel="alternate" type="application/json" href="{data}">
+</head>
+<body>
+    <main class="container">
+{body}
+    </main>
+</body>
+</html>
+"""
+
+def _text_array(value: Any) -> List[str]:
+    # psycopg2 returns uuid[]/varchar[] aggregates either as lists or as "{a,b}"
+    if isinstance(value, str):
+        value = value.strip("{}").split(",")
+    return [str(v) for v in (value or []) if v]
+
+def valid_slug(slug: Any) -> bool:
+    return isinstance(slug, str) and bool(SLUG_RE.match(slug)) and slug not in RESERVED_SLUGS
+
+def _page(title: str, description: str, canonical: str, body: str, data: str,
+          image: Optional[str] = None) -> bytes:
+    og_image = f'<meta property="og:image" content="{html.escape(image)}">' if image else ""
+    return PAGE_TEMPLATE.format(
+        title=html.escape(title),
+        description=html.escape(description or ""),
+        og_image=og_image,
+        canonical=html.escape(canonical),
+        data=html.escape(data),
+        body=body,
+    ).encode("utf-8")
+
+def _summary_list(posts: List[Dict[str, Any]]) -> str:
+    items = "\n".join(
+        f'            <li><a href="/blog/{html.escape(p["slug"])}">{html.escape(p["title"])}</a>'
+        f'<p>{html.escape(p.get("excerpt") or "")}</p></li>'
+        for p in posts
+    )
+    return f"        <ul>\n{items}\n        </ul>"
+
+def _json_bytes(value: Any) -> bytes:
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class Prerenderer:
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+        self.manifest: Dict[str, Any] = {"last_run": None, "files": {}, "assets": {}, "posts": {}}
+        self.written = 0
+        self.unchanged = 0
+
+    def load_manifest(self) -> None:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+            self.manifest.setdefault("assets", {})
+
+    def _path(self, rel_path: str) -> str:
+        """Absolute path for `rel_path`, refusing anything that resolves outside out_dir."""
+        root = os.path.realpath(self.out_dir)
+        path = os.path.realpath(os.path.join(root, rel_path))
+        if path == root or os.path.commonpath([root, path]) != root:
+            raise ValueError(f"Refusing to touch {rel_path!r} outside {self.out_dir}")
+        return path
+
+    def _write(self, rel_path: str, data: bytes) -> str:
+        """Write a file unless its content hash is unchanged; returns the hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(rel_path)
+        if self.manifest["files"].get(rel_path) == digest and os.path.exists(path):
+            self.unchanged += 1
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        self.manifest["files"][rel_path] = digest
+        self.written += 1
+        return digest
+
+    def _write_hashed(self, key: str, data: bytes) -> str:
+        """Write `data` as "<key stem>.<hash><ext>", dropping the file it replaces; returns its path."""
+        digest = hashlib.sha256(data).hexdigest()
+        stem, ext = os.path.splitext(key)
+        rel_path = f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+        previous = self.manifest["assets"].get(key)
+        self._write(rel_path, data)
+        if previous and previous != rel_path:
+            self.manifest["files"].pop(previous, None)
+            try:
+                os.remove(self._path(previous))
+            except FileNotFoundError:
+                pass
+        self.manifest["assets"][key] = rel_path
+        return rel_path
+
+    def _remove_post(self, post_id: str) -> None:
+        slug = self.manifest["posts"].pop(post_id, {}).get("slug")
+        if not valid_slug(slug):
+            return
+        prefix = f"{slug}/"
+        for table in (self.manifest["files"], self.manifest["assets"]):
+            for rel_path in [p for p in table if p.startswith(prefix)]:
+                del table[rel_path]
+        shutil.rmtree(self._path(slug), ignore_errors=True)
+        logger.info(f"Removed pre-rendered post {slug}")
+
+    def render_post(self, row: Dict[str, Any]) -> None:
+        post_id = str(row["id"])
+        slug = row["slug"]
+        previous = self.manifest["posts"].get(post_id)
+        if previous and previous["slug"] != slug:
+            self._remove_post(post_id)
+        if not valid_slug(slug):
+            logger.warning(f"Not pre-rendering post {post_id}: unsafe slug {slug!r}")
+            return
+        body = (
+            f"        <article>\n"
+            f"            <h1>{html.escape(row['title'])}</h1>\n"
+            f"            <div class=\"post-content\">{row['content']}</div>\n"
+            f"        </article>"
+        )
+        data = self._write_hashed(f"{slug}/index.json", render_post_json(row).body)
+        page = _page(row["title"], row.get("excerpt"), f"/blog/{slug}", body, f"/blog/{data}",
+                     row.get("featured_image"))
+        self.manifest["posts"][post_id] = {
+            "slug": slug,
+            "updated_at": jsonable_encoder(row.get("updated_at")),
+            "html": self._write(f"{slug}/index.html", page),
+            "json": data,
+        }
+
+    def render_indexes(self, summaries: List[Dict[str, Any]], categories: List[Dict[str, Any]]) -> None:
+        summaries = [p for p in summaries if valid_slug(p["slug"])]
+        for post in summaries:
+            post["category_slugs"] = _text_array(post.get("category_slugs"))
+        data = self._write_hashed("index.json", _json_bytes(summaries))
+        self._write("index.html", _page("Blog", "Latest articles", "/blog", _summary_list(summaries), f"/blog/{data}"))
+        for category in categories:
+            if not SLUG_RE.match(category["slug"] or ""):
+                logger.warning(f"Not pre-rendering category {category['id']}: unsafe slug {category['slug']!r}")
+                continue
+            posts = [p for p in summaries if category["slug"] in p["category_slugs"]]
+            base = f"category/{category['slug']}"
+            data = self._write_hashed(f"{base}/index.json", _json_bytes({"category": category, "posts": posts}))
+            self._write(f"{base}/index.html", _page(
+                category["name"], f"Articles about {category['name']}",
+                f"/blog/{base}", _summary_list(posts), f"/blog/{data}"
+            ))
+
+    def run(self, full: bool = False) -> None:
+        # The database's clock, which is what stamps updated_at
+        started = DatabaseInterface.execute_query("SELECT NOW() AS now")[0]["now"]
+        self.load_manifest()
+        since = None if full else self.manifest.get("last_run")
+
+        rendered = 0
+        for row in DatabaseInterface.stream_query(POSTS_QUERY, {"since": since, "overlap": UPDATE_OVERLAP}, batch_size=200):
+            self.render_post(row)
+            rendered += 1
+
+        summaries = DatabaseInterface.execute_query(SUMMARIES_QUERY)
+        published = {str(p["id"]) for p in summaries}
+        for post_id in list(self.manifest["posts"]):
+            if post_id not in published:
+                self._remove_post(post_id)
+        self.render_indexes(summaries, DatabaseInterface.execute_query(CATEGORIES_QUERY))
+
+        self.manifest["last_run"] = started.isoformat()
+        os.makedirs(self.out_dir, exist_ok=True)
+        with open(self.manifest_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        logger.info(
+            f"Pre-rendered {rendered} posts since {since or 'start'}: "
+            f"{self.written} files written, {self.unchanged} unchanged"
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-render published blog posts to static files")
+    parser.add_argument("--out", default="dist/blog", help="output directory")
+    parser.add_argument("--full", action="store_true", help="re-render every post, not only recently updated ones")
+    args = parser.parse_args()
+    Prerenderer(args.out).run(full=args.full)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,276 @@
+"""Precomputed "related articles" for blog posts.
+
+Each published post is scored against every other by TF-IDF cosine similarity
+of its title, excerpt and content, blended with the Jaccard overlap of their
+categories. The top RELATED_LIMIT matches are stored in blog_related_posts, so
+serving them is one primary-key range scan.
+
+The corpus is vectorised with NumPy into sparse TF-IDF rows. The offline
+`rebuild` scores every pair at once. After a post is created, updated or
+deleted, refresh_related_posts([post_id]) only scores the changed post against
+the corpus, which is linear in the corpus: the post gets a new list, lists that
+included it are re-scored, and it is merged into any other list whose stored
+scores it now beats. Stored scores of untouched lists keep the IDF weights of
+the run that wrote them until the next rebuild.
+
+Usage:
+    python -m postgreSQL.blog.related rebuild
+"""
+from typing import Dict, Any, List, Optional, Set, Tuple
+from collections import Counter, defaultdict
+import argparse
+import logging
+import re
+import numpy as np
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.replicas import PRIMARY, read_from
+from fastapi import APIRouter, HTTPException
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+RELATED_LIMIT = 5
+TEXT_WEIGHT = 0.7
+CATEGORY_WEIGHT = 0.3
+MAX_FEATURES = 5000
+MIN_SCORE = 0.01
+
+TOKEN_RE = re.compile(r"[a-z][a-z0-9]{2,}")
+TAG_RE = re.compile(r"<[^>]+>")
+STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has have him his how its may
+    new now old see two who did get let say she too use this that with from they will your what
+    when where which their there then them than been were into more also some such only other
+    about would could should these those just over very most each
+""".split())
+
+CORPUS_QUERY = """
+    SELECT
+        p.id,
+        p.title,
+        p.excerpt,
+        p.content,
+        ARRAY_AGG(pc.category_id) FILTER (WHERE pc.category_id IS NOT NULL) AS category_ids
+    FROM blog_posts p
+    LEFT JOIN blog_post_categories pc ON p.id = pc.post_id
+    WHERE p.published = TRUE
+    GROUP BY p.id
+    ORDER BY p.id
+"""
+
+STORED_QUERY = "SELECT post_id, related_post_id, score FROM blog_related_posts ORDER BY post_id, rank"
+
+REPLACE_QUERY = """
+    DELETE FROM blog_related_posts WHERE post_id = ANY(%(post_ids)s::uuid[]);
+    INSERT INTO blog_related_posts (post_id, rank, related_post_id, score, updated_at)
+    SELECT post_id, rank, related_post_id, score, NOW()
+    FROM unnest(%(rows_post)s::uuid[], %(rows_rank)s::smallint[], %(rows_related)s::uuid[], %(rows_score)s::real[])
+        AS r(post_id, rank, related_post_id, score);
+"""
+
+def _tokens(row: Dict[str, Any]) -> List[str]:
+    # Title and excerpt count double: they are what a reader compares posts by
+    text = " ".join([row.get("title") or ""] * 2 + [row.get("excerpt") or ""] * 2 + [row.get("content") or ""])
+    return [t for t in TOKEN_RE.findall(TAG_RE.sub(" ", text).lower()) if t not in STOPWORDS]
+
+def _category_ids(value: Any) -> List[str]:
+    if isinstance(value, str):
+        value = value.strip("{}").split(",")
+    return [str(v) for v in (value or []) if v]
+
+def _row_sums(values: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    """Per-row sums of CSR `values`; rows without entries sum to 0."""
+    sums = np.zeros(len(indptr) - 1, dtype=np.float32)
+    nonempty = indptr[:-1] < indptr[1:]
+    if values.size:
+        sums[nonempty] = np.add.reduceat(values, indptr[:-1][nonempty])
+    return sums
+
+def tfidf_rows(documents: List[List[str]], max_features: int = MAX_FEATURES) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """L2-normalised TF-IDF rows in CSR form: (indptr, indices, data, vocabulary size).
+
+    Only the `max_features` most widespread terms are kept.
+    """
+    doc_freq = Counter(term for doc in documents for term in set(doc))
+    vocabulary = {term: i for i, (term, _) in enumerate(doc_freq.most_common(max_features))}
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+    for doc in documents:
+        for term, count in Counter(doc).items():
+            col = vocabulary.get(term)
+            if col is not None:
+                indices.append(col)
+                counts.append(count)
+        indptr.append(len(indices))
+    indptr_array = np.array(indptr, dtype=np.int64)
+    index_array = np.array(indices, dtype=np.int64)
+    # Sublinear tf, smoothed idf
+    df = np.array([doc_freq[term] for term in vocabulary], dtype=np.float32)
+    idf = np.log((1 + len(documents)) / (1 + df)) + 1
+    data = np.log1p(np.array(counts, dtype=np.float32)) * idf[index_array]
+    norms = np.sqrt(_row_sums(data * data, indptr_array))
+    norms[norms == 0] = 1
+    data /= np.repeat(norms, np.diff(indptr_array))
+    return indptr_array, index_array, data, len(vocabulary)
+
+def tfidf_matrix(documents: List[List[str]], max_features: int = MAX_FEATURES) -> np.ndarray:
+    """Dense form of tfidf_rows, for scoring the whole corpus at once."""
+    indptr, indices, data, width = tfidf_rows(documents, max_features)
+    matrix = np.zeros((len(documents), width), dtype=np.float32)
+    matrix[np.repeat(np.arange(len(documents)), np.diff(indptr)), indices] = data
+    return matrix
+
+def category_overlap(categories: List[List[str]]) -> np.ndarray:
+    """Pairwise Jaccard similarity of the posts' category sets."""
+    index = {c: i for i, c in enumerate(sorted({c for cats in categories for c in cats}))}
+    member = np.zeros((len(categories), max(len(index), 1)), dtype=np.float32)
+    for row, cats in enumerate(categories):
+        for c in cats:
+            member[row, index[c]] = 1
+    shared = member @ member.T
+    sizes = member.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - shared
+    return np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+
+def _top(scores: np.ndarray, ids: List[str], limit: int = RELATED_LIMIT) -> List[Tuple[str, float]]:
+    k = min(limit, len(ids) - 1)
+    if k <= 0:
+        return []
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    ranked = sorted(candidates, key=lambda j: -scores[j])
+    return [(ids[j], float(scores[j])) for j in ranked if scores[j] >= MIN_SCORE]
+
+def compute_related(rows: List[Dict[str, Any]], limit: int = RELATED_LIMIT) -> Dict[str, List[Tuple[str, float]]]:
+    """Top `limit` (related_id, score) pairs for every post in `rows`; O(N²), for the offline rebuild."""
+    if len(rows) < 2:
+        return {str(row["id"]): [] for row in rows}
+    ids = [str(row["id"]) for row in rows]
+    text = tfidf_matrix([_tokens(row) for row in rows])
+    scores = TEXT_WEIGHT * (text @ text.T) + CATEGORY_WEIGHT * category_overlap(
+        [_category_ids(row.get("category_ids")) for row in rows]
+    )
+    np.fill_diagonal(scores, -1)
+    return {ids[i]: _top(scores[i], ids, limit) for i in range(len(ids))}
+
+class _RowScorer:
+    """Scores single posts against the corpus without materialising N×N or N×vocabulary arrays."""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.ids = [str(row["id"]) for row in rows]
+        self.position = {post_id: i for i, post_id in enumerate(self.ids)}
+        self.indptr, self.indices, self.data, self.width = tfidf_rows([_tokens(row) for row in rows])
+        self.categories = [set(_category_ids(row.get("category_ids"))) for row in rows]
+        self._cache: Dict[int, np.ndarray] = {}
+
+    def scores(self, i: int) -> np.ndarray:
+        """Scores of post `i` against every post; symmetric, so also its score in each other list."""
+        if i not in self._cache:
+            start, end = self.indptr[i], self.indptr[i + 1]
+            dense = np.zeros(self.width, dtype=np.float32)
+            dense[self.indices[start:end]] = self.data[start:end]
+            text = _row_sums(self.data * dense[self.indices], self.indptr)
+            mine = self.categories[i]
+            overlap = np.array([len(mine & other) / len(mine | other) if mine or other else 0.0
+                                for other in self.categories], dtype=np.float32)
+            row = TEXT_WEIGHT * text + CATEGORY_WEIGHT * overlap
+            row[i] = -1
+            self._cache[i] = row
+        return self._cache[i]
+
+def related_updates(rows: List[Dict[str, Any]], stored: Dict[str, List[Tuple[str, float]]],
+                    changed: Set[str], limit: int = RELATED_LIMIT) -> Dict[str, List[Tuple[str, float]]]:
+    """New lists for every post whose stored list can differ after `changed` were edited."""
+    scorer = _RowScorer(rows)
+    updates: Dict[str, List[Tuple[str, float]]] = {}
+    live_changed = [post_id for post_id in changed if post_id in scorer.position]
+    for post_id in changed:
+        # Deleted or unpublished posts lose their list
+        i = scorer.position.get(post_id)
+        updates[post_id] = _top(scorer.scores(i), scorer.ids, limit) if i is not None else []
+    for post_id in scorer.ids:
+        if post_id in changed:
+            continue
+        i = scorer.position[post_id]
+        items = stored.get(post_id, [])
+        if any(other in changed for other, _ in items):
+            # A changed post may have dropped out; only a full row finds its replacement
+            updates[post_id] = _top(scorer.scores(i), scorer.ids, limit)
+            continue
+        candidates = items + [(other, float(scorer.scores(scorer.position[other])[i])) for other in live_changed]
+        merged = [item for item in sorted(candidates, key=lambda item: -item[1]) if item[1] >= MIN_SCORE][:limit]
+        if merged != items:
+            updates[post_id] = merged
+    return updates
+
+def _store(related: Dict[str, List[Tuple[str, float]]], post_ids: Set[str]) -> None:
+    rows = [(post_id, rank, other, score)
+            for post_id in post_ids
+            for rank, (other, score) in enumerate(related.get(post_id, []), start=1)]
+    DatabaseInterface.execute_query(REPLACE_QUERY, {
+        "post_ids": list(post_ids),
+        "rows_post": [r[0] for r in rows],
+        "rows_rank": [r[1] for r in rows],
+        "rows_related": [r[2] for r in rows],
+        "rows_score": [r[3] for r in rows],
+    })
+
+def refresh_related_posts(changed: Optional[List[str]] = None) -> None:
+    """Rebuild every related list, or only those affected by the `changed` post ids."""
+    try:
+        # Runs right after an edit, usually as a background task: a lagging
+        # replica would still serve the old corpus and stored lists
+        with read_from(PRIMARY):
+            rows = DatabaseInterface.execute_query(CORPUS_QUERY)
+            if changed is None:
+                related = compute_related(rows)
+                affected = set(related)
+                # Lists of posts that are no longer published
+                stale = DatabaseInterface.execute_query(
+                    "SELECT DISTINCT post_id FROM blog_related_posts WHERE NOT (post_id = ANY(%s::uuid[]))",
+                    (list(affected),)
+                )
+                affected |= {str(row["post_id"]) for row in stale}
+            else:
+                stored: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+                for row in DatabaseInterface.execute_query(STORED_QUERY):
+                    stored[str(row["post_id"])].append((str(row["related_post_id"]), float(row["score"])))
+                related = related_updates(rows, stored, {str(post_id) for post_id in changed})
+                affected = set(related)
+            if affected:
+                _store(related, affected)
+        logger.info(f"Refreshed related posts for {len(affected)} of {len(rows)} posts")
+    except Exception as e:
+        logger.error(f"Error refreshing related posts: {e}")
+
+@router.get("/posts/{post_id}/related")
+def api_get_related_posts(post_id: str):
+    try:
+        query = """
+            SELECT
+                p.id,
+                p.title,
+                p.slug,
+                p.excerpt,
+                p.featured_image,
+                p.published_at,
+                r.score
+            FROM blog_related_posts r
+            JOIN blog_posts p ON r.related_post_id = p.id
+            WHERE r.post_id = %s AND p.published = TRUE
+            ORDER BY r.rank
+        """
+        return DatabaseInterface.execute_query(query, (post_id,))
+    except Exception as e:
+        logger.error(f"API error fetching related posts: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the blog_related_posts table")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.parse_args()
+    refresh_related_posts()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
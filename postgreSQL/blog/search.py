@@ -0,0 +1,113 @@
+from typing import Dict, Any, Optional
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.blog.posts import CATEGORY_FILTER, BLOG_PAGE_SIZE, BLOG_MAX_PAGE_SIZE
+from fastapi import APIRouter, HTTPException, Query
+import logging
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+SEARCH_CONFIG = "english"
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=10, StartSel=<mark>, StopSel=</mark>"
+
+def search_posts(q: str, page: int = 1, page_size: int = BLOG_PAGE_SIZE,
+                 category: Optional[str] = None) -> Dict[str, Any]:
+    """Ranked full-text search over published posts, with per-category match counts."""
+    try:
+        category_clause = CATEGORY_FILTER if category else ""
+        params = {
+            "q": q,
+            "config": SEARCH_CONFIG,
+            "headline_options": HEADLINE_OPTIONS,
+            "category": category,
+            "limit": page_size,
+            "offset": (page - 1) * page_size,
+        }
+        # Rank over the GIN-matched set, then build headlines only for the page
+        query = f"""
+            WITH matches AS (
+                SELECT p.id, ts_rank_cd(s.search_vector, q.query) AS rank
+                FROM blog_post_search s
+                JOIN blog_posts p ON p.id = s.post_id,
+                     websearch_to_tsquery(%(config)s::regconfig, %(q)s) AS q(query)
+                WHERE p.published = TRUE
+                AND s.search_vector @@ q.query
+                {category_clause}
+                ORDER BY rank DESC, p.published_at DESC NULLS LAST, p.id
+                LIMIT %(limit)s OFFSET %(offset)s
+            )
+            SELECT
+                p.id,
+                p.title,
+                p.slug,
+                p.excerpt,
+                p.featured_image,
+                cats.category_ids,
+                cats.category_names,
+                p.published_at,
+                p.view_count AS views,
+                p.comment_count AS comments,
+                m.rank,
+                ts_headline(
+                    %(config)s::regconfig, p.content,
+                    websearch_to_tsquery(%(config)s::regconfig, %(q)s),
+                    %(headline_options)s
+                ) AS highlight
+            FROM matches m
+            JOIN blog_posts p ON p.id = m.id
+            LEFT JOIN LATERAL (
+                SELECT
+                    ARRAY_AGG(c.id) AS category_ids,
+                    ARRAY_AGG(c.name) AS category_names
+                FROM blog_post_categories pc
+                JOIN blog_categories c ON pc.category_id = c.id
+                WHERE pc.post_id = p.id
+            ) cats ON TRUE
+            ORDER BY m.rank DESC, p.published_at DESC NULLS LAST, p.id
+        """
+        count_query = f"""
+            SELECT COUNT(*) AS total
+            FROM blog_post_search s
+            JOIN blog_posts p ON p.id = s.post_id
+            WHERE p.published = TRUE
+            AND s.search_vector @@ websearch_to_tsquery(%(config)s::regconfig, %(q)s)
+            {category_clause}
+        """
+        # Facet counts ignore the selected category so the other options stay visible
+        facet_query = """
+            SELECT c.id, c.name, c.slug, COUNT(*) AS posts
+            FROM blog_post_search s
+            JOIN blog_posts p ON p.id = s.post_id
+            JOIN blog_post_categories pc ON pc.post_id = p.id
+            JOIN blog_categories c ON pc.category_id = c.id
+            WHERE p.published = TRUE
+            AND s.search_vector @@ websearch_to_tsquery(%(config)s::regconfig, %(q)s)
+            GROUP BY c.id, c.name, c.slug
+            ORDER BY posts DESC, c.name
+        """
+        results = DatabaseInterface.execute_query(query, params)
+        total = DatabaseInterface.execute_query(count_query, params)[0]['total']
+        facets = DatabaseInterface.execute_query(facet_query, params)
+        return {
+            "query": q,
+            "results": results,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "has_more": page * page_size < total,
+            "facets": facets,
+        }
+    except Exception as e:
+        logger.error(f"Error searching posts: {e}")
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+@router.get("/search")
+def api_search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(BLOG_PAGE_SIZE, ge=1, le=BLOG_MAX_PAGE_SIZE),
+    category: Optional[str] = Query(None, description="Category slug")
+):
+    """Search published posts by title, excerpt and content"""
+    logger.info(f"API endpoint /search called (q={q!r}, page={page}, category={category})")
+    return search_posts(q, page, page_size, category)
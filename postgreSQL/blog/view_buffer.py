@@ -0,0 +1,119 @@
+"""Write-behind buffer for blog post views.
+
+Page views are counted per post in memory and written to blog_views in one
+multi-row INSERT every VIEW_BUFFER_FLUSH_INTERVAL seconds, or as soon as
+VIEW_BUFFER_FLUSH_SIZE views are pending. Recording a view never touches the
+database, so the increment endpoint costs no pool connection.
+
+Memory is bounded by VIEW_BUFFER_MAX_PENDING: past it (e.g. while the database
+is unreachable and flushes keep failing) new views are dropped and counted in
+stats(). Pending views are flushed on shutdown. Buffered views are stamped
+with the flush time, so viewed_at can lag the real view by one interval.
+"""
+from typing import Dict, Any, Optional
+import logging
+import threading
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.config import VIEW_BUFFER_FLUSH_INTERVAL, VIEW_BUFFER_FLUSH_SIZE, VIEW_BUFFER_MAX_PENDING
+
+logger = logging.getLogger(__name__)
+
+# One row per view, expanded server-side from (post_id, count) pairs
+FLUSH_QUERY = """
+    INSERT INTO blog_views (post_id, viewed_at)
+    SELECT v.post_id, NOW()
+    FROM unnest(%s::uuid[], %s::int[]) AS v(post_id, views)
+    CROSS JOIN LATERAL generate_series(1, v.views)
+"""
+
+class ViewBuffer:
+    def __init__(self, flush_interval: float = VIEW_BUFFER_FLUSH_INTERVAL,
+                 flush_size: int = VIEW_BUFFER_FLUSH_SIZE, max_pending: int = VIEW_BUFFER_MAX_PENDING):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self._counts: Dict[str, int] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Serialises flushes so the shutdown flush can't race the thread's
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def record(self, post_id: str) -> bool:
+        """Count one view; returns False if it was dropped because the buffer is full."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._counts[post_id] = self._counts.get(post_id, 0) + 1
+            self._pending += 1
+            self.recorded += 1
+            if self._pending >= self.flush_size:
+                self._wakeup.set()
+        return True
+
+    def flush(self) -> int:
+        """Write all pending views; on failure they are put back for the next flush."""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, {}
+                pending, self._pending = self._pending, 0
+            if not counts:
+                return 0
+            try:
+                DatabaseInterface.execute_query(FLUSH_QUERY, (list(counts.keys()), list(counts.values())))
+            except Exception as e:
+                self.flush_errors += 1
+                logger.error(f"Error flushing {pending} buffered blog views: {e}")
+                with self._lock:
+                    for post_id, views in counts.items():
+                        self._counts[post_id] = self._counts.get(post_id, 0) + views
+                    self._pending += pending
+                return 0
+            self.flushes += 1
+            self.flushed += pending
+            logger.debug(f"Flushed {pending} blog views for {len(counts)} posts")
+            return pending
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="blog-view-buffer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the flush thread and write whatever is still pending."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._stop.is_set():
+                self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "pending_posts": len(self._counts),
+                "max_pending": self.max_pending,
+                "recorded": self.recorded,
+                "dropped": self.dropped,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+            }
+
+view_buffer = ViewBuffer()
@@ -0,0 +1,112 @@
+"""Drop duplicate and bot blog views before they reach the view buffer.
+
+A view is identified by (post id, client IP, user-agent hash) and counted at
+most once per VIEW_DEDUP_WINDOW. Seen keys are kept in two rotating Bloom
+filters: inserts go to the current one, lookups check both, and every window
+the older one is discarded. Memory is fixed at two bit arrays sized for
+VIEW_DEDUP_CAPACITY views per window; the cost is an occasional false
+positive (a genuine first view dropped) at VIEW_DEDUP_ERROR_RATE, and a key
+is remembered for between one and two windows.
+
+Crawlers, link previewers, HTTP libraries and empty user agents are rejected
+outright by BOT_PATTERN.
+"""
+from typing import Dict, Any, Optional
+import hashlib
+import math
+import re
+import threading
+import time
+from postgreSQL.config import VIEW_DEDUP_WINDOW, VIEW_DEDUP_CAPACITY, VIEW_DEDUP_ERROR_RATE
+
+BOT_PATTERN = re.compile(
+    r"bot|crawl|spider|slurp|archiver|fetch|scrape|preview|monitor|lighthouse|headless|phantomjs|"
+    r"facebookexternalhit|embedly|bingpreview|whatsapp|curl|wget|python-requests|python-urllib|"
+    r"httpx|aiohttp|go-http-client|java/|okhttp|axios|node-fetch|postman|insomnia",
+    re.IGNORECASE,
+)
+
+def is_bot(user_agent: Optional[str]) -> bool:
+    return not user_agent or bool(BOT_PATTERN.search(user_agent))
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> bool:
+        """Set the key's bits; returns True if they were all set already."""
+        present = True
+        for pos in self._positions(key):
+            byte, bit = divmod(pos, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        return present
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos // 8] & (1 << (pos % 8)) for pos in self._positions(key))
+
+class ViewFilter:
+    def __init__(self, window: float = VIEW_DEDUP_WINDOW, capacity: int = VIEW_DEDUP_CAPACITY,
+                 error_rate: float = VIEW_DEDUP_ERROR_RATE):
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity, error_rate)
+        self._previous = BloomFilter(capacity, error_rate)
+        self._rotated_at = time.monotonic()
+        self.accepted = 0
+        self.duplicates = 0
+        self.bots = 0
+        self.rotations = 0
+
+    def _rotate(self) -> None:
+        now = time.monotonic()
+        if now - self._rotated_at >= self.window:
+            # Anything older than two windows is gone after a long idle gap
+            stale = now - self._rotated_at >= 2 * self.window
+            self._previous = BloomFilter(self.capacity, self.error_rate) if stale else self._current
+            self._current = BloomFilter(self.capacity, self.error_rate)
+            self._rotated_at = now
+            self.rotations += 1
+
+    def allow(self, post_id: str, client_ip: Optional[str], user_agent: Optional[str]) -> bool:
+        """True if this view should be counted."""
+        if is_bot(user_agent):
+            with self._lock:
+                self.bots += 1
+            return False
+        ua_hash = hashlib.blake2b(user_agent.encode("utf-8"), digest_size=8).hexdigest()
+        key = f"{post_id}|{client_ip or '-'}|{ua_hash}"
+        with self._lock:
+            self._rotate()
+            if key in self._previous or self._current.add(key):
+                self.duplicates += 1
+                return False
+            self.accepted += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "window_seconds": self.window,
+                "capacity": self.capacity,
+                "error_rate": self.error_rate,
+                "memory_bytes": len(self._current.bits) + len(self._previous.bits),
+                "accepted": self.accepted,
+                "rejected_duplicate": self.duplicates,
+                "rejected_bot": self.bots,
+                "rotations": self.rotations,
+            }
+
+view_filter = ViewFilter()
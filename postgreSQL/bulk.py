@@ -0,0 +1,123 @@
+"""Bulk load and export tables with COPY.
+
+Files are streamed row by row through DatabaseInterface.copy_in/copy_out, so
+memory stays flat for multi-million row historical imports. Each load runs as
+a single COPY in one transaction: either every row lands or none do.
+
+NDJSON columns come from the first record (or --columns); missing keys load as
+NULL and nested objects as JSON text. CSV files need a header row; empty
+fields load as NULL.
+
+Usage:
+    python -m postgreSQL.bulk load transactions transactions-2023.ndjson
+    python -m postgreSQL.bulk load referrals referrals.csv --format csv
+    python -m postgreSQL.bulk export admin_activity_log activity.csv
+"""
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import csv
+import itertools
+import json
+import logging
+import re
+import sys
+import time
+from postgreSQL.database import DatabaseInterface
+
+logger = logging.getLogger(__name__)
+
+# Tables the API routers read and write; COPY targets are restricted to these
+BULK_TABLES = frozenset({
+    "users", "user_roles", "user_profiles", "user_preferences", "user_sessions", "user_security",
+    "user_activity_logs", "login_history",
+    "affiliates", "referrals", "referral_payouts", "payouts",
+    "plans", "plan_usage", "subscriptions", "transactions", "invoices", "billing_history",
+    "promo_codes", "promo_usages", "support_tickets", "admin_activity_log",
+    "blog_posts", "blog_categories", "blog_post_categories", "blog_views", "blog_comments",
+})
+
+COLUMN_RE = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+def _check_table(table: str) -> None:
+    if table not in BULK_TABLES:
+        raise ValueError(f"Table {table!r} is not enabled for bulk operations")
+
+def _check_columns(columns: Sequence[str]) -> None:
+    # Column names come from file headers and are interpolated into the COPY statement
+    bad = [c for c in columns if not COLUMN_RE.match(c)]
+    if bad:
+        raise ValueError(f"Invalid column names: {bad}")
+
+def read_ndjson(path: str, columns: Optional[Sequence[str]] = None) -> Tuple[List[str], Iterator[Sequence[Any]]]:
+    handle = open(path, encoding="utf-8")
+    records = (json.loads(line) for line in handle if line.strip())
+    first = next(records, None)
+    if first is None:
+        handle.close()
+        return list(columns or []), iter(())
+    names = list(columns or first.keys())
+
+    def rows() -> Iterator[Sequence[Any]]:
+        with handle:
+            for record in itertools.chain([first], records):
+                yield [record.get(name) for name in names]
+
+    return names, rows()
+
+def read_csv(path: str, columns: Optional[Sequence[str]] = None) -> Tuple[List[str], Iterator[Sequence[Any]]]:
+    handle = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(handle)
+    header = next(reader, [])
+    names = list(columns or header)
+    positions = [header.index(name) for name in names]
+
+    def rows() -> Iterator[Sequence[Any]]:
+        with handle:
+            for record in reader:
+                yield [record[i] if record[i] != "" else None for i in positions]
+
+    return names, rows()
+
+def load(table: str, path: str, format: str = "ndjson", columns: Optional[Sequence[str]] = None) -> int:
+    _check_table(table)
+    names, rows = (read_csv if format == "csv" else read_ndjson)(path, columns)
+    if not names:
+        logger.info(f"{path} is empty, nothing to load")
+        return 0
+    _check_columns(names)
+    start = time.monotonic()
+    count = DatabaseInterface.copy_in(table, names, rows)
+    elapsed = time.monotonic() - start
+    logger.info(f"Loaded {count} rows into {table} in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+    return count
+
+def export(table: str, path: Optional[str] = None) -> None:
+    _check_table(table)
+    out = open(path, "wb") if path else sys.stdout.buffer
+    try:
+        for chunk in DatabaseInterface.copy_out(f"SELECT * FROM {table}"):
+            out.write(chunk)
+    finally:
+        if path:
+            out.close()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk load or export tables with COPY")
+    sub = parser.add_subparsers(dest="command", required=True)
+    load_parser = sub.add_parser("load", help="load an NDJSON or CSV file into a table")
+    load_parser.add_argument("table")
+    load_parser.add_argument("path")
+    load_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    load_parser.add_argument("--columns", nargs="+", help="columns to load (default: from the file)")
+    export_parser = sub.add_parser("export", help="write a table as CSV")
+    export_parser.add_argument("table")
+    export_parser.add_argument("path", nargs="?", help="output file (default: stdout)")
+    args = parser.parse_args()
+    if args.command == "load":
+        load(args.table, args.path, args.format, args.columns)
+    else:
+        export(args.table, args.path)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,266 @@
+"""In-process TTL result cache for read-heavy endpoints.
+
+    @router.get("/top-affiliates")
+    @cached(ttl=300)
+    async def get_top_affiliates():
+        ...
+
+Entries expire after `ttl` seconds and the least recently used entry is
+evicted once a cache holds `maxsize` keys. Concurrent misses for the same key
+are coalesced: the first caller runs the function, the others wait for its
+result, so N admins opening the dashboard at once cost one database call.
+
+Values live in MemoryBackend by default. Setting CACHE_REDIS_URL shares them
+between workers through RedisBackend; use_backend() swaps the backend of every
+registered cache, e.g. for a local stand-in. Backends that do network I/O set
+`blocking`, and async callers then reach them through the threadpool.
+"""
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import functools
+import logging
+import os
+import pickle
+import threading
+import time
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class CacheBackend(ABC):
+    # True when calls wait on the network and must stay off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Any:
+        """Return the cached value or _MISSING."""
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+class MemoryBackend(CacheBackend):
+    """Thread-safe LRU dict with per-entry expiry."""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RedisBackend(CacheBackend):
+    """Shares entries between workers; eviction is left to Redis' maxmemory policy."""
+
+    blocking = True
+
+    def __init__(self, url: str, prefix: str):
+        import redis  # optional dependency, only needed when CACHE_REDIS_URL is set
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key!r}"
+
+    def get(self, key):
+        raw = self._client.get(self._key(key))
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl):
+        self._client.setex(self._key(key), max(1, int(ttl)), pickle.dumps(value))
+
+    def delete(self, key):
+        self._client.delete(self._key(key))
+
+    def clear(self):
+        keys = list(self._client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self._client.delete(*keys)
+
+class TTLCache:
+    def __init__(self, name: str, ttl: float, maxsize: int = 128, backend: Optional[CacheBackend] = None):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.backend = backend or _default_backend(name, maxsize)
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._async_inflight: Dict[Hashable, asyncio.Future] = {}
+        self._sync_inflight: Dict[Hashable, threading.Event] = {}
+
+    async def _backend(self, method: str, *args: Any) -> Any:
+        call = getattr(self.backend, method)
+        if self.backend.blocking:
+            return await run_in_threadpool(call, *args)
+        return call(*args)
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        while True:
+            value = await self._backend("get", key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            inflight = self._async_inflight.get(key)
+            if inflight is not None:
+                self.coalesced += 1
+                value = await asyncio.shield(inflight)
+                if value is not _MISSING:
+                    return value
+                # The leader failed or was cancelled with its own request
+                # (e.g. its client left); load for this one instead
+                continue
+            self.misses += 1
+            future = asyncio.get_running_loop().create_future()
+            self._async_inflight[key] = future
+            value = _MISSING
+            try:
+                value = await loader()
+                await self._backend("set", key, value, self.ttl)
+                return value
+            finally:
+                self._async_inflight.pop(key, None)
+                # Followers get the value, or _MISSING to retry; never the leader's error
+                future.set_result(value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        while True:
+            value = self.backend.get(key)
+            if value is not _MISSING:
+                self.hits += 1
+                return value
+            with self._lock:
+                event = self._sync_inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._sync_inflight[key] = event
+                    leader = True
+                else:
+                    leader = False
+            if not leader:
+                self.coalesced += 1
+                event.wait()
+                # Re-read the backend; if the leader failed, try loading ourselves
+                continue
+            self.misses += 1
+            try:
+                value = loader()
+                self.backend.set(key, value, self.ttl)
+                return value
+            finally:
+                with self._lock:
+                    self._sync_inflight.pop(key, None)
+                event.set()
+
+    def invalidate(self, key: Hashable = _MISSING) -> None:
+        if key is _MISSING:
+            self.backend.clear()
+        else:
+            self.backend.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "ttl": self.ttl,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+_caches: Dict[str, TTLCache] = {}
+
+def _default_backend(name: str, maxsize: int) -> CacheBackend:
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    if redis_url:
+        try:
+            return RedisBackend(redis_url, prefix=f"cache:{name}")
+        except Exception as e:
+            logger.warning(f"Falling back to in-memory cache for {name}: {e}")
+    return MemoryBackend(maxsize)
+
+def use_backend(factory: Callable[[TTLCache], CacheBackend]) -> None:
+    """Replace the backend of every registered cache, e.g. use_backend(lambda c: MemoryBackend(c.maxsize))."""
+    for cache in _caches.values():
+        cache.backend = factory(cache)
+
+def register(cache: TTLCache) -> TTLCache:
+    """Make a hand-built cache visible to use_backend() and cache_stats()."""
+    _caches[cache.name] = cache
+    return cache
+
+def get_cache(name: str) -> Optional[TTLCache]:
+    return _caches.get(name)
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+def _make_key(args: Tuple, kwargs: Dict[str, Any]) -> Hashable:
+    # Request objects differ per call and never select a different result
+    return (
+        tuple(a for a in args if not isinstance(a, Request)),
+        tuple(sorted((k, v) for k, v in kwargs.items() if not isinstance(v, Request))),
+    )
+
+def cached(ttl: float, maxsize: int = 128, name: Optional[str] = None):
+    """Cache a sync or async function's result per argument tuple for `ttl` seconds."""
+    def decorator(func):
+        cache_name = name or f"{func.__module__}.{func.__name__}"
+        cache = register(TTLCache(cache_name, ttl, maxsize))
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await cache.get_or_load_async(_make_key(args, kwargs), lambda: func(*args, **kwargs))
+            async_wrapper.cache = cache
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache.get_or_load(_make_key(args, kwargs), lambda: func(*args, **kwargs))
+        wrapper.cache = cache
+        return wrapper
+    return decorator
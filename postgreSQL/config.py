@@ -18,4 +18,83 @@ DB_CONFIG = {
     "user": user,
     "password": password,
     "dbname": dbname,
-}
\ No newline at end of file
+    # Read replicas as libpq DSNs, e.g. POSTGRES_REPLICAS="host=replica-1,host=replica-2"
+    # (comma separated; keys missing from a DSN are taken from the primary).
+    # Stripped before the primary pools are built; see postgreSQL/replicas.py
+    "replicas": [dsn.strip() for dsn in (os.getenv("POSTGRES_REPLICAS") or "").split(",") if dsn.strip()],
+}
+
+# Connection pool sizing. FastAPI runs sync routes on the event loop's default
+# ThreadPoolExecutor, so by default allow one connection per worker thread.
+worker_threads = min(32, (os.cpu_count() or 1) + 4)
+
+DB_POOL_MIN = int(os.getenv("POSTGRES_POOL_MIN") or 1)
+DB_POOL_MAX = int(os.getenv("POSTGRES_POOL_MAX") or worker_threads)
+DB_POOL_TIMEOUT = float(os.getenv("POSTGRES_POOL_TIMEOUT") or 30)
+
+# daily_metrics rollups: how often the trailing window and dirty days are
+# refreshed (seconds) and how many trailing days each refresh covers
+ROLLUP_REFRESH_INTERVAL = float(os.getenv("ROLLUP_REFRESH_INTERVAL") or 300)
+ROLLUP_REFRESH_DAYS = int(os.getenv("ROLLUP_REFRESH_DAYS") or 7)
+
+# Blog view write-behind buffer: flush every N seconds or once N views are
+# pending, and stop accepting views past the cap while the database is down
+VIEW_BUFFER_FLUSH_INTERVAL = float(os.getenv("VIEW_BUFFER_FLUSH_INTERVAL") or 5)
+VIEW_BUFFER_FLUSH_SIZE = int(os.getenv("VIEW_BUFFER_FLUSH_SIZE") or 500)
+VIEW_BUFFER_MAX_PENDING = int(os.getenv("VIEW_BUFFER_MAX_PENDING") or 100000)
+
+# Rendered blog post cache. Edits invalidate entries immediately; the TTL
+# bounds how stale the embedded view/comment counters can get
+BLOG_POST_CACHE_TTL = float(os.getenv("BLOG_POST_CACHE_TTL") or 60)
+BLOG_POST_CACHE_SIZE = int(os.getenv("BLOG_POST_CACHE_SIZE") or 1000)
+
+# Blog view de-duplication: a (post, client) pair is counted once per window;
+# each filter generation is sized for CAPACITY views at ERROR_RATE false positives
+VIEW_DEDUP_WINDOW = float(os.getenv("VIEW_DEDUP_WINDOW") or 1800)
+VIEW_DEDUP_CAPACITY = int(os.getenv("VIEW_DEDUP_CAPACITY") or 200000)
+VIEW_DEDUP_ERROR_RATE = float(os.getenv("VIEW_DEDUP_ERROR_RATE") or 0.001)
+
+# /blog/categories index: kept current by the write paths, fully reloaded
+# this often to pick up writes made through other worker processes (seconds)
+CATEGORY_INDEX_TTL = float(os.getenv("CATEGORY_INDEX_TTL") or 300)
+
+# Read replicas: reads fall back to the primary when a replica lags more than
+# REPLICA_MAX_LAG seconds; lag is re-checked every REPLICA_LAG_CHECK_INTERVAL
+# seconds and a failed replica is skipped for REPLICA_RETRY_AFTER seconds
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG") or 10)
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL") or 5)
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER") or 30)
+REPLICA_POOL_MAX = int(os.getenv("REPLICA_POOL_MAX") or DB_POOL_MAX)
+# A replica whose WAL receiver heard nothing from the primary for this many
+# seconds is treated as detached. An idle receiver asks for a keepalive after
+# half of the replica's wal_receiver_timeout (30s by default), so keep it above that
+REPLICA_RECEIVER_TIMEOUT = float(os.getenv("REPLICA_RECEIVER_TIMEOUT") or 60)
+
+# Query instrumentation (postgreSQL/instrumentation.py): statements slower than
+# DB_SLOW_QUERY_MS go to the slow-query log, and with DB_SLOW_QUERY_EXPLAIN set
+# read-only ones get an EXPLAIN (GENERIC_PLAN) captured once per window (needs
+# PostgreSQL 16). Percentiles cover the last one to two DB_STATS_WINDOW periods (seconds)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS") or 200)
+DB_SLOW_QUERY_EXPLAIN = (os.getenv("DB_SLOW_QUERY_EXPLAIN") or "").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_LOG_SIZE = int(os.getenv("DB_SLOW_QUERY_LOG_SIZE") or 100)
+DB_STATS_WINDOW = float(os.getenv("DB_STATS_WINDOW") or 300)
+DB_STATS_MAX_STATEMENTS = int(os.getenv("DB_STATS_MAX_STATEMENTS") or 500)
+# Debug endpoints that run statements or clear stats (/debug/db-stats/{id}/explain,
+# /debug/db-stats/reset) need this value in the X-Admin-Token header; unset,
+# they are disabled
+DEBUG_ADMIN_TOKEN = os.getenv("DEBUG_ADMIN_TOKEN")
+
+# Request tracing (postgreSQL/tracing.py): a request that runs the same
+# statement fingerprint more than this many times is flagged as a likely N+1
+TRACE_REPEAT_THRESHOLD = int(os.getenv("TRACE_REPEAT_THRESHOLD") or 5)
+
+# Statement timeouts (postgreSQL/timeouts.py) are configured in system_settings;
+# this is how often each worker re-reads them (seconds)
+STATEMENT_TIMEOUT_REFRESH = float(os.getenv("STATEMENT_TIMEOUT_REFRESH") or 60)
+
+# Server-side prepared statements (postgreSQL/prepared.py): a statement is
+# prepared on a pooled connection after running DB_PREPARE_THRESHOLD times on
+# it (0 disables), keeping at most DB_PREPARED_MAX per connection. The async
+# pool passes the same limits to psycopg's own prepared statement cache
+DB_PREPARE_THRESHOLD = int(os.getenv("DB_PREPARE_THRESHOLD") or 5)
+DB_PREPARED_MAX = int(os.getenv("DB_PREPARED_MAX") or 100)
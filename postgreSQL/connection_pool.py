@@ -0,0 +1,87 @@
+from typing import Dict, Any, Optional
+import threading
+import time
+import logging
+from psycopg2 import pool
+
+logger = logging.getLogger(__name__)
+
+class PoolTimeout(pool.PoolError):
+    """Raised when no connection became free within the acquire timeout."""
+
+class BoundedConnectionPool(pool.AbstractConnectionPool):
+    """Thread-safe psycopg2 pool that queues callers instead of failing fast.
+
+    SimpleConnectionPool is not safe to share between threads and
+    ThreadedConnectionPool raises PoolError as soon as maxconn connections are
+    checked out. FastAPI runs sync routes in a threadpool, so under bursty
+    traffic callers here wait up to `timeout` seconds for a connection to be
+    returned before giving up with PoolTimeout.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float = 30.0, *args, **kwargs):
+        self._cond = threading.Condition(threading.Lock())
+        self.timeout = timeout
+        self._waiting = 0
+        self._acquired = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._exhausted = 0
+        self._timeouts = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None, timeout: Optional[float] = None):
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        with self._cond:
+            if len(self._used) >= self.maxconn:
+                self._exhausted += 1
+                logger.warning(f"Connection pool exhausted ({self.maxconn} in use), waiting up to {timeout}s")
+            while len(self._used) >= self.maxconn and not self.closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"Timed out after {timeout}s waiting for a database connection")
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+            conn = self._getconn(key)
+            waited = time.monotonic() - start
+            self._acquired += 1
+            if waited > 0.001:
+                self._waits += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+            return conn
+
+    def putconn(self, conn, key=None, close: bool = False):
+        with self._cond:
+            try:
+                self._putconn(conn, key, close)
+            finally:
+                self._cond.notify()
+
+    def closeall(self):
+        with self._cond:
+            self._closeall()
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "min_size": self.minconn,
+                "max_size": self.maxconn,
+                "in_use": len(self._used),
+                "idle": len(self._pool),
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "waits": self._waits,
+                "wait_time_total_ms": round(self._wait_time_total * 1000, 3),
+                "wait_time_max_ms": round(self._wait_time_max * 1000, 3),
+                "exhausted_events": self._exhausted,
+                "timeouts": self._timeouts,
+            }
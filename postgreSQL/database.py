@@ -1,51 +1,282 @@
 
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Iterable, Sequence
+from contextlib import contextmanager
+from datetime import date, datetime, time
+import json
+import queue
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
+from psycopg2.extensions import QueryCanceledError
+from psycopg2.extras import RealDictCursor, execute_batch, execute_values
 import logging
-from .config import DB_CONFIG
+import threading
+import uuid
+from time import monotonic
+from .config import DB_CONFIG, DB_POOL_MIN, DB_POOL_MAX, DB_POOL_TIMEOUT
+from .connection_pool import BoundedConnectionPool, PoolTimeout
+from .instrumentation import query_stats
+from .prepared import PreparingConnection, StatementCacheReset, execute as execute_prepared
+from .replicas import ReplicaPools, is_read_only, pin_primary, primary_config, wants_replica
+from .timeouts import cancellable, statement_timeout_sql
 
 logger = logging.getLogger(__name__)
 
+def insert_sql(table: str, data: Dict[str, Any]) -> Tuple[str, Tuple]:
+    placeholders = ', '.join(['%s'] * len(data))
+    columns = ', '.join(data.keys())
+    return f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING id", tuple(data.values())
+
+def update_sql(table: str, data: Dict[str, Any], conditions: Dict[str, Any],
+               set_sql: Optional[str] = None) -> Tuple[str, Tuple]:
+    """UPDATE ... SET data; `set_sql` appends a raw SET fragment such as "updated_at = NOW()"."""
+    set_clause = ', '.join([f"{k} = %s" for k in data.keys()] + ([set_sql] if set_sql else []))
+    where_clause = ' AND '.join([f"{k} = %s" for k in conditions.keys()])
+    return f"UPDATE {table} SET {set_clause} WHERE {where_clause}", tuple(data.values()) + tuple(conditions.values())
+
+def delete_sql(table: str, conditions: Dict[str, Any]) -> Tuple[str, Tuple]:
+    where_clause = ' AND '.join([f"{k} = %s" for k in conditions.keys()])
+    return f"DELETE FROM {table} WHERE {where_clause}", tuple(conditions.values())
+
+def insert_many_sql(table: str, rows: Sequence[Dict[str, Any]], returning: Optional[str] = None,
+                    on_conflict: Optional[str] = None) -> Tuple[str, List[str]]:
+    """Multi-row INSERT with a single VALUES %s slot, for execute_values; columns come from the first row."""
+    columns = list(rows[0].keys())
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+    if on_conflict:
+        query += f" ON CONFLICT {on_conflict}"
+    if returning:
+        query += f" RETURNING {returning}"
+    return query, columns
+
+def _copy_value(value: Any) -> str:
+    """Encode one value for COPY ... FROM STDIN in text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (datetime, date, time)):
+        text = value.isoformat()
+    elif isinstance(value, (dict, list)):
+        text = json.dumps(value)
+    else:
+        text = str(value)
+    return (text.replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+class _CopyReader:
+    """File-like view of an iterable of rows, consumed by copy_expert one read() at a time."""
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        self._rows = iter(rows)
+        self._buffer = ""
+        self.rows = 0
+
+    def read(self, size: int = -1) -> str:
+        while size < 0 or len(self._buffer) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += "\t".join(_copy_value(v) for v in row) + "\n"
+            self.rows += 1
+        if size < 0:
+            size = len(self._buffer)
+        chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        return chunk
+
+    readline = read
+
+class _CopyAborted(Exception):
+    """Raised inside copy_expert when the copy_out consumer stops early."""
+
+_COPY_DONE = object()
+
+class Transaction:
+    """Statements run on the single connection held by DatabaseInterface.transaction().
+
+    Mirrors the DatabaseInterface helpers, but nothing is committed until the
+    `with` block exits cleanly; any exception rolls back every statement.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = 0
+
+    def execute_query(self, query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
+        started = monotonic()
+        rows = None
+        try:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+                logger.debug(f"Executing query in transaction: {query[:100]}...")
+                cur.execute(query, params)
+                self.statements += 1
+                rows = [dict(row) for row in cur.fetchall()] if cur.description else []
+                return rows
+        finally:
+            query_stats.record(query, params, monotonic() - started, len(rows or []), error=rows is None)
+
+    def insert(self, table: str, data: Dict[str, Any]) -> Optional[str]:
+        result = self.execute_query(*insert_sql(table, data))
+        return str(result[0].get('id')) if result else None
+
+    def update(self, table: str, data: Dict[str, Any], conditions: Dict[str, Any],
+               set_sql: Optional[str] = None) -> bool:
+        self.execute_query(*update_sql(table, data, conditions, set_sql))
+        return True
+
+    def delete(self, table: str, conditions: Dict[str, Any]) -> None:
+        self.execute_query(*delete_sql(table, conditions))
+
+    def execute_many(self, query: str, rows: Sequence[Sequence[Any]], page_size: int = 1000) -> None:
+        """Run `query` once per parameter row, sending `page_size` statements per round trip."""
+        if not rows:
+            return
+        started = monotonic()
+        done = False
+        try:
+            with self.conn.cursor() as cur:
+                execute_batch(cur, query, rows, page_size=page_size)
+                self.statements += 1
+                done = True
+        finally:
+            query_stats.record(query, None, monotonic() - started, len(rows), error=not done)
+
+    def insert_many(self, table: str, rows: Sequence[Dict[str, Any]], returning: Optional[str] = None,
+                    on_conflict: Optional[str] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Insert dict rows as multi-row VALUES lists, `page_size` rows per statement.
+
+        With `returning` (e.g. "id"), returns the RETURNING rows in insert order.
+        """
+        if not rows:
+            return []
+        query, columns = insert_many_sql(table, rows, returning, on_conflict)
+        values = [tuple(row[c] for c in columns) for row in rows]
+        started = monotonic()
+        done = False
+        try:
+            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+                result = execute_values(cur, query, values, page_size=page_size, fetch=bool(returning))
+                self.statements += 1
+                done = True
+        finally:
+            query_stats.record(query, None, monotonic() - started, len(rows), error=not done)
+        return [dict(row) for row in result] if returning else []
+
+    def copy_in(self, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """Stream rows into `table` with COPY FROM STDIN; returns the number of rows copied.
+
+        `rows` is consumed lazily, so a generator over a multi-gigabyte file
+        keeps memory flat.
+        """
+        reader = _CopyReader(rows)
+        query = f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+        started = monotonic()
+        done = False
+        try:
+            with self.conn.cursor() as cur:
+                cur.copy_expert(query, reader, size=65536)
+                self.statements += 1
+                done = True
+        finally:
+            query_stats.record(query, None, monotonic() - started, reader.rows, error=not done)
+        return reader.rows
+
 class DatabaseInterface:
     _pool = None
+    _replicas: Optional[ReplicaPools] = None
+    _pool_lock = threading.Lock()
 
     @classmethod
     def get_pool(cls):
         if cls._pool is None:
-            try:
-                cls._pool = pool.SimpleConnectionPool(
-                    minconn=1,
-                    maxconn=10,
-                    **DB_CONFIG
-                )
-                logger.info("Database connection pool created successfully")
-            except Exception as e:
-                logger.error(f"Failed to create database pool: {e}")
-                raise
+            with cls._pool_lock:
+                if cls._pool is None:
+                    try:
+                        cls._pool = BoundedConnectionPool(
+                            minconn=DB_POOL_MIN,
+                            maxconn=DB_POOL_MAX,
+                            timeout=DB_POOL_TIMEOUT,
+                            connection_factory=PreparingConnection,
+                            **primary_config()
+                        )
+                        logger.info(f"Database connection pool created successfully (max {DB_POOL_MAX} connections)")
+                    except Exception as e:
+                        logger.error(f"Failed to create database pool: {e}")
+                        raise
         return cls._pool
 
+    @classmethod
+    def pool_stats(cls) -> Dict[str, Any]:
+        if cls._pool is None:
+            return {}
+        return cls._pool.stats()
+
+    @classmethod
+    def replica_pools(cls) -> ReplicaPools:
+        if cls._replicas is None:
+            with cls._pool_lock:
+                if cls._replicas is None:
+                    cls._replicas = ReplicaPools(DB_CONFIG["replicas"])
+        return cls._replicas
+
+    @classmethod
+    def replica_stats(cls) -> Dict[str, Any]:
+        if cls._replicas is None:
+            return {}
+        return cls._replicas.stats()
+
+    @classmethod
+    def close_pool(cls) -> None:
+        with cls._pool_lock:
+            if cls._replicas is not None:
+                cls._replicas.closeall()
+                cls._replicas = None
+            if cls._pool is not None:
+                cls._pool.closeall()
+                cls._pool = None
+                logger.info("Database connection pool closed")
+
     @staticmethod
-    def execute_query(query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
-        pool_instance = DatabaseInterface.get_pool()
+    def execute_query(query: str, params: Optional[Tuple] = None, target: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Run one statement and return its rows as dicts.
+
+        Read-only statements go to a replica when `target` (or the request's
+        routing target, see postgreSQL/replicas.py) is "replica".
+        """
+        if wants_replica(query, target):
+            picked = DatabaseInterface.replica_pools().pick()
+            if picked is not None:
+                replica, pool_instance = picked
+                try:
+                    return DatabaseInterface._execute(pool_instance, query, params)
+                except PoolTimeout:
+                    # Saturated, not broken: fall back without taking the replica out
+                    replica.pool_timeouts += 1
+                except psycopg2.OperationalError as e:
+                    # A statement timeout or cancel is the query's fault, not the replica's
+                    if isinstance(e, QueryCanceledError):
+                        raise
+                    replica.mark_down(e)
+        elif not is_read_only(query):
+            pin_primary()
+        return DatabaseInterface._execute(DatabaseInterface.get_pool(), query, params)
+
+    @staticmethod
+    def _execute(pool_instance, query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
         conn = None
+        started = monotonic()
+        pool_wait = 0.0
+        result_list = None
         try:
             conn = pool_instance.getconn()
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                logger.debug(f"Executing query: {query[:100]}...")
-                cur.execute(query, params)
-                
-                # Check if query returns data
-                if cur.description:
-                    result = cur.fetchall()
-                    result_list = [dict(row) for row in result]
-                else:
-                    result_list = []
-                
-                conn.commit()
-                logger.debug(f"Query executed successfully, returned {len(result_list)} rows")
-                return result_list
+            pool_wait = monotonic() - started
+            try:
+                result_list = DatabaseInterface._run(conn, query, params)
+            except StatementCacheReset:
+                # The connection's prepared statements were gone; retry unprepared
+                conn.rollback()
+                result_list = DatabaseInterface._run(conn, query, params)
+            conn.commit()
+            logger.debug(f"Query executed successfully, returned {len(result_list)} rows")
+            return result_list
 
         except Exception as e:
             logger.error(f"Database error: {str(e)}")
@@ -56,16 +287,201 @@ class DatabaseInterface:
         finally:
             if conn:
                 pool_instance.putconn(conn)
+            query_stats.record(query, params, monotonic() - started, len(result_list or []), pool_wait,
+                               error=result_list is None)
+
+    @staticmethod
+    def _run(conn, query: str, params: Optional[Tuple] = None) -> List[Dict[str, Any]]:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            logger.debug(f"Executing query: {query[:100]}...")
+            timeout_sql = statement_timeout_sql()
+            if timeout_sql:
+                cur.execute(timeout_sql)
+            with cancellable(conn):
+                execute_prepared(cur, query, params)
+
+            # Check if query returns data
+            if cur.description:
+                return [dict(row) for row in cur.fetchall()]
+            return []
+
+    @classmethod
+    def explain(cls, statement: str) -> Any:
+        """Run EXPLAIN (GENERIC_PLAN) for a read-only $n-numbered statement and return the JSON plan.
+
+        The statement is planned without parameter values and never executed,
+        so no argument ends up in the plan. Needs PostgreSQL 16 or later.
+        Not recorded in query_stats.
+        """
+        if not is_read_only(statement):
+            raise ValueError("Only read-only statements can be explained")
+        pool_instance = cls.get_pool()
+        conn = pool_instance.getconn()
+        try:
+            if conn.server_version < 160000:
+                raise ValueError("EXPLAIN (GENERIC_PLAN) needs PostgreSQL 16 or later")
+            with conn.cursor() as cur:
+                # No arguments, so psycopg2 sends the text as is
+                cur.execute(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {statement}")
+                return cur.fetchone()[0]
+        finally:
+            conn.rollback()
+            pool_instance.putconn(conn)
+
+    @staticmethod
+    def stream_query(query: str, params: Optional[Tuple] = None, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Yield rows one at a time through a named server-side cursor.
+
+        Only `batch_size` rows are held in memory at once, so exports stay flat
+        regardless of table size. The connection is held until the generator is
+        exhausted or closed.
+        """
+        pool_instance = DatabaseInterface.get_pool()
+        conn = None
+        try:
+            conn = pool_instance.getconn()
+            cursor_name = f"stream_{uuid.uuid4().hex}"
+            with conn.cursor(name=cursor_name, cursor_factory=RealDictCursor) as cur:
+                cur.itersize = batch_size
+                logger.debug(f"Streaming query: {query[:100]}...")
+                cur.execute(query, params)
+                while True:
+                    rows = cur.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield dict(row)
+            conn.commit()
+
+        except BaseException as e:
+            if not isinstance(e, GeneratorExit):
+                logger.error(f"Database error while streaming: {str(e)}")
+            if conn:
+                conn.rollback()
+            raise
+
+        finally:
+            if conn:
+                pool_instance.putconn(conn)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls) -> Iterator[Transaction]:
+        """Run a block of statements on one connection as one transaction.
+
+            with DatabaseInterface.transaction() as tx:
+                tx.execute_query("DELETE FROM blog_views WHERE post_id = %s", (post_id,))
+                tx.delete("blog_posts", {"id": post_id})
+        """
+        pin_primary()
+        pool_instance = cls.get_pool()
+        conn = pool_instance.getconn()
+        try:
+            timeout_sql = statement_timeout_sql()
+            if timeout_sql:
+                with conn.cursor() as cur:
+                    cur.execute(timeout_sql)
+            with cancellable(conn):
+                yield Transaction(conn)
+            conn.commit()
+        except BaseException as e:
+            if isinstance(e, Exception):
+                logger.error(f"Transaction rolled back: {str(e)}")
+            conn.rollback()
+            raise
+        finally:
+            pool_instance.putconn(conn)
+
+    @classmethod
+    def execute_many(cls, query: str, rows: Sequence[Sequence[Any]], page_size: int = 1000) -> None:
+        """Run one statement for many parameter rows in batched round trips and a single commit."""
+        with cls.transaction() as tx:
+            tx.execute_many(query, rows, page_size)
+
+    @classmethod
+    def insert_many(cls, table: str, rows: Sequence[Dict[str, Any]], returning: Optional[str] = None,
+                    on_conflict: Optional[str] = None, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """Multi-row INSERT of dict rows in one transaction; see Transaction.insert_many."""
+        with cls.transaction() as tx:
+            return tx.insert_many(table, rows, returning, on_conflict, page_size)
+
+    @classmethod
+    def copy_in(cls, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> int:
+        """Bulk-load rows with COPY in one transaction; see Transaction.copy_in."""
+        with cls.transaction() as tx:
+            return tx.copy_in(table, columns, rows)
+
+    @classmethod
+    def copy_out(cls, query: str, params: Optional[Tuple] = None, format: str = "csv",
+                 header: bool = True, queue_size: int = 64) -> Iterator[bytes]:
+        """Yield the result of `query` as raw COPY TO STDOUT chunks (CSV with a header by default).
+
+        copy_expert pushes data into a file object, so it runs on a helper
+        thread writing into a bounded queue; at most `queue_size` chunks are
+        buffered however large the result is. Closing the generator early
+        aborts the COPY and releases the connection.
+        """
+        pool_instance = cls.get_pool()
+        conn = pool_instance.getconn()
+        chunks: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        errors: List[BaseException] = []
+
+        def put(item: Any) -> None:
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+            raise _CopyAborted()
+
+        class _QueueWriter:
+            def write(self, data) -> int:
+                put(data)
+                return len(data)
+
+        def produce() -> None:
+            try:
+                with conn.cursor() as cur:
+                    sql = cur.mogrify(query, params).decode() if params else query
+                    options = f"FORMAT {format}" + (", HEADER" if header and format == "csv" else "")
+                    cur.copy_expert(f"COPY ({sql}) TO STDOUT WITH ({options})", _QueueWriter())
+                conn.commit()
+            except _CopyAborted:
+                # The COPY is left mid-stream; the connection is discarded below
+                pass
+            except BaseException as e:
+                errors.append(e)
+                conn.rollback()
+            finally:
+                try:
+                    put(_COPY_DONE)
+                except _CopyAborted:
+                    pass
+
+        producer = threading.Thread(target=produce, name="copy-out", daemon=True)
+        producer.start()
+        completed = False
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _COPY_DONE:
+                    completed = True
+                    break
+                yield chunk
+            if errors:
+                logger.error(f"Database error during COPY: {str(errors[0])}")
+                raise errors[0]
+        finally:
+            stop.set()
+            producer.join()
+            pool_instance.putconn(conn, close=not completed)
 
     @classmethod
     def insert(cls, table: str, data: Dict[str, Any]) -> Optional[str]:
         try:
-            keys = data.keys()
-            values = tuple(data.values())
-            placeholders = ', '.join(['%s'] * len(keys))
-            columns = ', '.join(keys)
-            query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders}) RETURNING id"
-            result = cls.execute_query(query, values)
+            result = cls.execute_query(*insert_sql(table, data))
             if result:
                 return str(result[0].get('id'))
             return None
@@ -74,13 +490,10 @@ class DatabaseInterface:
             raise
 
     @classmethod
-    def update(cls, table: str, data: Dict[str, Any], conditions: Dict[str, Any]) -> bool:
+    def update(cls, table: str, data: Dict[str, Any], conditions: Dict[str, Any],
+               set_sql: Optional[str] = None) -> bool:
         try:
-            set_clause = ', '.join([f"{k} = %s" for k in data.keys()])
-            where_clause = ' AND '.join([f"{k} = %s" for k in conditions.keys()])
-            params = tuple(data.values()) + tuple(conditions.values())
-            query = f"UPDATE {table} SET {set_clause} WHERE {where_clause}"
-            cls.execute_query(query, params)
+            cls.execute_query(*update_sql(table, data, conditions, set_sql))
             return True
         except Exception as e:
             logger.error(f"Update error: {e}")
@@ -89,10 +502,7 @@ class DatabaseInterface:
     @classmethod
     def delete(cls, table: str, conditions: Dict[str, Any]) -> None:
         try:
-            where_clause = ' AND '.join([f"{k} = %s" for k in conditions.keys()])
-            params = tuple(conditions.values())
-            query = f"DELETE FROM {table} WHERE {where_clause}"
-            cls.execute_query(query, params)
+            cls.execute_query(*delete_sql(table, conditions))
         except Exception as e:
             logger.error(f"Delete error: {e}")
             raise
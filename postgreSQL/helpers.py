@@ -1,5 +1,7 @@
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Any, Tuple
+import base64
+import json
 
 def get_month_range(offset: int = 0) -> Tuple[datetime, datetime]:
     today = datetime.today().replace(day=1)
@@ -19,3 +21,22 @@ def get_month_range(offset: int = 0) -> Tuple[datetime, datetime]:
         end = datetime(year, month + 1, 1)
 
     return start, end
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """Opaque keyset cursor for (created_at, id) ordered listings."""
+    payload = json.dumps([created_at.isoformat(), str(row_id)])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(row_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def like_pattern(search: str) -> str:
+    """Escape LIKE wildcards in user input and wrap it for a substring match."""
+    escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
@@ -0,0 +1,267 @@
+"""Per-statement timing for DatabaseInterface and AsyncDatabaseInterface.
+
+Every execute_query call and every batch write (execute_many, insert_many,
+copy_in), including those made inside transaction() blocks, is recorded
+against a fingerprint of its SQL: comments dropped, literals and
+placeholders replaced by ?, IN lists and multi-row VALUES collapsed, and
+whitespace normalised, so the same statement with different arguments lands
+in one entry.
+
+Each entry keeps call, row and error counts, total execution time and pool
+wait, plus a log-bucketed latency histogram for percentiles. The histogram
+rotates every DB_STATS_WINDOW seconds and percentiles are read over the
+current and previous window, so they follow recent behaviour rather than the
+whole process lifetime.
+
+Calls slower than DB_SLOW_QUERY_MS are logged to the "postgreSQL.slow_queries"
+logger and kept in a bounded in-memory log. For read-only statements the last
+slow call is kept as its $n-numbered text and parameter types, never the
+values (they can be passwords), so POST /debug/db-stats/{id}/explain can show
+its EXPLAIN (GENERIC_PLAN); with DB_SLOW_QUERY_EXPLAIN set that happens
+automatically in the background, at most once per statement per window.
+"""
+from typing import Any, Dict, List, Optional
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+import bisect
+import hashlib
+import logging
+import re
+import threading
+import time
+from .config import (DB_SLOW_QUERY_MS, DB_SLOW_QUERY_EXPLAIN, DB_SLOW_QUERY_LOG_SIZE,
+                     DB_STATS_WINDOW, DB_STATS_MAX_STATEMENTS)
+from .prepared import to_numbered
+from .replicas import is_read_only
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("postgreSQL.slow_queries")
+
+# Trace of the request being served (a tracing.RequestTrace), set by
+# tracing.TracingMiddleware; every recorded call is reported to it as well
+request_trace: ContextVar[Optional[Any]] = ContextVar("request_trace", default=None)
+
+_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s|\$\d+")
+_NUMBERS = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r"\s+")
+_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_ROWS = re.compile(r"(\(\?(?:\.\.\.)?\))(?:\s*,\s*\(\?(?:\.\.\.)?\))+")
+
+# Latency bucket upper bounds in ms: 0.1ms to ~100s, x1.5 apart
+BUCKETS = [round(0.1 * 1.5 ** i, 3) for i in range(35)]
+
+def normalize(query: str) -> str:
+    text = _COMMENTS.sub(" ", query)
+    text = _STRINGS.sub("?", text)
+    text = _PLACEHOLDERS.sub("?", text)
+    text = _NUMBERS.sub("?", text)
+    text = _SPACE.sub(" ", text).strip()
+    text = _LISTS.sub("(?...)", text)
+    return _ROWS.sub(r"\1, ...", text)
+
+def fingerprint(query: str, text: Optional[str] = None) -> str:
+    """Statement id of `query`; pass `text` when its normalize() result is already at hand."""
+    return hashlib.sha1((normalize(query) if text is None else text).encode("utf-8")).hexdigest()[:12]
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.total += 1
+
+def percentile(histograms: List[Histogram], q: float) -> Optional[float]:
+    total = sum(h.total for h in histograms)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i in range(len(BUCKETS) + 1):
+        seen += sum(h.counts[i] for h in histograms)
+        if seen >= rank:
+            # Bucket upper bound; the overflow bucket reports the last bound
+            return BUCKETS[min(i, len(BUCKETS) - 1)]
+    return BUCKETS[-1]
+
+class StatementStats:
+    def __init__(self, statement_id: str, text: str):
+        self.id = statement_id
+        self.text = text
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self.slow = 0
+        self.current = Histogram()
+        self.previous = Histogram()
+        self.window_started = time.monotonic()
+        # Last slow call without its values, for EXPLAIN (read-only statements only)
+        self.sample: Optional[Dict[str, Any]] = None
+        self.plan: Optional[Dict[str, Any]] = None
+        self.explained_at = 0.0
+
+    def _rotate(self, now: float) -> None:
+        elapsed = now - self.window_started
+        if elapsed >= DB_STATS_WINDOW:
+            self.previous = self.current if elapsed < 2 * DB_STATS_WINDOW else Histogram()
+            self.current = Histogram()
+            self.window_started = now
+
+    def add(self, ms: float, rows: int, pool_wait_ms: float, error: bool) -> None:
+        self._rotate(time.monotonic())
+        self.calls += 1
+        self.errors += error
+        self.rows += rows
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.pool_wait_ms += pool_wait_ms
+        self.current.add(ms)
+
+    def summary(self) -> Dict[str, Any]:
+        self._rotate(time.monotonic())
+        recent = [self.current, self.previous]
+        return {
+            "id": self.id,
+            "statement": self.text[:500],
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "rows_per_call": round(self.rows / self.calls, 2) if self.calls else 0,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.calls, 3) if self.calls else 0,
+            "max_ms": round(self.max_ms, 3),
+            "pool_wait_ms": round(self.pool_wait_ms, 3),
+            "slow_calls": self.slow,
+            "recent_calls": sum(h.total for h in recent),
+            "p50_ms": percentile(recent, 0.50),
+            "p95_ms": percentile(recent, 0.95),
+            "p99_ms": percentile(recent, 0.99),
+            "explainable": self.sample is not None,
+        }
+
+class QueryStats:
+    SORT_KEYS = ("total_ms", "calls", "mean_ms", "max_ms", "p95_ms", "pool_wait_ms", "rows", "errors")
+
+    def __init__(self, slow_ms: float = DB_SLOW_QUERY_MS, max_statements: int = DB_STATS_MAX_STATEMENTS,
+                 explain_slow: bool = DB_SLOW_QUERY_EXPLAIN):
+        self.slow_ms = slow_ms
+        self.max_statements = max_statements
+        self.explain_slow = explain_slow
+        self._lock = threading.Lock()
+        self._statements: "OrderedDict[str, StatementStats]" = OrderedDict()
+        self._slow_log: deque = deque(maxlen=DB_SLOW_QUERY_LOG_SIZE)
+        self.evicted = 0
+        self.started_at = datetime.now(timezone.utc)
+
+    def record(self, query: str, params: Any, seconds: float, rows: int,
+               pool_wait: float = 0.0, error: bool = False, source: str = "sync") -> None:
+        """Record one call; `rows` is the rows returned, or for batch writes the rows sent."""
+        ms = seconds * 1000
+        text = normalize(query)
+        statement_id = fingerprint(query, text)
+        explain = None
+        trace = request_trace.get()
+        if trace is not None:
+            trace.add(statement_id, text, ms, pool_wait * 1000)
+        with self._lock:
+            stats = self._statements.get(statement_id)
+            if stats is None:
+                stats = self._statements[statement_id] = StatementStats(statement_id, text)
+                # Least recently used statements make room for new ones
+                while len(self._statements) > self.max_statements:
+                    self._statements.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._statements.move_to_end(statement_id)
+            stats.add(ms, rows, pool_wait * 1000, error)
+            if ms < self.slow_ms:
+                return
+            stats.slow += 1
+            converted = to_numbered(query, params) if is_read_only(query) else None
+            if converted is not None:
+                statement, values = converted
+                stats.sample = {"statement": statement, "param_types": [type(v).__name__ for v in values]}
+                if self.explain_slow and time.monotonic() - stats.explained_at >= DB_STATS_WINDOW:
+                    stats.explained_at = time.monotonic()
+                    explain = stats.sample
+            self._slow_log.append({
+                "at": datetime.now(timezone.utc).isoformat(),
+                "id": statement_id,
+                "statement": text[:500],
+                "duration_ms": round(ms, 3),
+                "pool_wait_ms": round(pool_wait * 1000, 3),
+                "rows": rows,
+                "error": error,
+                "source": source,
+            })
+        slow_logger.warning(
+            f"Slow query {statement_id} ({ms:.1f}ms, pool wait {pool_wait * 1000:.1f}ms, "
+            f"{rows} rows, {source}): {text[:300]}"
+        )
+        if explain is not None:
+            threading.Thread(target=self._explain_sample, args=(statement_id, explain),
+                             name="slow-query-explain", daemon=True).start()
+
+    def _explain_sample(self, statement_id: str, sample: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        from .database import DatabaseInterface
+        try:
+            plan = DatabaseInterface.explain(sample["statement"])
+        except Exception as e:
+            logger.error(f"EXPLAIN failed for statement {statement_id}: {e}")
+            raise
+        captured = {"captured_at": datetime.now(timezone.utc).isoformat(),
+                    "param_types": sample["param_types"], "plan": plan}
+        with self._lock:
+            stats = self._statements.get(statement_id)
+            if stats is not None:
+                stats.plan = captured
+        slow_logger.info(f"Plan for slow query {statement_id}: {plan}")
+        return captured
+
+    def explain(self, statement_id: str) -> Optional[Dict[str, Any]]:
+        """EXPLAIN (GENERIC_PLAN) the last slow call of a statement now.
+
+        Returns None for unknown statements; raises ValueError when the
+        statement has no read-only slow sample to explain.
+        """
+        with self._lock:
+            stats = self._statements.get(statement_id)
+            if stats is None:
+                return None
+            sample = stats.sample
+        if sample is None:
+            raise ValueError(f"Statement {statement_id} has no slow read-only call to explain")
+        return self._explain_sample(statement_id, sample)
+
+    def snapshot(self, sort: str = "total_ms", limit: int = 50) -> Dict[str, Any]:
+        with self._lock:
+            statements = [stats.summary() for stats in self._statements.values()]
+            plans = {stats.id: stats.plan for stats in self._statements.values() if stats.plan}
+            slow_log = list(self._slow_log)
+        statements.sort(key=lambda s: s[sort] or 0, reverse=True)
+        return {
+            "since": self.started_at.isoformat(),
+            "window_seconds": DB_STATS_WINDOW,
+            "slow_query_ms": self.slow_ms,
+            "statements_tracked": len(statements),
+            "statements_evicted": self.evicted,
+            "statements": statements[:limit],
+            "slow_queries": slow_log[::-1],
+            "plans": plans,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self._slow_log.clear()
+            self.evicted = 0
+            self.started_at = datetime.now(timezone.utc)
+
+query_stats = QueryStats()
@@ -1,15 +1,33 @@
+from typing import Optional
+import hmac
 import uvicorn
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from postgreSQL.metrics import analytics  # Updated import path
 from postgreSQL.blog import posts  # Import blog posts router
 from postgreSQL.blog import categories  # Import blog categories router
+from postgreSQL.blog import search  # Import blog search router
+from postgreSQL.blog import related  # Import related posts router
 from postgreSQL.admin import users  # Import admin users router
 from postgreSQL.login_user import login
 from postgreSQL.affiliate import userslayout # Import users layout router
 from postgreSQL.admin import referral_settings
 from postgreSQL.admin import finance_settings
 from postgreSQL.admin import global_settings, invoice_settings, system_settings, email_settings
+from postgreSQL.admin import exports
+from postgreSQL.config import DEBUG_ADMIN_TOKEN
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.async_database import AsyncDatabaseInterface
+from postgreSQL.replicas import use_replica
+from postgreSQL.instrumentation import QueryStats, query_stats
+from postgreSQL.tracing import TracingMiddleware, route_summary
+from postgreSQL.timeouts import CancelOnDisconnectMiddleware, apply_statement_timeout, statement_timeouts
+from postgreSQL.metrics.rollups import rollup_scheduler
+from postgreSQL.blog.view_buffer import view_buffer
+from postgreSQL.blog.view_filter import view_filter
+from postgreSQL.blog.category_index import category_index
+from postgreSQL.cache import cache_stats
 
 
 
@@ -45,7 +63,12 @@ import logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="PostgreSQL API", description="API for PostgreSQL operations")
+app = FastAPI(
+    title="PostgreSQL API",
+    description="API for PostgreSQL operations",
+    # Per-route statement timeouts from system_settings; see postgreSQL/timeouts.py
+    dependencies=[Depends(apply_statement_timeout)]
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -54,8 +77,27 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Per-request query counts and Server-Timing headers; see postgreSQL/tracing.py
+app.add_middleware(TracingMiddleware)
+# Cancels a request's in-flight queries when its client disconnects
+app.add_middleware(CancelOnDisconnectMiddleware)
+
+@app.on_event("startup")
+def start_background_jobs():
+    rollup_scheduler.start()
+    view_buffer.start()
+
+@app.on_event("shutdown")
+async def close_database_pools():
+    rollup_scheduler.stop()
+    # Blocking flush of buffered views before the process exits
+    view_buffer.stop()
+    DatabaseInterface.close_pool()
+    await AsyncDatabaseInterface.close_pool()
+
 @app.get("/")
 def root():
     return {"message": "PostgreSQL API is running"}
@@ -65,10 +107,17 @@ def health_check():
     return {"status": "healthy"}
 
 # Include the routers with prefix
-app.include_router(analytics.router, prefix="/analytics", tags=["analytics"])
-app.include_router(analytics.router, prefix="/admin", tags=["admin-support"])
-app.include_router(posts.router, prefix="/blog", tags=["blog"])
-app.include_router(categories.router, prefix="/blog", tags=["blog-categories"])
+# Read-heavy routers may serve the read-only queries of their GET/HEAD
+# requests from a replica (see postgreSQL/replicas.py); other methods, and
+# the background tasks they queue, stay on the primary
+read_replica = [Depends(use_replica)]
+
+app.include_router(analytics.router, prefix="/analytics", tags=["analytics"], dependencies=read_replica)
+app.include_router(analytics.router, prefix="/admin", tags=["admin-support"], dependencies=read_replica)
+app.include_router(posts.router, prefix="/blog", tags=["blog"], dependencies=read_replica)
+app.include_router(categories.router, prefix="/blog", tags=["blog-categories"], dependencies=read_replica)
+app.include_router(search.router, prefix="/blog", tags=["blog-search"], dependencies=read_replica)
+app.include_router(related.router, prefix="/blog", tags=["blog"], dependencies=read_replica)
 logger.info("Blog categories router included successfully")
 app.include_router(users.router, prefix="/admin", tags=["admin"])
 app.include_router(login.router)  # No prefix, so /api/login is available
@@ -79,6 +128,7 @@ app.include_router(global_settings.router, prefix="/admin", tags=["admin-global-
 app.include_router(invoice_settings.router, prefix="/admin", tags=["admin-invoice-settings"])
 app.include_router(system_settings.router, prefix="/admin", tags=["admin-system-settings"])
 app.include_router(email_settings.router, prefix="/admin", tags=["admin-email-settings"])
+app.include_router(exports.router, prefix="/admin", tags=["admin-exports"])
 
 
 # Include referrals router only if it was imported successfully
@@ -97,7 +147,7 @@ else:
 
 # Include dashboard router only if it was imported successfully
 if dashboard_router_available:
-    app.include_router(dashboard.router, prefix="/admin", tags=["admin-dashboard"])
+    app.include_router(dashboard.router, prefix="/admin", tags=["admin-dashboard"], dependencies=read_replica)
     logger.info("Dashboard router included successfully")
 else:
     logger.error("Dashboard router not available - skipping inclusion")
@@ -115,6 +165,86 @@ def debug_routes():
             })
     return {"routes": routes}
 
+@app.get("/debug/db-pool")
+def debug_db_pool():
+    """Debug endpoint to see connection pool usage, waits and exhaustion events"""
+    return {
+        "sync": DatabaseInterface.pool_stats(),
+        "async": AsyncDatabaseInterface.pool_stats(),
+        "replicas": {
+            "sync": DatabaseInterface.replica_stats(),
+            "async": AsyncDatabaseInterface.replica_stats(),
+        },
+    }
+
+@app.get("/debug/cache-stats")
+def debug_cache_stats():
+    """Debug endpoint to see hit/miss counters of the endpoint result caches"""
+    return {**cache_stats(), "blog.category_index": category_index.stats()}
+
+@app.get("/debug/blog-views")
+def debug_blog_views():
+    """Debug endpoint to see pending, flushed and dropped blog views"""
+    return {
+        "filter": view_filter.stats(),
+        "buffer": view_buffer.stats()
+    }
+
+async def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Dependency for debug endpoints that run statements or change state; checks X-Admin-Token against DEBUG_ADMIN_TOKEN"""
+    if not DEBUG_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Disabled; set DEBUG_ADMIN_TOKEN to enable")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), DEBUG_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+@app.get("/debug/db-stats")
+def debug_db_stats(
+    sort: str = Query("total_ms", regex="^(" + "|".join(QueryStats.SORT_KEYS) + ")$"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Debug endpoint to see per-statement latency percentiles, pool waits and slow queries"""
+    return query_stats.snapshot(sort, limit)
+
+@app.post("/debug/db-stats/reset", dependencies=[Depends(require_admin_token)])
+def debug_db_stats_reset():
+    """Debug endpoint to clear the per-statement stats, returning what they held"""
+    snapshot = query_stats.snapshot()
+    query_stats.reset()
+    return snapshot
+
+@app.post("/debug/db-stats/{statement_id}/explain", dependencies=[Depends(require_admin_token)])
+def debug_db_explain(statement_id: str):
+    """Debug endpoint to capture the EXPLAIN (GENERIC_PLAN) of a statement's last slow call"""
+    try:
+        result = query_stats.explain(statement_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error explaining statement {statement_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Statement not found")
+    return result
+
+@app.get("/debug/route-stats")
+def debug_route_stats(format: str = Query("json", regex="^(json|prometheus)$"), reset: bool = False):
+    """Debug endpoint to see queries, database time and N+1 flags per route (scrapeable as Prometheus text)"""
+    if format == "prometheus":
+        result = PlainTextResponse(route_summary.prometheus(), media_type="text/plain; version=0.0.4")
+    else:
+        result = route_summary.snapshot()
+    if reset:
+        route_summary.reset()
+    return result
+
+@app.get("/debug/statement-timeouts")
+def debug_statement_timeouts():
+    """Debug endpoint to see the active statement timeouts and queries cancelled for departed clients"""
+    return {
+        "timeouts": statement_timeouts.stats(),
+        "disconnects": CancelOnDisconnectMiddleware.stats()
+    }
+
 # Test endpoint to verify referrals router is working
 @app.get("/admin/test-referrals")
 def test_referrals():
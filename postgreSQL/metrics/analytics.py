@@ -1,7 +1,9 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from ..database import DatabaseInterface
-from ..helpers import get_month_range
-from fastapi import APIRouter, HTTPException, Body
+from ..helpers import get_month_range, encode_cursor, decode_cursor
+from .rollups import TABLE_METRICS, get_rollup_count_change
+from .timeseries import GRANULARITY_PATTERN, Series, build_timeseries_query, series_points
+from fastapi import APIRouter, HTTPException, Body, Query, Response
 import logging
 from uuid import uuid4
 from datetime import datetime, timezone
@@ -15,6 +17,10 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 def get_count_change(table: str, date_field: str = "created_at") -> Dict[str, Any]:
+    metric = TABLE_METRICS.get((table, date_field))
+    if metric:
+        return get_rollup_count_change(metric)
+
     current_start, current_end = get_month_range(0)
     previous_start, previous_end = get_month_range(1)
 
@@ -113,52 +119,27 @@ def get_admin_activity() -> List[Dict[str, Any]]:
         logger.error(f"Error getting admin activity: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_signups_over_time() -> List[Dict[str, Any]]:
+def get_signups_over_time(granularity: str = "month", periods: int = 12) -> List[Dict[str, Any]]:
     try:
-        query = """
-            WITH RECURSIVE months AS (
-                -- Base case
-                SELECT DATE_TRUNC('month', MAX(created_at)) AS month
-                FROM users
-
-                UNION ALL
-
-                -- Recursive case
-                SELECT DATE_TRUNC('month', month - INTERVAL '1 month')
-                FROM months
-                WHERE month > NOW() - INTERVAL '12 months'
-            ),
-            monthly_counts AS (
-                SELECT DATE_TRUNC('month', created_at) AS month,
-                       COUNT(*) AS count
-                FROM users
-                GROUP BY DATE_TRUNC('month', created_at)
-            )
-            SELECT 
-                TO_CHAR(m.month, 'YYYY-MM-DD') as month,
-                COALESCE(mc.count, 0) as count
-            FROM months m
-            LEFT JOIN monthly_counts mc ON m.month = mc.month
-            ORDER BY m.month ASC;
-        """
+        query, params = build_timeseries_query(
+            "users", "created_at", [Series("count", "COUNT(*)")],
+            granularity=granularity, periods=periods, label_format="YYYY-MM-DD"
+        )
         logger.debug(f"Executing signups over time query: {query}")
-        result = DatabaseInterface.execute_query(query)
+        result = DatabaseInterface.execute_query(query, params)
         logger.debug(f"Signups result: {result}")
-        return result
+        return series_points(result, "count", value_key="count", label_key="month", cast=int)
     except Exception as e:
         logger.error(f"Error getting signups over time: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-def get_revenue_over_time() -> List[Dict[str, Any]]:
-    query = """
-        SELECT DATE_TRUNC('month', created_at) AS month,
-               SUM(commission_amount) AS revenue
-        FROM referrals
-        GROUP BY month
-        ORDER BY month ASC
-        LIMIT 6;
-    """
-    return DatabaseInterface.execute_query(query)
+def get_revenue_over_time(granularity: str = "month", periods: int = 6) -> List[Dict[str, Any]]:
+    query, params = build_timeseries_query(
+        "referrals", "created_at", [Series("revenue", "SUM(commission_amount)")],
+        granularity=granularity, periods=periods
+    )
+    result = DatabaseInterface.execute_query(query, params)
+    return [{"month": row["bucket"], "revenue": row["revenue"]} for row in result]
 
 def get_active_vs_inactive_users() -> Dict[str, int]:
     try:
@@ -186,8 +167,18 @@ def get_promo_usage() -> List[Dict[str, Any]]:
     """
     return DatabaseInterface.execute_query(query)
 
-def get_transactions_table() -> List[Dict[str, Any]]:
-    query = """
+TRANSACTIONS_PAGE_SIZE = 50
+TRANSACTIONS_MAX_PAGE_SIZE = 500
+
+def get_transactions_table(cursor: Optional[str] = None, limit: int = TRANSACTIONS_PAGE_SIZE) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One keyset page of transactions ordered by (created_at, id) descending."""
+    limit = max(1, min(limit, TRANSACTIONS_MAX_PAGE_SIZE))
+    params: List[Any] = []
+    keyset = ""
+    if cursor:
+        keyset = "WHERE (t.created_at, t.id) < (%s, %s)"
+        params.extend(decode_cursor(cursor))
+    query = f"""
         SELECT 
             t.id AS transaction_id,
             u.id AS user_id,
@@ -199,9 +190,16 @@ def get_transactions_table() -> List[Dict[str, Any]]:
             t.created_at
         FROM transactions t
         LEFT JOIN users u ON t.user_id = u.id
-        ORDER BY t.created_at DESC;
+        {keyset}
+        ORDER BY t.created_at DESC, t.id DESC
+        LIMIT %s;
     """
-    return DatabaseInterface.execute_query(query)
+    result = DatabaseInterface.execute_query(query, tuple(params + [limit + 1]))
+    next_cursor = None
+    if len(result) > limit:
+        result = result[:limit]
+        next_cursor = encode_cursor(result[-1]['created_at'], result[-1]['transaction_id'])
+    return result, next_cursor
 
 def get_user_counts_by_role() -> Dict[str, int]:
     try:
@@ -362,12 +360,18 @@ def api_get_recent_activity():
     return get_recent_activity()
 
 @router.get("/signups-over-time")
-def api_get_signups_over_time():
-    return get_signups_over_time()
+def api_get_signups_over_time(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(12, ge=1, le=366)
+):
+    return get_signups_over_time(granularity, periods)
 
 @router.get("/revenue-over-time")
-def api_get_revenue_over_time():
-    return get_revenue_over_time()
+def api_get_revenue_over_time(
+    granularity: str = Query("month", regex=GRANULARITY_PATTERN),
+    periods: int = Query(6, ge=1, le=366)
+):
+    return get_revenue_over_time(granularity, periods)
 
 @router.get("/active-vs-inactive-users")
 def api_get_active_vs_inactive_users():
@@ -378,8 +382,18 @@ def api_get_promo_usage():
     return get_promo_usage()
 
 @router.get("/transactions-table")
-def api_get_transactions_table():
-    return get_transactions_table()
+def api_get_transactions_table(
+    response: Response,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE)
+):
+    try:
+        result, next_cursor = get_transactions_table(cursor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return result
 
 @router.get("/user-role-counts")
 async def api_get_user_role_counts():
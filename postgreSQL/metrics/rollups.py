@@ -0,0 +1,212 @@
+"""Daily rollups of the admin dashboard metrics.
+
+Each metric is a per-day COUNT(*) and SUM() over one source table, stored in
+daily_metrics(metric, day). Readers sum a handful of day rows instead of
+re-scanning the source tables, so their cost depends on the number of days in
+the window rather than the number of rows.
+
+A background thread refreshes the trailing ROLLUP_REFRESH_DAYS days every
+ROLLUP_REFRESH_INTERVAL seconds (catching late status changes such as a
+transaction moving to 'succeeded'), plus any older day queued in
+daily_metrics_dirty by the source tables' triggers when one of its rows was
+inserted, deleted or changed status. Every API worker starts the thread, but
+a cycle runs under a transaction-level advisory lock and is skipped when
+another worker refreshed within the interval, so the work happens once per
+interval across the deployment. The full history is only rebuilt by
+`backfill`.
+
+Usage:
+    python -m postgreSQL.metrics.rollups backfill
+    python -m postgreSQL.metrics.rollups refresh --days 7
+    python -m postgreSQL.metrics.rollups cycle
+"""
+from typing import Dict, Any, List, Optional, NamedTuple
+from datetime import date, timedelta
+import argparse
+import logging
+import threading
+import time
+from postgreSQL.database import DatabaseInterface
+from postgreSQL.helpers import get_month_range
+from postgreSQL.config import ROLLUP_REFRESH_INTERVAL, ROLLUP_REFRESH_DAYS
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_xact_lock key shared by every worker's scheduler
+ROLLUP_LOCK_KEY = 7_350_001
+
+class RollupSource(NamedTuple):
+    table: str
+    date_field: str
+    where: str = "TRUE"
+    sum_expr: str = "0"
+
+ROLLUP_METRICS: Dict[str, RollupSource] = {
+    "users_new": RollupSource("users", "created_at", "deleted_at IS NULL"),
+    "subscriptions_active_new": RollupSource("subscriptions", "created_at", "status = 'active' AND deleted_at IS NULL"),
+    "affiliates_new": RollupSource("affiliates", "created_at"),
+    "referrals_new": RollupSource("referrals", "created_at"),
+    "referrals_converted": RollupSource("referrals", "created_at", "status = 'converted'", "commission_amount"),
+    "transactions_succeeded": RollupSource("transactions", "created_at", "status = 'succeeded'", "amount"),
+    "promo_usages": RollupSource("promo_usages", "used_at"),
+}
+
+# Metrics that count every row of a table, for get_count_change lookups
+TABLE_METRICS = {
+    ("affiliates", "created_at"): "affiliates_new",
+    ("referrals", "created_at"): "referrals_new",
+    ("promo_usages", "used_at"): "promo_usages",
+}
+
+def _refresh_query(source: RollupSource, since: Optional[date]) -> str:
+    # Every day in the window is written, including empty ones, so days whose
+    # rows were deleted or changed status drop back to zero.
+    start = "%(since)s::date" if since else f"COALESCE((SELECT MIN({source.date_field})::date FROM {source.table}), CURRENT_DATE)"
+    return f"""
+        INSERT INTO daily_metrics (metric, day, count, total, updated_at)
+        SELECT %(metric)s, d.day::date, COALESCE(x.count, 0), COALESCE(x.total, 0), NOW()
+        FROM generate_series({start}, CURRENT_DATE, INTERVAL '1 day') AS d(day)
+        LEFT JOIN (
+            SELECT {source.date_field}::date AS day,
+                   COUNT(*) AS count,
+                   COALESCE(SUM({source.sum_expr}), 0) AS total
+            FROM {source.table}
+            WHERE {source.where}
+            AND {source.date_field} >= {start}
+            GROUP BY 1
+        ) x ON x.day = d.day::date
+        ON CONFLICT (metric, day) DO UPDATE SET
+            count = EXCLUDED.count,
+            total = EXCLUDED.total,
+            updated_at = NOW()
+    """
+
+def _refresh_days_query(source: RollupSource) -> str:
+    # One index range scan per day instead of a scan from the oldest day onwards
+    return f"""
+        INSERT INTO daily_metrics (metric, day, count, total, updated_at)
+        SELECT %(metric)s, d.day, x.count, x.total, NOW()
+        FROM unnest(%(days)s::date[]) AS d(day)
+        CROSS JOIN LATERAL (
+            SELECT COUNT(*) AS count, COALESCE(SUM({source.sum_expr}), 0) AS total
+            FROM {source.table}
+            WHERE {source.where}
+            AND {source.date_field} >= d.day AND {source.date_field} < d.day + 1
+        ) x
+        ON CONFLICT (metric, day) DO UPDATE SET
+            count = EXCLUDED.count,
+            total = EXCLUDED.total,
+            updated_at = NOW()
+    """
+
+def refresh_daily_metrics(since: Optional[date] = None) -> None:
+    """Recompute every metric from `since` (or the start of history) to today."""
+    for metric, source in ROLLUP_METRICS.items():
+        try:
+            DatabaseInterface.execute_query(_refresh_query(source, since), {"metric": metric, "since": since})
+        except Exception as e:
+            logger.error(f"Error refreshing rollup {metric}: {e}")
+    logger.info(f"Daily metrics refreshed since {since or 'start of history'}")
+
+def get_rollup_count_change(metric: str) -> Dict[str, Any]:
+    """Current vs previous calendar month for one rolled-up metric."""
+    current_start, current_end = get_month_range(0)
+    previous_start, _ = get_month_range(1)
+    query = """
+        SELECT
+            COALESCE(SUM(count) FILTER (WHERE day >= %(current_start)s), 0) AS current,
+            COALESCE(SUM(count) FILTER (WHERE day < %(current_start)s), 0) AS previous
+        FROM daily_metrics
+        WHERE metric = %(metric)s AND day >= %(previous_start)s AND day < %(current_end)s
+    """
+    result = DatabaseInterface.execute_query(query, {
+        "metric": metric,
+        "current_start": current_start.date(),
+        "current_end": current_end.date(),
+        "previous_start": previous_start.date(),
+    })
+    current = int(result[0]['current']) if result else 0
+    previous = int(result[0]['previous']) if result else 0
+    change = ((current - previous) / previous * 100) if previous else 100.0
+    return {"count": current, "change_pct": round(change, 2)}
+
+def run_refresh_cycle(days: int = ROLLUP_REFRESH_DAYS, min_interval: float = 0) -> bool:
+    """Refresh the trailing `days` and every queued dirty day, once across all workers.
+
+    Returns False without doing anything when another worker holds the lock or
+    finished a cycle less than `min_interval` seconds ago.
+    """
+    since = date.today() - timedelta(days=days)
+    with DatabaseInterface.transaction() as tx:
+        if not tx.execute_query("SELECT pg_try_advisory_xact_lock(%s) AS locked", (ROLLUP_LOCK_KEY,))[0]["locked"]:
+            return False
+        recent = tx.execute_query(
+            "SELECT 1 FROM daily_metrics_refresh WHERE refreshed_at > NOW() - make_interval(secs => %s)",
+            (min_interval,)
+        )
+        if recent:
+            return False
+        # Only the rows read here are cleared; later ones stay for the next cycle
+        dirty = tx.execute_query(
+            "SELECT source_table, ARRAY_AGG(id) AS ids, ARRAY_AGG(DISTINCT day) AS days "
+            "FROM daily_metrics_dirty GROUP BY source_table"
+        )
+        dirty_days: Dict[str, List[date]] = {row["source_table"]: row["days"] for row in dirty}
+        for metric, source in ROLLUP_METRICS.items():
+            tx.execute_query(_refresh_query(source, since), {"metric": metric, "since": since})
+            older = [day for day in dirty_days.get(source.table, []) if day < since]
+            if older:
+                tx.execute_query(_refresh_days_query(source), {"metric": metric, "days": older})
+        if dirty:
+            tx.execute_query("DELETE FROM daily_metrics_dirty WHERE id = ANY(%s)",
+                             ([i for row in dirty for i in row["ids"]],))
+        tx.execute_query("""
+            INSERT INTO daily_metrics_refresh (id, refreshed_at) VALUES (TRUE, NOW())
+            ON CONFLICT (id) DO UPDATE SET refreshed_at = EXCLUDED.refreshed_at
+        """)
+    logger.info(f"Daily metrics refreshed since {since}, plus {sum(len(d) for d in dirty_days.values())} dirty day(s)")
+    return True
+
+class RollupScheduler:
+    """Daemon thread that keeps daily_metrics current; see run_refresh_cycle."""
+
+    def __init__(self, interval: float = ROLLUP_REFRESH_INTERVAL, days: int = ROLLUP_REFRESH_DAYS):
+        self.interval = interval
+        self.days = days
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="rollup-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # A little slack so workers started together don't both qualify
+                run_refresh_cycle(self.days, min_interval=self.interval * 0.9)
+            except Exception as e:
+                logger.error(f"Error refreshing daily metrics: {e}")
+            self._stop.wait(self.interval)
+
+rollup_scheduler = RollupScheduler()
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Maintain the daily_metrics rollup table")
+    parser.add_argument("command", choices=["backfill", "refresh", "cycle"])
+    parser.add_argument("--days", type=int, default=ROLLUP_REFRESH_DAYS, help="trailing days to refresh")
+    args = parser.parse_args()
+    if args.command == "backfill":
+        refresh_daily_metrics()
+    elif args.command == "cycle":
+        run_refresh_cycle(args.days)
+    else:
+        refresh_daily_metrics(date.today() - timedelta(days=args.days))
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,86 @@
+"""Time-bucketed series for the "over time" chart endpoints.
+
+Buckets are generated in the database with generate_series, so empty days,
+weeks or months come back as zero rows instead of being patched in Python, and
+several series over the same table are computed from a single scan.
+
+    query, params = build_timeseries_query(
+        "referrals", "created_at",
+        [Series("referrals", "COUNT(*)"),
+         Series("commissions", "SUM(commission_amount)", "status = 'converted'")],
+        granularity="month", periods=12,
+    )
+"""
+from typing import List, Dict, Any, Optional, NamedTuple, Tuple
+
+GRANULARITIES = ("day", "week", "month")
+GRANULARITY_PATTERN = "^(day|week|month)$"
+
+LABEL_FORMATS = {
+    "day": "YYYY-MM-DD",
+    "week": "YYYY-MM-DD",
+    "month": "Mon YYYY",
+}
+
+class Series(NamedTuple):
+    name: str
+    aggregate: str
+    filter: Optional[str] = None
+
+def build_timeseries_query(table: str, date_field: str, series: List[Series], granularity: str = "month",
+                           periods: int = 12, where: Optional[str] = None,
+                           label_format: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    """Build one query returning `periods` buckets ending with the current one.
+
+    Each row has `bucket` (start of the bucket), `label` and one column per
+    series, zero-filled for buckets without data.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unsupported granularity: {granularity}")
+    if periods < 1:
+        raise ValueError("periods must be at least 1")
+
+    aggregates = ",\n                ".join(
+        f"{s.aggregate} FILTER (WHERE {s.filter}) AS {s.name}" if s.filter else f"{s.aggregate} AS {s.name}"
+        for s in series
+    )
+    columns = ",\n            ".join(f"COALESCE(d.{s.name}, 0) AS {s.name}" for s in series)
+    extra_where = f"AND {where}" if where else ""
+
+    query = f"""
+        WITH buckets AS (
+            SELECT generate_series(
+                date_trunc(%(granularity)s, CURRENT_DATE) - %(span)s::interval,
+                date_trunc(%(granularity)s, CURRENT_DATE),
+                %(step)s::interval
+            ) AS bucket
+        ),
+        data AS (
+            SELECT
+                date_trunc(%(granularity)s, {date_field}) AS bucket,
+                {aggregates}
+            FROM {table}
+            WHERE {date_field} >= date_trunc(%(granularity)s, CURRENT_DATE) - %(span)s::interval
+            {extra_where}
+            GROUP BY 1
+        )
+        SELECT
+            b.bucket,
+            TO_CHAR(b.bucket, %(label_format)s) AS label,
+            {columns}
+        FROM buckets b
+        LEFT JOIN data d ON d.bucket = b.bucket
+        ORDER BY b.bucket
+    """
+    params = {
+        "granularity": granularity,
+        "span": f"{periods - 1} {granularity}s",
+        "step": f"1 {granularity}",
+        "label_format": label_format or LABEL_FORMATS[granularity],
+    }
+    return query, params
+
+def series_points(rows: List[Dict[str, Any]], series_name: str, value_key: str = "value",
+                  label_key: str = "name", cast=float) -> List[Dict[str, Any]]:
+    """Shape rows into the [{label_key: label, value_key: value}] lists the charts consume."""
+    return [{label_key: row["label"], value_key: cast(row[series_name])} for row in rows]
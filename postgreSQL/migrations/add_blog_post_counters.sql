@@ -0,0 +1,60 @@
+-- Denormalised view and comment counters on blog_posts, so blog reads no
+-- longer aggregate the whole blog_views / blog_comments history.
+-- Kept current by statement-level triggers; check or repair drift with
+--   python -m postgreSQL.blog.counters reconcile
+ALTER TABLE blog_posts
+    ADD COLUMN IF NOT EXISTS view_count BIGINT NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0;
+
+CREATE INDEX IF NOT EXISTS idx_blog_views_post_id ON blog_views (post_id);
+CREATE INDEX IF NOT EXISTS idx_blog_comments_post_id ON blog_comments (post_id);
+
+-- One UPDATE per statement: a batched insert of N views touches each post once
+CREATE OR REPLACE FUNCTION blog_views_maintain_count() RETURNS trigger AS $$
+BEGIN
+    UPDATE blog_posts p
+    SET view_count = p.view_count + CASE WHEN TG_OP = 'INSERT' THEN d.n ELSE -d.n END
+    FROM (SELECT post_id, COUNT(*) AS n FROM changed_rows GROUP BY post_id) d
+    WHERE p.id = d.post_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION blog_comments_maintain_count() RETURNS trigger AS $$
+BEGIN
+    UPDATE blog_posts p
+    SET comment_count = p.comment_count + CASE WHEN TG_OP = 'INSERT' THEN d.n ELSE -d.n END
+    FROM (SELECT post_id, COUNT(*) AS n FROM changed_rows GROUP BY post_id) d
+    WHERE p.id = d.post_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blog_views_count_insert ON blog_views;
+CREATE TRIGGER blog_views_count_insert
+    AFTER INSERT ON blog_views
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION blog_views_maintain_count();
+
+DROP TRIGGER IF EXISTS blog_views_count_delete ON blog_views;
+CREATE TRIGGER blog_views_count_delete
+    AFTER DELETE ON blog_views
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION blog_views_maintain_count();
+
+DROP TRIGGER IF EXISTS blog_comments_count_insert ON blog_comments;
+CREATE TRIGGER blog_comments_count_insert
+    AFTER INSERT ON blog_comments
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION blog_comments_maintain_count();
+
+DROP TRIGGER IF EXISTS blog_comments_count_delete ON blog_comments;
+CREATE TRIGGER blog_comments_count_delete
+    AFTER DELETE ON blog_comments
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION blog_comments_maintain_count();
+
+-- Backfill
+UPDATE blog_posts p
+SET view_count = (SELECT COUNT(*) FROM blog_views v WHERE v.post_id = p.id),
+    comment_count = (SELECT COUNT(*) FROM blog_comments c WHERE c.post_id = p.id);
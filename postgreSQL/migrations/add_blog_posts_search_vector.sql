@@ -0,0 +1,48 @@
+-- Full-text search over published blog posts for /blog/search.
+-- The tsvector lives in a side table rather than a generated column on
+-- blog_posts: the view and comment counter triggers update blog_posts rows on
+-- every flush, and a stored generated column would re-run to_tsvector over
+-- the whole post and rewrite it each time. The trigger below only fires when
+-- the indexed text changes.
+ALTER TABLE blog_posts DROP COLUMN IF EXISTS search_vector;
+
+CREATE TABLE IF NOT EXISTS blog_post_search (
+    post_id UUID PRIMARY KEY REFERENCES blog_posts(id) ON DELETE CASCADE,
+    search_vector tsvector NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_blog_post_search_vector
+    ON blog_post_search USING GIN (search_vector);
+
+CREATE OR REPLACE FUNCTION blog_posts_maintain_search() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO blog_post_search (post_id, search_vector)
+    VALUES (
+        NEW.id,
+        setweight(to_tsvector('english', COALESCE(NEW.title, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(NEW.excerpt, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(NEW.content, '')), 'C')
+    )
+    ON CONFLICT (post_id) DO UPDATE SET search_vector = EXCLUDED.search_vector;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS blog_posts_search_insert ON blog_posts;
+CREATE TRIGGER blog_posts_search_insert
+    AFTER INSERT ON blog_posts
+    FOR EACH ROW EXECUTE FUNCTION blog_posts_maintain_search();
+
+DROP TRIGGER IF EXISTS blog_posts_search_update ON blog_posts;
+CREATE TRIGGER blog_posts_search_update
+    AFTER UPDATE OF title, excerpt, content ON blog_posts
+    FOR EACH ROW EXECUTE FUNCTION blog_posts_maintain_search();
+
+-- Backfill
+INSERT INTO blog_post_search (post_id, search_vector)
+SELECT id,
+       setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+       setweight(to_tsvector('english', COALESCE(excerpt, '')), 'B') ||
+       setweight(to_tsvector('english', COALESCE(content, '')), 'C')
+FROM blog_posts
+ON CONFLICT (post_id) DO UPDATE SET search_vector = EXCLUDED.search_vector;
@@ -0,0 +1,95 @@
+-- Days of daily_metrics invalidated by writes to older source rows.
+-- The rollup scheduler refreshes the trailing ROLLUP_REFRESH_DAYS every cycle;
+-- a row from before today that is inserted, deleted or changes status (a
+-- subscription cancelled, a referral converted, a user soft-deleted) queues
+-- its day here so the next cycle recomputes just that day.
+-- Append-only, so marking a day never waits on the scheduler clearing it.
+CREATE TABLE IF NOT EXISTS daily_metrics_dirty (
+    id BIGSERIAL PRIMARY KEY,
+    source_table VARCHAR(64) NOT NULL,
+    day DATE NOT NULL
+);
+
+-- When the last refresh cycle ran, so several API workers don't repeat it
+CREATE TABLE IF NOT EXISTS daily_metrics_refresh (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    refreshed_at TIMESTAMP WITH TIME ZONE NOT NULL
+);
+
+-- TG_ARGV[0] is the column the metrics bucket by, the other arguments the
+-- columns they filter or sum on. An UPDATE queues only the days of rows where
+-- one of those changed (EXCEPT ALL keeps duplicate rows apart), so profile or
+-- role edits queue nothing. Today's rows are skipped: the trailing refresh
+-- always covers them
+CREATE OR REPLACE FUNCTION daily_metrics_mark_dirty() RETURNS trigger AS $$
+DECLARE
+    tracked TEXT;
+BEGIN
+    tracked := quote_ident(TG_ARGV[0]);
+    FOR i IN 1 .. TG_NARGS - 1 LOOP
+        tracked := tracked || ', ' || quote_ident(TG_ARGV[i]);
+    END LOOP;
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'INSERT INTO daily_metrics_dirty (source_table, day)
+             SELECT DISTINCT %L, %I::date FROM new_rows WHERE %I < CURRENT_DATE',
+            TG_TABLE_NAME, TG_ARGV[0], TG_ARGV[0]);
+    ELSIF TG_OP = 'UPDATE' THEN
+        EXECUTE format(
+            'INSERT INTO daily_metrics_dirty (source_table, day)
+             SELECT DISTINCT %L, day FROM (
+                 SELECT %I::date AS day FROM (SELECT %s FROM old_rows EXCEPT ALL SELECT %s FROM new_rows) o
+                 UNION
+                 SELECT %I::date FROM (SELECT %s FROM new_rows EXCEPT ALL SELECT %s FROM old_rows) n
+             ) d WHERE day < CURRENT_DATE',
+            TG_TABLE_NAME, TG_ARGV[0], tracked, tracked, TG_ARGV[0], tracked, tracked);
+    ELSE
+        EXECUTE format(
+            'INSERT INTO daily_metrics_dirty (source_table, day)
+             SELECT DISTINCT %L, %I::date FROM old_rows WHERE %I < CURRENT_DATE',
+            TG_TABLE_NAME, TG_ARGV[0], TG_ARGV[0]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables allow one event per trigger, hence three per table, and
+-- rule out UPDATE OF column lists, hence the filtering in the function.
+-- The columns follow ROLLUPS in postgreSQL/metrics/rollups.py
+DO $$
+DECLARE
+    source RECORD;
+    args TEXT;
+BEGIN
+    FOR source IN
+        SELECT * FROM (VALUES
+            ('users', 'created_at', ARRAY['deleted_at']),
+            ('subscriptions', 'created_at', ARRAY['status', 'deleted_at']),
+            ('affiliates', 'created_at', ARRAY[]::TEXT[]),
+            ('referrals', 'created_at', ARRAY['status', 'commission_amount']),
+            ('transactions', 'created_at', ARRAY['status', 'amount']),
+            ('promo_usages', 'used_at', ARRAY[]::TEXT[])
+        ) AS s(tbl, col, cols)
+    LOOP
+        SELECT string_agg(quote_literal(c), ', ') INTO args FROM unnest(source.col || source.cols) AS c;
+        EXECUTE format('DROP TRIGGER IF EXISTS daily_metrics_dirty_insert ON %I', source.tbl);
+        EXECUTE format(
+            'CREATE TRIGGER daily_metrics_dirty_insert AFTER INSERT ON %I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION daily_metrics_mark_dirty(%s)',
+            source.tbl, args);
+        EXECUTE format('DROP TRIGGER IF EXISTS daily_metrics_dirty_update ON %I', source.tbl);
+        EXECUTE format(
+            'CREATE TRIGGER daily_metrics_dirty_update AFTER UPDATE ON %I
+             REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION daily_metrics_mark_dirty(%s)',
+            source.tbl, args);
+        EXECUTE format('DROP TRIGGER IF EXISTS daily_metrics_dirty_delete ON %I', source.tbl);
+        EXECUTE format(
+            'CREATE TRIGGER daily_metrics_dirty_delete AFTER DELETE ON %I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION daily_metrics_mark_dirty(%s)',
+            source.tbl, args);
+    END LOOP;
+END;
+$$;
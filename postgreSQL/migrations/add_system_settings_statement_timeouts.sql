@@ -0,0 +1,12 @@
+-- Statement timeouts applied per request by postgreSQL/timeouts.py with
+-- SET LOCAL statement_timeout. statement_timeout_ms is the default for every
+-- route (NULL: no limit); route_statement_timeouts maps
+-- "METHOD /path/{template}" or "/path/{template}" to milliseconds.
+ALTER TABLE system_settings
+    ADD COLUMN IF NOT EXISTS statement_timeout_ms INTEGER CHECK (statement_timeout_ms > 0),
+    ADD COLUMN IF NOT EXISTS route_statement_timeouts JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+-- Limits for the routes known to run long on bad filters or a cold cache
+UPDATE system_settings
+SET route_statement_timeouts = '{"GET /admin/users": 5000, "GET /admin/top-affiliates": 10000}'::jsonb
+WHERE route_statement_timeouts = '{}'::jsonb;
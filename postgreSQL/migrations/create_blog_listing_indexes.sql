@@ -0,0 +1,7 @@
+-- Supports the paginated /blog/posts listing and its category filter
+CREATE INDEX IF NOT EXISTS idx_blog_posts_published_order
+    ON blog_posts (published_at DESC NULLS LAST, created_at DESC, id DESC)
+    WHERE published = TRUE;
+
+CREATE INDEX IF NOT EXISTS idx_blog_post_categories_category_id
+    ON blog_post_categories (category_id, post_id);
@@ -0,0 +1,14 @@
+-- Precomputed related posts, maintained by postgreSQL/blog/related.py; build with
+--   python -m postgreSQL.blog.related rebuild
+CREATE TABLE IF NOT EXISTS blog_related_posts (
+    post_id UUID NOT NULL,
+    rank SMALLINT NOT NULL,
+    related_post_id UUID NOT NULL,
+    score REAL NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (post_id, rank)
+);
+
+-- Finds the lists that mention a post when it changes
+CREATE INDEX IF NOT EXISTS idx_blog_related_posts_related
+    ON blog_related_posts (related_post_id);
@@ -0,0 +1,11 @@
+-- Per-day counters and sums for the admin dashboards.
+-- Maintained by postgreSQL/metrics/rollups.py; backfill with
+--   python -m postgreSQL.metrics.rollups backfill
+CREATE TABLE IF NOT EXISTS daily_metrics (
+    metric VARCHAR(64) NOT NULL,
+    day DATE NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    total NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (metric, day)
+);
@@ -0,0 +1,3 @@
+-- Supports keyset pagination of /admin/transactions and /analytics/transactions-table
+CREATE INDEX IF NOT EXISTS idx_transactions_created_at_id
+    ON transactions (created_at DESC, id DESC);
@@ -0,0 +1,202 @@
+"""Server-side prepared statements for DatabaseInterface.execute_query.
+
+Pooled psycopg2 connections are PreparingConnection instances. Each one counts
+how often it runs every SQL string; once a string has run DB_PREPARE_THRESHOLD
+times on that connection it is sent once as PREPARE, with its %s / %(name)s
+placeholders rewritten to $n, and from then on runs as EXECUTE with the
+arguments. Postgres then skips parsing and analysis, and can reuse a generic
+plan, for the hot lookups (login, post by slug, settings rows).
+
+Prepared names are kept in a per-connection LRU of DB_PREPARED_MAX entries;
+evicted ones are DEALLOCATEd. Only single SELECT/INSERT/UPDATE/DELETE/WITH
+statements whose arguments are all scalars are prepared: list arguments would
+be sent as text[] literals, which EXECUTE cannot coerce to e.g. uuid[]. A
+statement Postgres cannot prepare because a $n parameter's type can't be
+resolved is remembered and always runs unprepared on that connection. Any
+other PREPARE error (a cancel after a client disconnect, a statement timeout)
+is raised, as the statement itself would have raised it.
+
+The cache lives on the connection object, so a reconnect starts empty. When
+the server lost the statements anyway (DISCARD ALL, a pooler handing out
+another backend) or a schema change altered a prepared result type,
+execute() raises StatementCacheReset after clearing the affected entries and
+the caller retries the statement in a fresh transaction.
+
+Transactions keep using plain execution: a failed EXECUTE aborts the
+transaction, and a multi-statement block cannot be replayed transparently.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+from datetime import date, datetime, time
+from decimal import Decimal
+import logging
+import re
+import uuid
+import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
+from .config import DB_PREPARE_THRESHOLD, DB_PREPARED_MAX
+
+logger = logging.getLogger(__name__)
+
+_LEADING_COMMENTS = re.compile(r"^(\s*(--[^\n]*\n|/\*.*?\*/))*\s*", re.DOTALL)
+_PREPARABLE = re.compile(r"^(SELECT|INSERT|UPDATE|DELETE|WITH|VALUES)\b", re.IGNORECASE)
+_PLACEHOLDER = re.compile(r"%(?:\((\w+)\))?(.)", re.DOTALL)
+_SCALARS = (str, int, float, Decimal, date, datetime, time, uuid.UUID, type(None))
+# An untyped $n can fail to resolve where psycopg2's literal worked (e.g. a
+# datetime sent as '...'::timestamp); only these mean "don't prepare this one"
+_CANNOT_PREPARE = (psycopg2.errors.IndeterminateDatatype, psycopg2.errors.AmbiguousParameter,
+                   psycopg2.errors.AmbiguousFunction, psycopg2.errors.UndefinedFunction)
+
+class StatementCacheReset(Exception):
+    """The server no longer matches the connection's cache; retry in a new transaction."""
+
+def to_numbered(query: str, params: Any) -> Optional[Tuple[str, List[Any]]]:
+    """Rewrite psycopg2 placeholders to $1..$n; None if the statement can't be prepared.
+
+    Returns the statement text and the arguments in $n order.
+    """
+    statement = _LEADING_COMMENTS.sub("", query, count=1).rstrip().rstrip(";")
+    if not _PREPARABLE.match(statement) or ";" in statement or "$" in statement:
+        return None
+    if params is None:
+        # psycopg2 leaves the text alone when there are no arguments
+        return statement, []
+    named = isinstance(params, dict)
+    values: List[Any] = []
+    numbers: Dict[str, int] = {}
+    parts: List[str] = []
+    position = 0
+    pos = 0
+    for match in _PLACEHOLDER.finditer(statement):
+        name, kind = match.group(1), match.group(2)
+        parts.append(statement[pos:match.start()])
+        pos = match.end()
+        if kind == "%" and name is None:
+            parts.append("%")
+            continue
+        if kind != "s" or named != (name is not None):
+            return None
+        if named:
+            if name not in params:
+                return None
+            if name not in numbers:
+                values.append(params[name])
+                numbers[name] = len(values)
+            parts.append(f"${numbers[name]}")
+        else:
+            if position >= len(params):
+                return None
+            values.append(params[position])
+            position += 1
+            parts.append(f"${position}")
+    parts.append(statement[pos:])
+    if not named and position != len(params):
+        return None
+    if not all(isinstance(value, _SCALARS) for value in values):
+        return None
+    return "".join(parts), values
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection with a per-connection LRU of prepared statements."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepare_threshold = DB_PREPARE_THRESHOLD
+        self.prepared_max = DB_PREPARED_MAX
+        self._prepared: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._uses: "OrderedDict[str, int]" = OrderedDict()
+        self._unpreparable: "OrderedDict[str, None]" = OrderedDict()
+        self._next_name = 0
+        self.prepares = 0
+        self.executes = 0
+
+    def _count_use(self, query: str) -> int:
+        uses = self._uses.pop(query, 0) + 1
+        self._uses[query] = uses
+        # Track a few times more candidates than prepared slots
+        while len(self._uses) > self.prepared_max * 4:
+            self._uses.popitem(last=False)
+        return uses
+
+    def _skip(self, query: str) -> None:
+        self._uses.pop(query, None)
+        self._unpreparable[query] = None
+        # Bounded too: dynamically built SQL would otherwise grow it forever
+        while len(self._unpreparable) > self.prepared_max * 4:
+            self._unpreparable.popitem(last=False)
+
+    def _prepare(self, cur, query: str, statement: str, arg_count: int) -> Optional[str]:
+        self._next_name += 1
+        name = f"ps_{self._next_name}"
+        try:
+            # One round trip; the savepoint keeps a refused PREPARE from aborting the transaction
+            cur.execute(f"SAVEPOINT prepare_stmt; PREPARE {name} AS {statement}; RELEASE SAVEPOINT prepare_stmt")
+        except _CANNOT_PREPARE as e:
+            cur.execute("ROLLBACK TO SAVEPOINT prepare_stmt")
+            self._skip(query)
+            logger.debug(f"Not preparing statement ({e}): {query[:100]}...")
+            return None
+        self._prepared[query] = (name, arg_count)
+        self.prepares += 1
+        while len(self._prepared) > self.prepared_max:
+            _, (evicted, _) = self._prepared.popitem(last=False)
+            cur.execute(f"DEALLOCATE {evicted}")
+        return name
+
+    def execute(self, cur, query: str, params: Any = None) -> None:
+        """Run `query` on `cur`, as a prepared statement once it is hot on this connection."""
+        if self.prepare_threshold <= 0 or query in self._unpreparable:
+            cur.execute(query, params)
+            return
+        entry = self._prepared.get(query)
+        if entry is None and self._count_use(query) < self.prepare_threshold:
+            cur.execute(query, params)
+            return
+        converted = to_numbered(query, params)
+        if converted is None:
+            self._skip(query)
+            cur.execute(query, params)
+            return
+        statement, values = converted
+        if entry is None:
+            name = self._prepare(cur, query, statement, len(values))
+            if name is None:
+                cur.execute(query, params)
+                return
+        else:
+            name = entry[0]
+            self._prepared.move_to_end(query)
+        placeholders = ", ".join(["%s"] * len(values))
+        try:
+            cur.execute(f"EXECUTE {name} ({placeholders})" if values else f"EXECUTE {name}", values or None)
+        except psycopg2.errors.InvalidSqlStatementName as e:
+            # Statements are gone from the session (DISCARD ALL, pooler switched backends)
+            logger.warning(f"Prepared statements lost on connection, clearing its cache: {e}")
+            self.reset_prepared()
+            raise StatementCacheReset(str(e)) from e
+        except psycopg2.errors.FeatureNotSupported as e:
+            if "cached plan must not change result type" not in str(e):
+                raise
+            # A schema change altered the result; re-prepare under a new name.
+            # The old one stays allocated until the connection closes
+            self._prepared.pop(query, None)
+            self._uses.pop(query, None)
+            raise StatementCacheReset(str(e)) from e
+        self.executes += 1
+
+    def prepared_name(self, query: str) -> Optional[str]:
+        entry = self._prepared.get(query)
+        return entry[0] if entry else None
+
+    def reset_prepared(self) -> None:
+        self._prepared.clear()
+        self._uses.clear()
+        self._unpreparable.clear()
+
+def execute(cur, query: str, params: Any = None) -> None:
+    """cur.execute, going through the connection's prepared statements when it keeps them."""
+    if isinstance(cur.connection, PreparingConnection):
+        cur.connection.execute(cur, query, params)
+    else:
+        cur.execute(query, params)
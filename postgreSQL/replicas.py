@@ -0,0 +1,293 @@
+"""Read-replica routing for DatabaseInterface and AsyncDatabaseInterface.
+
+Replicas are listed as DSNs in DB_CONFIG["replicas"]; each gets its own pool,
+created on first use. A query goes to a replica only when all of these hold:
+
+* the request opted in: routers mounted with `dependencies=[Depends(use_replica)]`
+  set the routing target for everything they run, and `read_from(...)` or the
+  `target=` argument of execute_query override it per block or per call;
+* the statement is read-only (a SELECT or WITH without INSERT/UPDATE/DELETE or
+  row locks); writes and transaction() blocks always use the primary, and
+  after one the rest of the request stays there so it reads its own writes;
+* some replica is reachable and no more than REPLICA_MAX_LAG seconds behind.
+
+Otherwise the query runs on the primary. Replica lag is sampled at most every
+REPLICA_LAG_CHECK_INTERVAL seconds per replica, and a replica that fails a
+connection is skipped for REPLICA_RETRY_AFTER seconds. A replica whose WAL
+receiver is not running, is not streaming, or has heard nothing from the
+primary for REPLICA_RECEIVER_TIMEOUT seconds counts as detached: it has
+replayed all it received, so its lag would read as zero however stale it is.
+Seeing the receiver's status needs pg_read_all_stats (or pg_monitor); without
+it only the receiver process is checked.
+
+Only GET and HEAD requests opt in through use_replica, so write requests and
+their background tasks read from the primary.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import re
+import threading
+import time
+from psycopg2.extensions import parse_dsn
+from fastapi import Request
+from .config import (DB_CONFIG, DB_POOL_TIMEOUT, REPLICA_MAX_LAG, REPLICA_LAG_CHECK_INTERVAL,
+                     REPLICA_RETRY_AFTER, REPLICA_POOL_MAX, REPLICA_RECEIVER_TIMEOUT)
+from .connection_pool import BoundedConnectionPool
+from .prepared import PreparingConnection
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = "primary"
+REPLICA = "replica"
+
+_target: ContextVar[str] = ContextVar("db_target", default=PRIMARY)
+
+_LEADING_COMMENTS = re.compile(r"^(\s*(--[^\n]*\n|/\*.*?\*/))*\s*", re.DOTALL)
+_READ_START = re.compile(r"^(SELECT|WITH)\b", re.IGNORECASE)
+_WRITES = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|NEXTVAL|SETVAL|FOR\s+(NO\s+KEY\s+)?UPDATE|FOR\s+(KEY\s+)?SHARE)\b",
+    re.IGNORECASE,
+)
+
+# Lag is zero when the replica has replayed everything it received, so an
+# idle primary doesn't read as growing lag; the receiver columns tell whether
+# it is still receiving anything at all. Unprivileged roles see only the pid.
+LAG_QUERY = """
+    SELECT
+        CASE
+            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+            ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+        END AS lag,
+        r.pid IS NOT NULL AS receiver_running,
+        r.status AS receiver_status,
+        EXTRACT(EPOCH FROM NOW() - r.last_msg_receipt_time) AS receiver_silence
+    FROM (SELECT 1) AS one
+    LEFT JOIN pg_stat_wal_receiver r ON TRUE
+"""
+
+def lag_from_row(row: Tuple[Any, ...]) -> Tuple[Optional[float], Optional[str]]:
+    """(lag, None) from a LAG_QUERY row, or (None, reason) when the replica is detached."""
+    lag, running, status, silence = row
+    if not running:
+        return None, "WAL receiver not running"
+    if status is not None and status != "streaming":
+        return None, f"WAL receiver {status}"
+    if silence is not None and float(silence) > REPLICA_RECEIVER_TIMEOUT:
+        return None, f"nothing received from the primary for {float(silence):.0f}s"
+    return float(lag), None
+
+def primary_config() -> Dict[str, Any]:
+    return {k: v for k, v in DB_CONFIG.items() if k != "replicas"}
+
+def replica_config(dsn: str) -> Dict[str, Any]:
+    """Connection kwargs for a replica; keys the DSN leaves out come from the primary."""
+    return {**primary_config(), **parse_dsn(dsn)}
+
+def is_read_only(query: str) -> bool:
+    statement = _LEADING_COMMENTS.sub("", query, count=1)
+    return bool(_READ_START.match(statement)) and not _WRITES.search(statement)
+
+def current_target() -> str:
+    return _target.get()
+
+async def use_replica(request: Request) -> None:
+    """Router dependency that sends a GET/HEAD request's read-only queries to replicas.
+
+    Must stay `async def`: FastAPI runs it in the request's own context, which
+    sync endpoints then inherit when they are moved to the threadpool. That
+    also means pin_primary() inside a sync endpoint can't reach the context
+    its background tasks run in, so write methods never opt in.
+    """
+    if request.method in ("GET", "HEAD"):
+        _target.set(REPLICA)
+
+@contextmanager
+def read_from(target: str) -> Iterator[None]:
+    """Override the routing target for a block, e.g. read_from(PRIMARY) right after a write."""
+    token = _target.set(target)
+    try:
+        yield
+    finally:
+        _target.reset(token)
+
+def pin_primary() -> None:
+    """Send the rest of the request to the primary so it reads its own writes."""
+    if _target.get() != PRIMARY:
+        _target.set(PRIMARY)
+
+def wants_replica(query: str, target: Optional[str] = None) -> bool:
+    return bool(DB_CONFIG.get("replicas")) and (target or _target.get()) == REPLICA and is_read_only(query)
+
+class Replica:
+    def __init__(self, dsn: str):
+        self.dsn = dsn
+        config = replica_config(dsn)
+        self.name = f"{config.get('host')}:{config.get('port', 5432)}"
+        self.config = config
+        self.pool: Any = None
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.down_until = 0.0
+        self.reads = 0
+        self.errors = 0
+        self.pool_timeouts = 0
+        self.detached: Optional[str] = None
+        self.lock = threading.RLock()
+
+    def lag_check_due(self) -> bool:
+        return time.monotonic() - self.checked_at >= REPLICA_LAG_CHECK_INTERVAL
+
+    def record_lag(self, row: Tuple[Any, ...]) -> None:
+        lag, detached = lag_from_row(row)
+        if detached and detached != self.detached:
+            logger.warning(f"Replica {self.name} is detached from the primary ({detached}), using the primary")
+        self.lag = lag
+        self.detached = detached
+        self.checked_at = time.monotonic()
+
+    def mark_down(self, error: Exception) -> None:
+        self.errors += 1
+        self.lag = None
+        self.checked_at = time.monotonic()
+        self.down_until = time.monotonic() + REPLICA_RETRY_AFTER
+        logger.warning(f"Replica {self.name} unavailable, using the primary for {REPLICA_RETRY_AFTER}s: {error}")
+
+    def usable(self) -> bool:
+        return time.monotonic() >= self.down_until and self.lag is not None and self.lag <= REPLICA_MAX_LAG
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "lag_seconds": self.lag,
+            "detached": self.detached,
+            "usable": self.usable(),
+            "reads": self.reads,
+            "errors": self.errors,
+            "pool_timeouts": self.pool_timeouts,
+            "pool": {} if self.pool is None else
+                    self.pool.stats() if hasattr(self.pool, "stats") else self.pool.get_stats(),
+        }
+
+class _ReplicaSet:
+    def __init__(self, dsns: List[str]):
+        self.replicas = [Replica(dsn) for dsn in dsns]
+        self._next = 0
+        self._lock = threading.Lock()
+        self.fallbacks = 0
+
+    def _rotation(self) -> List[Replica]:
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.replicas), 1)
+        return self.replicas[start:] + self.replicas[:start]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": REPLICA_MAX_LAG,
+            "fallbacks_to_primary": self.fallbacks,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
+
+class ReplicaPools(_ReplicaSet):
+    """psycopg2 pools for DatabaseInterface."""
+
+    def _pool(self, replica: Replica) -> BoundedConnectionPool:
+        if replica.pool is None:
+            with replica.lock:
+                if replica.pool is None:
+                    replica.pool = BoundedConnectionPool(
+                        minconn=1, maxconn=REPLICA_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                        connection_factory=PreparingConnection, **replica.config
+                    )
+        return replica.pool
+
+    def _refresh_lag(self, replica: Replica) -> None:
+        # One thread samples while the others keep using the last reading
+        if not replica.lag_check_due() or not replica.lock.acquire(blocking=False):
+            return
+        try:
+            pool_instance = self._pool(replica)
+            conn = pool_instance.getconn()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(LAG_QUERY)
+                    replica.record_lag(cur.fetchone())
+                conn.rollback()
+            finally:
+                pool_instance.putconn(conn)
+        except Exception as e:
+            replica.mark_down(e)
+        finally:
+            replica.lock.release()
+
+    def pick(self) -> Optional[Tuple[Replica, BoundedConnectionPool]]:
+        for replica in self._rotation():
+            if time.monotonic() < replica.down_until:
+                continue
+            self._refresh_lag(replica)
+            if replica.usable():
+                replica.reads += 1
+                return replica, self._pool(replica)
+        self.fallbacks += 1
+        return None
+
+    def closeall(self) -> None:
+        for replica in self.replicas:
+            if replica.pool is not None:
+                replica.pool.closeall()
+                replica.pool = None
+
+class AsyncReplicaPools(_ReplicaSet):
+    """psycopg 3 async pools for AsyncDatabaseInterface."""
+
+    def __init__(self, dsns: List[str], configure: Callable[[Any], Awaitable[None]]):
+        super().__init__(dsns)
+        self.configure = configure
+        self._checking = set()
+
+    async def _pool(self, replica: Replica):
+        if replica.pool is None:
+            from psycopg_pool import AsyncConnectionPool
+            pool_instance = AsyncConnectionPool(
+                conninfo="", kwargs=replica.config, min_size=1, max_size=REPLICA_POOL_MAX,
+                timeout=DB_POOL_TIMEOUT, configure=self.configure, open=False
+            )
+            await pool_instance.open()
+            if replica.pool is None:
+                replica.pool = pool_instance
+            else:
+                await pool_instance.close()
+        return replica.pool
+
+    async def _refresh_lag(self, replica: Replica) -> None:
+        if not replica.lag_check_due() or replica.name in self._checking:
+            return
+        self._checking.add(replica.name)
+        try:
+            pool_instance = await self._pool(replica)
+            async with pool_instance.connection() as conn:
+                cur = await conn.execute(LAG_QUERY)
+                replica.record_lag(await cur.fetchone())
+        except Exception as e:
+            replica.mark_down(e)
+        finally:
+            self._checking.discard(replica.name)
+
+    async def pick(self):
+        for replica in self._rotation():
+            if time.monotonic() < replica.down_until:
+                continue
+            await self._refresh_lag(replica)
+            if replica.usable():
+                replica.reads += 1
+                return replica, await self._pool(replica)
+        self.fallbacks += 1
+        return None
+
+    async def close(self) -> None:
+        for replica in self.replicas:
+            if replica.pool is not None:
+                await replica.pool.close()
+                replica.pool = None
@@ -0,0 +1,226 @@
+"""Per-route statement timeouts and cancellation of queries for departed clients.
+
+Timeouts live in system_settings: statement_timeout_ms applies to every route
+and route_statement_timeouts overrides it per route, keyed by
+"METHOD /path/{template}" or just "/path/{template}", e.g.
+
+    {"GET /admin/users": 5000, "/admin/top-affiliates": 10000}
+
+The apply_statement_timeout dependency resolves the route's timeout for each
+request, and execute_query / transaction() on both database interfaces issue
+SET LOCAL statement_timeout before the request's statements, so the limit
+ends with the transaction and never leaks into pooled connections. Settings
+are re-read every STATEMENT_TIMEOUT_REFRESH seconds, or right after they are
+saved through /admin/system-settings.
+
+CancelOnDisconnectMiddleware watches for the client going away. Every
+connection running a statement for the request is registered while it does,
+so a disconnect sends a server-side cancel to each of them and the
+connections return to the pool as soon as Postgres aborts the query; later
+statements of that request fail fast with RequestCancelled.
+"""
+from typing import Any, Dict, Iterator, Optional, Set
+from contextlib import contextmanager
+from contextvars import ContextVar
+import asyncio
+import logging
+import threading
+import time
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from .config import STATEMENT_TIMEOUT_REFRESH
+from .tracing import route_template
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_QUERY = """
+    SELECT statement_timeout_ms, route_statement_timeouts
+    FROM system_settings
+    ORDER BY updated_at DESC NULLS LAST
+    LIMIT 1
+"""
+
+_statement_timeout: ContextVar[Optional[int]] = ContextVar("statement_timeout", default=None)
+
+class RequestCancelled(Exception):
+    """Raised for statements started after the request's client disconnected."""
+
+def validate_timeouts(default_ms: Any, routes: Any) -> Dict[str, Any]:
+    """Normalise timeout settings, raising ValueError for anything but positive integers."""
+    def positive(value: Any, name: str) -> Optional[int]:
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+            raise ValueError(f"{name} must be a positive number of milliseconds")
+        return value
+
+    if not isinstance(routes or {}, dict):
+        raise ValueError("route_statement_timeouts must be an object of route to milliseconds")
+    return {
+        "statement_timeout_ms": positive(default_ms, "statement_timeout_ms"),
+        "route_statement_timeouts": {
+            str(route).strip(): positive(ms, route) for route, ms in (routes or {}).items()
+        },
+    }
+
+class StatementTimeouts:
+    def __init__(self, refresh: float = STATEMENT_TIMEOUT_REFRESH):
+        self.refresh = refresh
+        self.default_ms: Optional[int] = None
+        self.routes: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> None:
+        from .async_database import AsyncDatabaseInterface
+        try:
+            rows = await AsyncDatabaseInterface.execute_query(SETTINGS_QUERY)
+            settings = validate_timeouts(
+                rows[0]["statement_timeout_ms"] if rows else None,
+                rows[0]["route_statement_timeouts"] if rows else None
+            )
+            self.default_ms = settings["statement_timeout_ms"]
+            self.routes = {route: ms for route, ms in settings["route_statement_timeouts"].items() if ms}
+        except Exception as e:
+            # Keep the last good settings; retried after the refresh interval
+            logger.warning(f"Could not load statement timeouts: {e}")
+        self._loaded_at = time.monotonic()
+
+    async def for_route(self, method: str, path: str) -> Optional[int]:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh:
+            async with self._lock:
+                if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh:
+                    await self._load()
+        return self.routes.get(f"{method} {path}", self.routes.get(path, self.default_ms))
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"default_ms": self.default_ms, "routes": dict(self.routes), "refresh": self.refresh}
+
+statement_timeouts = StatementTimeouts()
+
+async def apply_statement_timeout(request: Request) -> None:
+    """App-wide dependency; `async def` so sync endpoints inherit the ContextVar."""
+    ms = await statement_timeouts.for_route(request.method, route_template(request.scope))
+    if ms:
+        _statement_timeout.set(ms)
+
+def statement_timeout_sql() -> Optional[str]:
+    """The SET LOCAL for the current request's timeout, or None when it has none."""
+    ms = _statement_timeout.get()
+    return f"SET LOCAL statement_timeout = {int(ms)}" if ms else None
+
+class RequestCancellation:
+    def __init__(self):
+        self.cancelled = False
+        self._connections: Set[Any] = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def running(self, conn: Any) -> Iterator[None]:
+        with self._lock:
+            if self.cancelled:
+                raise RequestCancelled("Client disconnected before the statement started")
+            self._connections.add(conn)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._connections.discard(conn)
+
+    def cancel(self) -> int:
+        """Cancel every statement in flight for the request; returns how many were signalled."""
+        with self._lock:
+            self.cancelled = True
+            connections = list(self._connections)
+        for conn in connections:
+            try:
+                # PQcancel on a separate socket; safe from any thread for psycopg2 and psycopg 3
+                conn.cancel()
+            except Exception as e:
+                logger.warning(f"Could not cancel statement after client disconnect: {e}")
+        return len(connections)
+
+_cancellation: ContextVar[Optional[RequestCancellation]] = ContextVar("request_cancellation", default=None)
+
+@contextmanager
+def cancellable(conn: Any) -> Iterator[None]:
+    """Register `conn` as running a statement for the current request."""
+    cancellation = _cancellation.get()
+    if cancellation is None:
+        yield
+        return
+    with cancellation.running(conn):
+        yield
+
+class CancelOnDisconnectMiddleware:
+    """Pure ASGI middleware that cancels a request's queries when its client disconnects.
+
+    A single task reads the ASGI receive channel and hands messages to the
+    app through a one-slot queue, so the request body keeps its backpressure
+    and an http.disconnect is seen even while the app is busy in a query.
+    """
+
+    disconnects = 0
+    cancelled_statements = 0
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cancellation = RequestCancellation()
+        token = _cancellation.set(cancellation)
+        messages: asyncio.Queue = asyncio.Queue(maxsize=1)
+        responded = False
+        disconnect: Optional[Dict[str, Any]] = None
+
+        async def listen() -> None:
+            while True:
+                message = await receive()
+                if message["type"] != "http.disconnect":
+                    await messages.put(message)
+                    continue
+                # Servers report a disconnect once the response is complete too;
+                # background tasks still running then must not be cancelled
+                if not responded:
+                    cls = type(self)
+                    cls.disconnects += 1
+                    count = await run_in_threadpool(cancellation.cancel)
+                    cls.cancelled_statements += count
+                    if count:
+                        logger.info(f"Client left {scope['method']} {scope['path']}; cancelled {count} statement(s)")
+                await messages.put(message)
+                return
+
+        async def receive_from_listener() -> Dict[str, Any]:
+            nonlocal disconnect
+            # The listener stops after a disconnect; repeat it to any later caller
+            if disconnect is not None:
+                return disconnect
+            message = await messages.get()
+            if message["type"] == "http.disconnect":
+                disconnect = message
+            return message
+
+        async def send_tracking(message) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+            await send(message)
+
+        listener = asyncio.ensure_future(listen())
+        try:
+            await self.app(scope, receive_from_listener, send_tracking)
+        finally:
+            listener.cancel()
+            _cancellation.reset(token)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {"disconnects": cls.disconnects, "cancelled_statements": cls.cancelled_statements}
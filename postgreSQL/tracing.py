@@ -0,0 +1,220 @@
+"""Request-scoped database tracing.
+
+TracingMiddleware opens a RequestTrace for every HTTP request and keeps it in
+instrumentation.request_trace, a ContextVar that sync endpoints see too
+because the threadpool copies the request's context. Every statement or batch
+recorded by postgreSQL/instrumentation.py is reported into the current trace,
+so each request knows how many statements it ran, how long they took and how
+long it waited for connections.
+
+The response gets a Server-Timing header (db, pool and total durations, with
+the query count), visible in the browser's network panel. When the response
+is complete the trace is folded into a per-route summary; a request that ran
+one statement fingerprint more than TRACE_REPEAT_THRESHOLD times is logged as
+a likely N+1 and counted against its route. Queries from background tasks
+that run after the response body are not attributed to the request.
+"""
+from typing import Any, Callable, Dict, List, Optional
+from collections import Counter
+import logging
+import threading
+import time
+from starlette.routing import Match
+from .config import TRACE_REPEAT_THRESHOLD
+from .instrumentation import Histogram, percentile, request_trace
+
+logger = logging.getLogger(__name__)
+
+class RequestTrace:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started = time.monotonic()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self.statements: Counter = Counter()
+        self.texts: Dict[str, str] = {}
+        self.open = True
+        self._lock = threading.Lock()
+
+    def add(self, statement_id: str, text: str, ms: float, pool_wait_ms: float) -> None:
+        if not self.open:
+            return
+        with self._lock:
+            self.queries += 1
+            self.db_ms += ms
+            self.pool_wait_ms += pool_wait_ms
+            self.statements[statement_id] += 1
+            self.texts.setdefault(statement_id, text)
+
+    def elapsed_ms(self) -> float:
+        return (time.monotonic() - self.started) * 1000
+
+    def repeated(self, threshold: int = TRACE_REPEAT_THRESHOLD) -> Dict[str, int]:
+        return {sid: count for sid, count in self.statements.items() if count > threshold}
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries", '
+            f"pool;dur={self.pool_wait_ms:.1f}, "
+            f"total;dur={self.elapsed_ms():.1f}"
+        )
+
+def current_trace() -> Optional[RequestTrace]:
+    return request_trace.get()
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.pool_wait_ms = 0.0
+        self.total_ms = 0.0
+        self.n_plus_one = 0
+        self.repeated: Counter = Counter()
+        self.latency = Histogram()
+
+    def add(self, trace: RequestTrace, status: int, elapsed_ms: float, repeated: Dict[str, int]) -> None:
+        self.requests += 1
+        self.errors += status >= 500
+        self.queries += trace.queries
+        self.max_queries = max(self.max_queries, trace.queries)
+        self.db_ms += trace.db_ms
+        self.pool_wait_ms += trace.pool_wait_ms
+        self.total_ms += elapsed_ms
+        self.latency.add(elapsed_ms)
+        if repeated:
+            self.n_plus_one += 1
+            self.repeated.update(repeated.keys())
+
+    def summary(self) -> Dict[str, Any]:
+        n = self.requests or 1
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "queries_per_request": round(self.queries / n, 2),
+            "max_queries": self.max_queries,
+            "db_ms_per_request": round(self.db_ms / n, 3),
+            "pool_wait_ms_per_request": round(self.pool_wait_ms / n, 3),
+            "mean_ms": round(self.total_ms / n, 3),
+            "p95_ms": percentile([self.latency], 0.95),
+            "n_plus_one_requests": self.n_plus_one,
+            "repeated_statements": dict(self.repeated.most_common(5)),
+        }
+
+class RouteSummary:
+    """Per-route aggregates of finished request traces, keyed by "METHOD /path/{template}"."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, RouteStats] = {}
+
+    def add(self, route: str, trace: RequestTrace, status: int, repeated: Dict[str, int]) -> None:
+        elapsed_ms = trace.elapsed_ms()
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.add(trace, status, elapsed_ms, repeated)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {route: stats.summary() for route, stats in sorted(self._routes.items())}
+
+    def prometheus(self) -> str:
+        """The summary in Prometheus text format, for scraping."""
+        metrics = [
+            ("route_requests_total", "counter", "Requests served", lambda s: s.requests),
+            ("route_errors_total", "counter", "Requests answered with a 5xx status", lambda s: s.errors),
+            ("route_db_queries_total", "counter", "Database statements run", lambda s: s.queries),
+            ("route_db_seconds_total", "counter", "Time spent in database statements", lambda s: s.db_ms / 1000),
+            ("route_pool_wait_seconds_total", "counter", "Time spent waiting for connections",
+             lambda s: s.pool_wait_ms / 1000),
+            ("route_seconds_total", "counter", "Time spent serving requests", lambda s: s.total_ms / 1000),
+            ("route_n_plus_one_total", "counter", "Requests that repeated a statement past the threshold",
+             lambda s: s.n_plus_one),
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            lines: List[str] = []
+            for name, kind, help_text, value in metrics:
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for route, stats in routes:
+                    method, _, path = route.partition(" ")
+                    lines.append(f'{name}{{method="{method}",route="{path}"}} {value(stats)}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+route_summary = RouteSummary()
+
+_routes_by_endpoint: Dict[Any, List[Any]] = {}
+
+def route_template(scope: Dict[str, Any]) -> str:
+    """Path template of the route that served `scope`, e.g. "/posts/{post_id}/related".
+
+    Only known once routing has run. Endpoints mounted under several prefixes
+    are told apart by matching the path again.
+    """
+    endpoint = scope.get("endpoint")
+    router = scope.get("router")
+    if endpoint is None or router is None:
+        return "unmatched"
+    candidates = _routes_by_endpoint.get(endpoint)
+    if candidates is None:
+        candidates = [r for r in router.routes if getattr(r, "endpoint", None) is endpoint]
+        _routes_by_endpoint[endpoint] = candidates
+    for route in candidates:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return candidates[0].path if candidates else "unmatched"
+
+class TracingMiddleware:
+    """Pure ASGI middleware, so streaming responses are traced until their last chunk."""
+
+    def __init__(self, app: Callable, summary: RouteSummary = route_summary,
+                 repeat_threshold: int = TRACE_REPEAT_THRESHOLD):
+        self.app = app
+        self.summary = summary
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = request_trace.set(trace)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                trace.open = False
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_trace.reset(token)
+            trace.open = False
+            route = f"{trace.method} {route_template(scope)}"
+            repeated = trace.repeated(self.repeat_threshold)
+            for statement_id, count in repeated.items():
+                logger.warning(
+                    f"Possible N+1 on {route}: statement {statement_id} ran {count} times "
+                    f"in one request: {trace.texts[statement_id][:200]}"
+                )
+            self.summary.add(route, trace, status, repeated)
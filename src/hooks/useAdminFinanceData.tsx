@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { apiClient } from "@/lib/api-client";
 import { useToast } from "@/hooks/use-toast";
 
@@ -59,6 +59,8 @@ export interface PromoCodeCreate {
 
 export const useAdminFinanceData = () => {
   const [transactions, setTransactions] = useState<Transaction[]>([]);
+  const [transactionsCursor, setTransactionsCursor] = useState<string | null>(null);
+  const transactionFilters = useRef<{ search?: string; type?: string; status?: string }>({});
   const [plans, setPlans] = useState<Plan[]>([]);
   const [subscriptions, setSubscriptions] = useState<Subscription[]>([]);
   const [promoCodes, setPromoCodes] = useState<PromoCode[]>([]);
@@ -66,7 +68,7 @@ export const useAdminFinanceData = () => {
   const [error, setError] = useState<string | null>(null);
   const { toast } = useToast();
 
-  const fetchTransactions = async (search?: string, type?: string, status?: string) => {
+  const fetchTransactions = async (search?: string, type?: string, status?: string, cursor?: string) => {
     try {
       console.log("Fetching transactions from PostgreSQL API...");
       
@@ -74,12 +76,16 @@ export const useAdminFinanceData = () => {
       if (search) params.append('search', search);
       if (type && type !== 'all-types') params.append('type', type);
       if (status && status !== 'all-status') params.append('status', status);
+      if (cursor) params.append('cursor', cursor);
       const queryString = params.toString() ? `?${params.toString()}` : '';
       
-      const data = await apiClient.get(`/admin/transactions${queryString}`);
+      const { data, nextCursor } = await apiClient.getPage(`/admin/transactions${queryString}`);
       console.log("Transactions fetched:", data);
       
-      setTransactions(data || []);
+      // A cursor continues the current listing; otherwise start over
+      setTransactions(prev => cursor ? [...prev, ...(data || [])] : (data || []));
+      setTransactionsCursor(nextCursor);
+      transactionFilters.current = { search, type, status };
     } catch (err: any) {
       console.error("Error fetching transactions:", err);
       setError(err.message);
@@ -91,6 +97,12 @@ export const useAdminFinanceData = () => {
     }
   };
 
+  const fetchMoreTransactions = async () => {
+    if (!transactionsCursor) return;
+    const { search, type, status } = transactionFilters.current;
+    await fetchTransactions(search, type, status, transactionsCursor);
+  };
+
   const fetchPlans = async (search?: string, status?: string) => {
     try {
       console.log("Fetching plans from PostgreSQL API...");
@@ -242,6 +254,8 @@ export const useAdminFinanceData = () => {
     isLoading,
     error,
     fetchTransactions,
+    fetchMoreTransactions,
+    hasMoreTransactions: transactionsCursor !== null,
     fetchPlans,
     fetchSubscriptions,
     fetchPromoCodes,
@@ -8,6 +8,18 @@ export const apiClient = {
     }
     return response.json();
   },
+
+  // For keyset-paged listings: the next page's cursor comes back in X-Next-Cursor
+  getPage: async (endpoint: string) => {
+    const response = await fetch(`${API_BASE_URL}${endpoint}`);
+    if (!response.ok) {
+      throw new Error(`API error: ${response.status}`);
+    }
+    return {
+      data: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+  },
   
   post: async (endpoint: string, data: any) => {
     const response = await fetch(`${API_BASE_URL}${endpoint}`, {
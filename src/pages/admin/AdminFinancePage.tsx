@@ -291,7 +291,7 @@ const FinanceDashboardTab = () => {
 };
 
 const TransactionsTab = () => {
-  const { transactions, fetchTransactions, isLoading } = useAdminFinanceData();
+  const { transactions, fetchTransactions, fetchMoreTransactions, hasMoreTransactions, isLoading } = useAdminFinanceData();
   const [searchTerm, setSearchTerm] = useState("");
   const [typeFilter, setTypeFilter] = useState("all-types");
   const [statusFilter, setStatusFilter] = useState("all-status");
@@ -411,6 +411,13 @@ const TransactionsTab = () => {
             No transactions found matching your search criteria
           </div>
         )}
+        {hasMoreTransactions && (
+          <div className="flex justify-center py-4">
+            <Button onClick={fetchMoreTransactions} variant="outline">
+              Load more
+            </Button>
+          </div>
+        )}
       </Card>
     </div>
   );
@@ -0,0 +1,31 @@
+"""Keyset cursors from encode_cursor travel through query strings."""
+from datetime import datetime, timezone
+import base64
+import uuid
+import pytest
+from postgreSQL.helpers import decode_cursor, encode_cursor
+
+def test_round_trip_keeps_timestamp_and_id():
+    created_at = datetime(2024, 5, 17, 8, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(created_at, row_id)) == (created_at, str(row_id))
+
+def test_round_trip_naive_timestamp_and_integer_id():
+    created_at = datetime(2024, 5, 17, 8, 30)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, "42")
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor(datetime(2024, 1, 1, tzinfo=timezone.utc), "a?b/c+d")
+    assert "=" not in cursor
+    assert all(c.isalnum() or c in "-_" for c in cursor)
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    base64.urlsafe_b64encode(b'{"a": 1}').decode(),
+    base64.urlsafe_b64encode(b'["yesterday", "1"]').decode(),
+    base64.urlsafe_b64encode(b'["2024-01-01T00:00:00"]').decode(),
+])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,68 @@
+"""to_numbered rewrites the SQL and argument order of every prepared statement."""
+from datetime import datetime
+import uuid
+import pytest
+from postgreSQL.prepared import to_numbered
+
+def test_positional_placeholders_are_numbered_in_order():
+    assert to_numbered("SELECT * FROM t WHERE a = %s AND b = %s", (1, "x")) == (
+        "SELECT * FROM t WHERE a = $1 AND b = $2", [1, "x"]
+    )
+
+def test_repeated_named_placeholder_reuses_its_number():
+    query = "SELECT * FROM t WHERE a = %(x)s OR b = %(x)s AND c = %(y)s"
+    assert to_numbered(query, {"y": 2, "x": 1, "unused": 3}) == (
+        "SELECT * FROM t WHERE a = $1 OR b = $1 AND c = $2", [1, 2]
+    )
+
+def test_missing_named_argument_is_refused():
+    assert to_numbered("SELECT * FROM t WHERE a = %(x)s", {"y": 1}) is None
+
+def test_percent_escape_becomes_a_literal_percent():
+    assert to_numbered("SELECT * FROM t WHERE a LIKE 'x%%' AND b = %s", (1,)) == (
+        "SELECT * FROM t WHERE a LIKE 'x%' AND b = $1", [1]
+    )
+
+def test_text_is_left_alone_without_arguments():
+    # psycopg2 does not interpolate, so %% must stay as written
+    assert to_numbered("SELECT * FROM t WHERE a LIKE 'x%%'", None) == ("SELECT * FROM t WHERE a LIKE 'x%%'", [])
+
+@pytest.mark.parametrize("query, params", [
+    ("SELECT * FROM t WHERE a = %s AND b = %(x)s", (1, 2)),
+    ("SELECT * FROM t WHERE a = %s AND b = %(x)s", {"x": 1}),
+])
+def test_mixed_placeholders_are_refused(query, params):
+    assert to_numbered(query, params) is None
+
+@pytest.mark.parametrize("params", [(1,), (1, 2, 3)])
+def test_wrong_positional_argument_count_is_refused(params):
+    assert to_numbered("SELECT * FROM t WHERE a = %s AND b = %s", params) is None
+
+@pytest.mark.parametrize("value", [[1, 2], (1, 2), {"a": 1}])
+def test_non_scalar_arguments_are_refused(value):
+    assert to_numbered("SELECT * FROM t WHERE a = ANY(%s)", (value,)) is None
+
+def test_scalar_types_are_accepted():
+    values = (None, 1.5, datetime(2024, 1, 1), uuid.UUID(int=1))
+    converted = to_numbered("SELECT %s, %s, %s, %s", values)
+    assert converted == ("SELECT $1, $2, $3, $4", list(values))
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM t WHERE a = $1 AND b = %s",
+    "SELECT 1; SELECT %s",
+    "UPDATE t SET a = %s; DELETE FROM t",
+])
+def test_dollar_and_multiple_statements_are_refused(query):
+    assert to_numbered(query, (1,)) is None
+
+@pytest.mark.parametrize("query", ["CREATE TABLE t (a int)", "BEGIN", "COPY t FROM STDIN", "EXPLAIN SELECT 1"])
+def test_other_statement_kinds_are_refused(query):
+    assert to_numbered(query, None) is None
+
+def test_leading_comments_and_trailing_semicolon_are_dropped():
+    assert to_numbered("-- lookup\n/* by id */ SELECT * FROM t WHERE id = %s;\n", (7,)) == (
+        "SELECT * FROM t WHERE id = $1", [7]
+    )
+
+def test_unsupported_format_is_refused():
+    assert to_numbered("SELECT * FROM t WHERE a = %d", (1,)) is None